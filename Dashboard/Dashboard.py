@@ -1,9 +1,30 @@
+import os
+import time
+
 import streamlit as st
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
+from plotly.colors import qualitative, sequential
+
+from agg_cache import AggregateCache, make_filter_key
+from anomalies import AnomalyFeed
+from backends import DUCKDB_BACKEND, DuckDBBackend, FrameBackend, FrameView, backend_name
+from downsample import DEFAULT_POINT_BUDGET, annotate_reduction
+from downsample import MODES as DOWNSAMPLE_MODES
+from figures import express as fx
+from figures import COMPACT_POINTS_ENV, compact_points, figure_pool, webgl_threshold
+from filter_index import FilterState
+from forecast import TRAINING_COLUMNS, ForecastModel, backtest, calendar_rows, forecast_errors, scenario_grid
+from ingest import INGEST_PATH_ENV, LiveDataset, open_source
+from lazy_tabs import LazyTabs, flush_charts, show_chart, start_chart_queue, start_render_stats
+from partitions import PARTITIONS_ENV, PartitionCatalog, load_partitions
+from preprocess import load_main_data, main_data_paths, source_version
+from profiler import export_trace, profiled, profiling_mode, session_trace_jsonl, start_profiler
+from scenarios import DEFAULT_GRID, WEATHER_COLUMNS, WEATHER_FEATURE, simulate, weather_grid
+from schema import memory_report
+from shared_cache import SharedStore, shared_cache_dir
+
+# Frame dasar dibagi ke semua sesi; dengan copy-on-write, tidak ada operasi yang bisa mengubahnya di tempat
+pd.set_option('mode.copy_on_write', True)
 
 # Konfigurasi Halaman
 st.set_page_config(
@@ -13,109 +34,108 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-# Load dan proses data
-@st.cache_data
+# Profiler per rerun (?profile=1, atau =memory untuk delta memori); bila mati semua pemanggilan adalah no-op
+profiler = start_profiler(profiling_mode())
+
+# Load dan proses data. cache_resource, bukan cache_data: frame memetakan snapshot Feather tanpa disalin
+# dan dibagi apa adanya, sedangkan cache_data mem-pickle frame dan mengembalikan salinan baru setiap dipanggil
+@st.cache_resource
 def load_data():
-    main_data = pd.read_csv("Dashboard/main_data.csv")
-    main_data['dteday'] = pd.to_datetime(main_data['dteday'])
-
-    # Tambah kolom tanggal untuk filtering
-    main_data['year'] = main_data['dteday'].dt.year
-    main_data['month'] = main_data['dteday'].dt.month
-    main_data['day'] = main_data['dteday'].dt.day
-    main_data['date'] = main_data['dteday'].dt.date
-
-    # Season mapping
-    season_labels = {1: 'Winter', 2: 'Spring', 3: 'Summer', 4: 'Fall'}
-    main_data['season_name'] = main_data['season'].map(season_labels)
-    
-    # Weather mapping
-    weather_labels = {1: 'Clear', 2: 'Mist/Cloudy', 3: 'Light Rain/Snow', 4: 'Heavy Rain/Snow'}
-    main_data['weather_condition'] = main_data['weathersit'].map(weather_labels)
-    
-    # Year mapping
-    year_labels = {0: '2011', 1: '2012'}
-    main_data['year_label'] = main_data['yr'].map(year_labels)
-    
-    # Workingday mapping
-    workingday_labels = {0: 'Non-Working Day', 1: 'Working Day'}
-    main_data['workingday_label'] = main_data['workingday'].map(workingday_labels)
-    
-    # Weekday mapping
-    weekday_labels = {0: 'Sunday', 1: 'Monday', 2: 'Tuesday', 3: 'Wednesday', 
-                      4: 'Thursday', 5: 'Friday', 6: 'Saturday'}
-    main_data['weekday_name'] = main_data['weekday'].map(weekday_labels)
-    
-    # Month mapping
-    month_labels = {1: 'January', 2: 'February', 3: 'March', 4: 'April', 5: 'May', 6: 'June',
-                   7: 'July', 8: 'August', 9: 'September', 10: 'October', 11: 'November', 12: 'December'}
-    main_data['month_name'] = main_data['mnth'].map(month_labels)
-    
-    # Denormalize weather metrics to their actual values
-    main_data['temp_actual'] = main_data['temp'] * 41  # Celsius
-    main_data['atemp_actual'] = main_data['atemp'] * 50  # Celsius
-    main_data['hum_actual'] = main_data['hum'] * 100  # Percentage
-    main_data['windspeed_actual'] = main_data['windspeed'] * 67  # km/h
-    
-    # Create temperature bins
-    main_data['temp_category'] = pd.cut(
-        main_data['temp_actual'], 
-        bins=[-20, 0, 10, 20, 30, 50],
-        labels=['Very Cold (< 0°C)', 'Cold (0-10°C)', 'Mild (10-20°C)', 'Warm (20-30°C)', 'Hot (> 30°C)']
-    )
-    
-    # Create humidity bins
-    main_data['hum_category'] = pd.cut(
-        main_data['hum_actual'], 
-        bins=[0, 30, 60, 80, 100],
-        labels=['Low (< 30%)', 'Medium (30-60%)', 'High (60-80%)', 'Very High (> 80%)']
-    )
-    
-    # Create windspeed bins
-    main_data['windspeed_category'] = pd.cut(
-        main_data['windspeed_actual'], 
-        bins=[0, 10, 20, 30, 70],
-        labels=['Low (< 10 km/h)', 'Medium (10-20 km/h)', 'High (20-30 km/h)', 'Very High (> 30 km/h)']
-    )
-    
-    # Create time categories
-    def categorize_time(hour):
-        if 6 <= hour <= 9:
-            return 'Morning Peak'
-        elif 10 <= hour <= 15:
-            return 'Day Time'
-        elif 16 <= hour <= 19:
-            return 'Evening Peak'
-        else:
-            return 'Night Time'
-    
-    main_data['time_category'] = main_data['hr'].apply(categorize_time)
-    
-    # Buat indeks kenyamanan
-    main_data['comfort_index'] = (
-        (main_data['temp'] * 0.5) +  
-        ((1 - main_data['hum']) * 0.3) +  
-        ((1 - main_data['windspeed']) * 0.2)  
-    )
-    
-    # Categorize comfort index
-    main_data['comfort_category'] = pd.cut(
-        main_data['comfort_index'], 
-        bins=[0, 0.3, 0.5, 0.7, 1],
-        labels=['Uncomfortable', 'Moderately Comfortable', 'Comfortable', 'Very Comfortable']
-    )
-    
-    # User type categorization
-    main_data['user_type'] = np.where(main_data['casual'] > main_data['registered'], 'Casual Dominant', 'Registered Dominant')
+    # Snapshot Feather dipakai bila masih segar; CSV hanya dibaca ulang bila snapshot basi.
+    # DASHBOARD_DATA_PATH dapat menunjuk ke CSV lain dengan kolom yang sama
+    return load_main_data(*main_data_paths(), zero_copy=True)
 
-    return main_data
+# Frame, indeks filter dan kubus sum/count per sel kategori filter (beserta rollup-nya), dibagi ke semua sesi.
+# Bila DASHBOARD_INGEST_PATH diisi, baris baru ditambahkan secara inkremental di setiap rerun
+@st.cache_resource
+def load_live_dataset():
+    ingest_path = os.environ.get(INGEST_PATH_ENV)
+    source = open_source(ingest_path) if ingest_path else None
+    if shared_cache_dir() is None:
+        return LiveDataset(load_data(), source)
+    # Tier bersama (DASHBOARD_SHARED_CACHE): semua replika memetakan snapshot yang sama, dan versinya sama
+    # di setiap proses agar kunci agregat bisa dipakai bersama
+    return LiveDataset(load_data(), source, source_version(main_data_paths()[0]))
 
-main_data = load_data()
+# Cache agregat bersama untuk semua sesi, dibatasi oleh anggaran memori. Dengan DASHBOARD_SHARED_CACHE,
+# miss dicari dulu di store SQLite yang dibagi ke semua proses di host yang sama
+@st.cache_resource
+def load_aggregate_cache():
+    max_mb = float(os.environ.get('DASHBOARD_AGG_CACHE_MB', 64))
+    shared_dir = shared_cache_dir()
+    # None bila folder tidak aman atau store tidak bisa dibuka: hanya cache lokal yang dipakai
+    store = SharedStore.open(shared_dir) if shared_dir else None
+    return AggregateCache(max_bytes=int(max_mb * 1024 * 1024), store=store)
 
-# Date range filter
-min_date = main_data['dteday'].min().date()
-max_date = main_data['dteday'].max().date()
+# Data terpartisi per kota/tahun/bulan (DASHBOARD_PARTITIONS): katalog hanya membaca nama direktori,
+# dipindai ulang sesekali agar bulan baru ikut terlihat
+@st.cache_resource(ttl=60)
+def load_partition_catalog(root):
+    return PartitionCatalog(root)
+
+# Satu dataset per kombinasi partisi terpilih; hanya beberapa kombinasi terakhir yang disimpan
+@st.cache_resource(max_entries=4)
+def load_partitioned_dataset(root, partitions):
+    return LiveDataset(load_partitions(load_partition_catalog(root), partitions))
+
+# Pool proses untuk membangun figure Plotly secara paralel (opsional, DASHBOARD_FIGURE_WORKERS), dibagi ke semua sesi
+@st.cache_resource
+def load_figure_pool():
+    return figure_pool()
+
+# Backend DuckDB (DASHBOARD_BACKEND=duckdb): filter dan agregat dijalankan sebagai SQL langsung pada file,
+# tanpa memuat baris ke memori. Dibuat ulang sesekali agar file/partisi baru ikut terlihat
+@st.cache_resource(ttl=60)
+def load_sql_backend(source, cities):
+    return DuckDBBackend(source, cities)
+
+# Detektor anomali per sumber DuckDB, dipertahankan lintas versi backend: setiap versi hanya menambah
+# total per jam (dijumlahkan di SQL) setelah jam terakhir yang sudah dinilai
+@st.cache_resource
+def load_anomaly_feed(source, cities):
+    return AnomalyFeed()
 
+partition_root = os.environ.get(PARTITIONS_ENV)
+use_sql = backend_name() == DUCKDB_BACKEND
+live_dataset = None
+
+def load_partition_snapshot(date_range):
+    # Partition pruning: hanya bulan dari kota terpilih yang beririsan dengan rentang tanggal yang dibaca
+    date_start, date_end = date_range if len(date_range) == 2 else (None, None)
+    partitions = tuple(catalog.prune(selected_cities, date_start, date_end))
+    with profiler.span("load partitions", kind='load'):
+        dataset = load_partitioned_dataset(partition_root, partitions)
+    main_data = dataset.snapshot().main_data
+    partition_note.caption(f"Loaded {len(partitions):,} of {len(catalog.partitions):,} partitions "
+                           f"({len(main_data):,} rows)")
+    return dataset
+
+profiler.stage("load")
+if partition_root:
+    catalog = load_partition_catalog(partition_root)
+    with st.sidebar.expander("City", expanded=True):
+        selected_cities = st.multiselect("Select City", catalog.cities, default=catalog.cities[:1])
+        partition_note = st.empty()
+    if not selected_cities:
+        st.warning("Select at least one city.")
+        st.stop()
+    min_date, max_date = catalog.date_bounds(selected_cities)
+    if use_sql:
+        backend = load_sql_backend(partition_root, tuple(selected_cities))
+        partition_note.caption(f"Querying {len(selected_cities):,} of {len(catalog.cities):,} cities "
+                               "on disk with DuckDB")
+elif use_sql:
+    backend = load_sql_backend(main_data_paths()[0], None)
+    min_date, max_date = backend.bounds('dteday')
+else:
+    live_dataset = load_live_dataset()
+    live_dataset.refresh()
+    backend = FrameBackend(*live_dataset.snapshot())
+    min_date, max_date = backend.bounds('dteday')
+
+profiler.stage("sidebar filters")
+
+# Date range filter
 with st.sidebar.expander("Date Range", expanded=True):
     date_range = st.date_input(
         "Select Date Range",
@@ -124,14 +144,18 @@ with st.sidebar.expander("Date Range", expanded=True):
         max_value=max_date
     )
 
+if partition_root and not use_sql:
+    live_dataset = load_partition_snapshot(date_range)
+    backend = FrameBackend(*live_dataset.snapshot())
+
 # Season filter
 with st.sidebar.expander("Season", expanded=True):
-    season_options = ['All Seasons'] + sorted(main_data['season_name'].unique().tolist())
+    season_options = ['All Seasons'] + sorted(backend.options('season_name'))
     selected_season = st.selectbox("Select Season", season_options)
 
 # Weather filter
 with st.sidebar.expander("Weather Condition", expanded=True):
-    weather_options = ['All Weather Conditions'] + sorted(main_data['weather_condition'].unique().tolist())
+    weather_options = ['All Weather Conditions'] + sorted(backend.options('weather_condition'))
     selected_weather = st.selectbox("Select Weather Condition", weather_options)
 
 # Day type filter
@@ -141,15 +165,16 @@ with st.sidebar.expander("Day Type", expanded=True):
 
 # Temperature range filter
 with st.sidebar.expander("Temperature Range", expanded=True):
-    temp_options = ['All Temperature Ranges'] + sorted(main_data['temp_category'].unique().tolist())
+    temp_options = ['All Temperature Ranges'] + sorted(backend.options('temp_category'))
     selected_temp = st.selectbox("Select Temperature Range", temp_options)
     
     # Additional slider for more granular temperature filtering
+    temp_bounds = tuple(float(value) for value in backend.bounds('temp_actual'))
     temp_range = st.slider(
         "Temperature Range (°C)",
-        float(main_data['temp_actual'].min()),
-        float(main_data['temp_actual'].max()),
-        (float(main_data['temp_actual'].min()), float(main_data['temp_actual'].max()))
+        temp_bounds[0],
+        temp_bounds[1],
+        temp_bounds
     )
 
 # User type filter
@@ -164,59 +189,95 @@ if st.sidebar.button("Reset All Filters"):
     selected_day_type = 'All Days'
     selected_temp = 'All Temperature Ranges'
     date_range = [min_date, max_date]
+    if partition_root and not use_sql:
+        # Rentang tanggal penuh membutuhkan semua partisi dari kota terpilih
+        live_dataset = load_partition_snapshot(date_range)
+        backend = FrameBackend(*live_dataset.snapshot())
+        temp_bounds = tuple(float(value) for value in backend.bounds('temp_actual'))
     selected_user_type = 'All Users'
-    temp_range = (float(main_data['temp_actual'].min()), float(main_data['temp_actual'].max()))
+    temp_range = temp_bounds
 
-# Apply filters
-filtered_data = main_data.copy()
+profiler.stage("filter resolution")
 
-# Date filter
-if len(date_range) == 2:
-    filtered_data = filtered_data[(filtered_data['dteday'].dt.date >= date_range[0]) & 
-                                 (filtered_data['dteday'].dt.date <= date_range[1])]
+# Apply filters: semua filter diselesaikan sekaligus lewat indeks bitset
+filter_state = FilterState(
+    date_start=date_range[0] if len(date_range) == 2 else None,
+    date_end=date_range[1] if len(date_range) == 2 else None,
+    season=selected_season,
+    weather=selected_weather,
+    day_type=selected_day_type,
+    temp_category=selected_temp,
+    temp_min=temp_range[0],
+    temp_max=temp_range[1],
+    user_type=selected_user_type,
+)
+aggregate_cache = load_aggregate_cache()
+# Dibaca sekali per rerun: di DuckDB versi dihitung dari ukuran dan mtime file data
+data_version = backend.version
+filter_key = make_filter_key(filter_state, data_version)
 
-# Season filter
-if selected_season != 'All Seasons':
-    filtered_data = filtered_data[filtered_data['season_name'] == selected_season]
+def aggregate(name, compute, *args):
+    # Hasil agregat dipakai bersama antar sesi: jangan diubah setelah diambil
+    return aggregate_cache.get_or_compute(name, filter_key, compute, *args)
 
-# Weather filter
-if selected_weather != 'All Weather Conditions':
-    filtered_data = filtered_data[filtered_data['weather_condition'] == selected_weather]
+# View hasil filter dibagi antar sesi dengan filter yang sama. Backend pandas: frame hasil filter (tanpa filter
+# aktif ini adalah main_data itu sendiri) plus sel kubus; backend DuckDB: klausa WHERE untuk setiap query
+view = aggregate('view', backend.view, filter_state)
+filtered_rows = aggregate('row_count', view.row_count)
 
-# Day type filter
-if selected_day_type == 'Working Day':
-    filtered_data = filtered_data[filtered_data['workingday'] == 1]
-elif selected_day_type == 'Non-Working Day':
-    filtered_data = filtered_data[filtered_data['workingday'] == 0]
-elif selected_day_type == 'Weekday':
-    filtered_data = filtered_data[(filtered_data['weekday'] >= 1) & (filtered_data['weekday'] <= 5)]
-elif selected_day_type == 'Weekend':
-    filtered_data = filtered_data[(filtered_data['weekday'] == 0) | (filtered_data['weekday'] == 6)]
-elif selected_day_type == 'Holiday':
-    filtered_data = filtered_data[filtered_data['holiday'] == 1]
-
-# Temperature filter
-if selected_temp != 'All Temperature Ranges':
-    filtered_data = filtered_data[filtered_data['temp_category'] == selected_temp]
+@profiled()
+def grouped_mean(group_cols, value_cols):
+    # Backend pandas menjawab dari kubus bila filter bisa dipetakan persis ke sel, selain itu groupby pada baris
+    return view.mean(group_cols, value_cols)
 
-# Additional temperature range filter
-filtered_data = filtered_data[(filtered_data['temp_actual'] >= temp_range[0]) & 
-                             (filtered_data['temp_actual'] <= temp_range[1])]
+@profiled()
+def grouped_heatmap(index, columns, value):
+    # Semua heatmap dibaca dari satu tensor jumlah/hitungan per filter; sumbunya selalu lengkap dan berurutan tetap
+    return aggregate('heatmaps', view.heatmaps).mean(index, columns, value)
 
-# User type filter
-if selected_user_type == 'Casual Dominant':
-    filtered_data = filtered_data[filtered_data['casual'] > filtered_data['registered']]
-elif selected_user_type == 'Registered Dominant':
-    filtered_data = filtered_data[filtered_data['registered'] > filtered_data['casual']]
-elif selected_user_type == 'Balanced':
-    ratio_threshold = 0.1  # 10% difference
-    filtered_data = filtered_data[abs(filtered_data['casual'] - filtered_data['registered']) / filtered_data['cnt'] < ratio_threshold]
+def ordered_mean(group_col, value_cols, order):
+    # Rata-rata per kategori, diurutkan sesuai urutan kategori yang diberikan
+    agg = grouped_mean(group_col, value_cols)
+    agg[group_col] = pd.Categorical(agg[group_col], categories=order, ordered=True)
+    return agg.sort_values(group_col)
+
+def scatter_points(chart, axes, color, value_columns=()):
+    # Titik scatter dikurangi di server (sampel berstrata atau bin kepadatan) sesuai anggaran titik
+    return aggregate(f"points/{chart}/{point_mode}/{point_budget}", view.points,
+                     axes, point_budget, point_mode, color, value_columns)
+
+def compact(points):
+    # Encoding ringkas hanya untuk plot yang titiknya mencapai ambang WebGL
+    return compact_scatter and len(points.data) >= webgl_threshold()
+
+def render_mode(points):
+    # Tanpa encoding ringkas, plotly express memilih sendiri (WebGL di atas 1000 baris)
+    if not compact_scatter:
+        return 'auto'
+    return 'webgl' if compact(points) else 'svg'
+
+def point_size(points, column=None):
+    # Bin kepadatan adalah histogram 2D/3D: ukuran penanda mengikuti jumlah baris di setiap bin
+    return 'points' if points.aggregated else column
+
+def show_points(fig, points):
+    annotate_reduction(fig, points.note)
+    show_chart(compact_points(fig) if compact(points) else fig)
+
+# Urutan kategori yang dipakai bersama oleh beberapa tab
+season_order = ['Winter', 'Spring', 'Summer', 'Fall']
+month_order = ['January', 'February', 'March', 'April', 'May', 'June', 
+              'July', 'August', 'September', 'October', 'November', 'December']
+weekday_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+time_cat_order = ['Morning Peak', 'Day Time', 'Evening Peak', 'Night Time']
 
 # Display currently applied filters
 st.sidebar.markdown("---")
 st.sidebar.subheader("Active Filters")
 active_filters = []
 
+if partition_root:
+    active_filters.append(f"🏙️ City: {', '.join(selected_cities)}")
 if len(date_range) == 2 and (date_range[0] != min_date or date_range[1] != max_date):
     active_filters.append(f"📅 Date: {date_range[0]} to {date_range[1]}")
 if selected_season != 'All Seasons':
@@ -227,7 +288,7 @@ if selected_day_type != 'All Days':
     active_filters.append(f"📆 Day Type: {selected_day_type}")
 if selected_temp != 'All Temperature Ranges':
     active_filters.append(f"🌡️ Temperature: {selected_temp}")
-if temp_range != (float(main_data['temp_actual'].min()), float(main_data['temp_actual'].max())):
+if temp_range != temp_bounds:
     active_filters.append(f"🌡️ Temp Range: {temp_range[0]:.1f}°C to {temp_range[1]:.1f}°C")
 if selected_user_type != 'All Users':
     active_filters.append(f"👥 User Type: {selected_user_type}")
@@ -238,6 +299,23 @@ if active_filters:
 else:
     st.sidebar.markdown("No filters applied")
 
+# Rendering mode: hanya tab yang sedang dipilih yang dihitung dan dikirim ke browser
+with st.sidebar.expander("Rendering", expanded=False):
+    lazy_tabs = st.toggle("Render only the selected tab",
+                          value=os.environ.get('DASHBOARD_LAZY_TABS', '1') != '0')
+    measure_payload = st.checkbox("Measure chart payload size", value=False)
+    point_mode = st.selectbox("Large scatter plots", DOWNSAMPLE_MODES)
+    point_budget = int(st.number_input("Point budget per scatter plot", min_value=100,
+                                       value=int(os.environ.get('DASHBOARD_POINT_BUDGET', DEFAULT_POINT_BUDGET)),
+                                       step=500))
+    compact_scatter = st.toggle("Compact encoding for large scatter plots",
+                                value=os.environ.get(COMPACT_POINTS_ENV, '1') != '0',
+                                help=f"From {webgl_threshold():,} points: WebGL, float32 arrays and "
+                                     "no per-point date labels")
+render_stats = start_render_stats(enabled=measure_payload)
+# Grafik (fx.*) dibangun di pool bila ada; tempatnya dipesan berurutan dan diisi oleh flush_charts()
+start_chart_queue(load_figure_pool())
+
 # Main dashboard title
 st.title("🚲 Bike Rental Analysis Dashboard")
 st.markdown("Exploring patterns in bike rentals based on weather conditions, seasons, and time factors.")
@@ -248,92 +326,100 @@ if active_filters:
     st.info(f"**Applied Filters:** {filter_summary}")
 
 # Key metrics
+profiler.stage("Key Metrics", rows=filtered_rows)
 st.header("Key Metrics")
+metric_totals = aggregate('metric_totals', view.totals, ['cnt', 'casual', 'registered'])
+metric_means = aggregate('metric_means', view.means,
+                         ['cnt', 'temp_actual', 'hum_actual', 'windspeed_actual', 'comfort_index'])
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    st.metric("Total Rentals", f"{filtered_data['cnt'].sum():,}")
+    st.metric("Total Rentals", f"{metric_totals['cnt']:,}")
     
 with col2:
-    st.metric("Average Rentals per Hour", f"{filtered_data['cnt'].mean():.1f}")
+    st.metric("Average Rentals per Hour", f"{metric_means['cnt']:.1f}")
     
 with col3:
-    casual_pct = filtered_data['casual'].sum()/filtered_data['cnt'].sum()*100
-    st.metric("Casual Users", f"{filtered_data['casual'].sum():,} ({casual_pct:.1f}%)")
+    casual_pct = metric_totals['casual']/metric_totals['cnt']*100 if metric_totals['cnt'] else float('nan')
+    st.metric("Casual Users", f"{metric_totals['casual']:,} ({casual_pct:.1f}%)")
     
 with col4:
-    registered_pct = filtered_data['registered'].sum()/filtered_data['cnt'].sum()*100
-    st.metric("Registered Users", f"{filtered_data['registered'].sum():,} ({registered_pct:.1f}%)")
+    registered_pct = metric_totals['registered']/metric_totals['cnt']*100 if metric_totals['cnt'] else float('nan')
+    st.metric("Registered Users", f"{metric_totals['registered']:,} ({registered_pct:.1f}%)")
 
 # Add comfort index metric
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    avg_temp = filtered_data['temp_actual'].mean()
+    avg_temp = metric_means['temp_actual']
     st.metric("Avg Temperature", f"{avg_temp:.1f}°C")
     
 with col2:
-    avg_hum = filtered_data['hum_actual'].mean()
+    avg_hum = metric_means['hum_actual']
     st.metric("Avg Humidity", f"{avg_hum:.1f}%")
     
 with col3:
-    avg_wind = filtered_data['windspeed_actual'].mean()
+    avg_wind = metric_means['windspeed_actual']
     st.metric("Avg Wind Speed", f"{avg_wind:.1f} km/h")
     
 with col4:
-    avg_comfort = filtered_data['comfort_index'].mean()
+    avg_comfort = metric_means['comfort_index']
     st.metric("Avg Comfort Index", f"{avg_comfort:.2f}/1.0")
 
 # Weather Impact Analysis
+profiler.stage("1. Weather Impact on Bike Rentals", rows=filtered_rows)
 st.header("1. Weather Impact on Bike Rentals")
 
-tab1, tab2, tab3 = st.tabs(["Weather Conditions", "Temperature Effect", "Comfort Analysis"])
+weather_tabs = LazyTabs("weather", lazy=lazy_tabs)
 
-with tab1:
+@weather_tabs.tab("Weather Conditions")
+def weather_conditions_tab():
     # Distribution by weather condition
     st.subheader("Rentals by Weather Condition")
     
-    weather_agg = filtered_data.groupby('weather_condition')['cnt'].mean().reset_index()
-    fig = px.bar(weather_agg, x='weather_condition', y='cnt',
+    weather_agg = aggregate('weather_agg', grouped_mean, 'weather_condition', 'cnt')
+    fig = fx.bar(weather_agg, x='weather_condition', y='cnt',
                 color='weather_condition',
                 labels={'cnt': 'Average Hourly Rentals', 'weather_condition': 'Weather Condition'},
                 title='Average Rentals by Weather Condition')
     fig.update_layout(xaxis_title='Weather Condition', yaxis_title='Average Rentals')
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
     
     # Weather condition pattern throughout the day
     st.subheader("Hourly Rental Pattern by Weather Condition")
     
-    hourly_weather = filtered_data.groupby(['weather_condition', 'hr'])['cnt'].mean().reset_index()
-    fig = px.line(hourly_weather, x='hr', y='cnt', color='weather_condition',
+    hourly_weather = aggregate('hourly_weather', grouped_mean, ['weather_condition', 'hr'], 'cnt')
+    fig = fx.line(hourly_weather, x='hr', y='cnt', color='weather_condition',
                  labels={'hr': 'Hour of Day', 'cnt': 'Average Rentals', 'weather_condition': 'Weather Condition'},
                  title='Hourly Rental Pattern by Weather Condition')
     fig.update_layout(xaxis=dict(tickmode='array', tickvals=list(range(0, 24))),
                      xaxis_title='Hour of Day', yaxis_title='Average Rentals')
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
 
-with tab2:
+@weather_tabs.tab("Temperature Effect")
+def temperature_effect_tab():
     # Temperature effect
     st.subheader("Temperature Effect on Rentals")
     
     col1, col2 = st.columns(2)
     
     with col1:
-        fig = px.scatter(filtered_data, x='temp_actual', y='cnt',
-                        color='season_name', size='cnt',
+        points = scatter_points('temp_rentals', ['temp_actual', 'cnt'], 'season_name')
+        fig = fx.scatter(points.data, x='temp_actual', y='cnt', render_mode=render_mode(points),
+                        color='season_name', size=point_size(points, 'cnt'),
                         labels={'temp_actual': 'Temperature (°C)', 'cnt': 'Hourly Rentals', 'season_name': 'Season'},
                         title='Temperature vs. Rentals')
         fig.update_layout(xaxis_title='Temperature (°C)', yaxis_title='Hourly Rentals')
-        st.plotly_chart(fig, use_container_width=True)
+        show_points(fig, points)
     
     with col2:
-        temp_cat_agg = filtered_data.groupby('temp_category')['cnt'].mean().reset_index()
-        fig = px.bar(temp_cat_agg, x='temp_category', y='cnt',
+        temp_cat_agg = aggregate('temp_cat_agg', grouped_mean, 'temp_category', 'cnt')
+        fig = fx.bar(temp_cat_agg, x='temp_category', y='cnt',
                     color='temp_category',
                     labels={'temp_category': 'Temperature Range', 'cnt': 'Average Rentals'},
                     title='Average Rentals by Temperature Category')
         fig.update_layout(xaxis_title='Temperature Category', yaxis_title='Average Rentals')
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig)
     
     # Humidity and wind effect
     st.subheader("Humidity & Wind Speed Effects")
@@ -341,413 +427,385 @@ with tab2:
     col1, col2 = st.columns(2)
     
     with col1:
-        fig = px.scatter(filtered_data, x='hum_actual', y='cnt',
-                        color='season_name',
+        points = scatter_points('hum_rentals', ['hum_actual', 'cnt'], 'season_name')
+        fig = fx.scatter(points.data, x='hum_actual', y='cnt', render_mode=render_mode(points),
+                        color='season_name', size=point_size(points),
                         labels={'hum_actual': 'Humidity (%)', 'cnt': 'Hourly Rentals'},
                         title='Humidity vs. Rentals')
         fig.update_layout(xaxis_title='Humidity (%)', yaxis_title='Hourly Rentals')
-        st.plotly_chart(fig, use_container_width=True)
+        show_points(fig, points)
     
     with col2:
-        fig = px.scatter(filtered_data, x='windspeed_actual', y='cnt',
-                        color='season_name',
+        points = scatter_points('wind_rentals', ['windspeed_actual', 'cnt'], 'season_name')
+        fig = fx.scatter(points.data, x='windspeed_actual', y='cnt', render_mode=render_mode(points),
+                        color='season_name', size=point_size(points),
                         labels={'windspeed_actual': 'Wind Speed (km/h)', 'cnt': 'Hourly Rentals'},
                         title='Wind Speed vs. Rentals')
         fig.update_layout(xaxis_title='Wind Speed (km/h)', yaxis_title='Hourly Rentals')
-        st.plotly_chart(fig, use_container_width=True)
+        show_points(fig, points)
 
-with tab3:
+@weather_tabs.tab("Comfort Analysis")
+def comfort_analysis_tab():
     # Comfort index analysis
     st.subheader("Comfort Index Analysis")
     
     col1, col2 = st.columns(2)
     
     with col1:
-        fig = px.scatter(filtered_data, x='comfort_index', y='cnt',
-                        color='season_name',
+        points = scatter_points('comfort_rentals', ['comfort_index', 'cnt'], 'season_name')
+        fig = fx.scatter(points.data, x='comfort_index', y='cnt', render_mode=render_mode(points),
+                        color='season_name', size=point_size(points),
                         labels={'comfort_index': 'Comfort Index', 'cnt': 'Hourly Rentals', 'season_name': 'Season'},
                         title='Comfort Index vs. Rentals')
         fig.update_layout(xaxis_title='Comfort Index (0-1)', yaxis_title='Hourly Rentals')
-        st.plotly_chart(fig, use_container_width=True)
+        show_points(fig, points)
     
     with col2:
-        comfort_cat_agg = filtered_data.groupby('comfort_category')['cnt'].mean().reset_index()
-        fig = px.bar(comfort_cat_agg, x='comfort_category', y='cnt',
+        comfort_cat_agg = aggregate('comfort_cat_agg', grouped_mean, 'comfort_category', 'cnt')
+        fig = fx.bar(comfort_cat_agg, x='comfort_category', y='cnt',
                     color='comfort_category',
                     labels={'comfort_category': 'Comfort Category', 'cnt': 'Average Rentals'},
                     title='Average Rentals by Comfort Category')
         fig.update_layout(xaxis_title='Comfort Category', yaxis_title='Average Rentals')
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig)
     
     # Combined weather metrics heatmap
     st.subheader("Combined Weather Metrics Impact")
     
     # Create temp-humidity pivot table
-    temp_hum_pivot = pd.pivot_table(filtered_data, 
-                                   values='cnt', 
-                                   index='temp_category', 
-                                   columns='hum_category', 
-                                   aggfunc='mean')
+    temp_hum_pivot = aggregate('temp_hum_pivot', grouped_heatmap, 'temp_category', 'hum_category', 'cnt')
     
-    fig = px.imshow(temp_hum_pivot,
+    fig = fx.imshow(temp_hum_pivot,
                    labels=dict(x="Humidity Category", y="Temperature Category", color="Average Rentals"),
                    x=temp_hum_pivot.columns,
                    y=temp_hum_pivot.index,
                    color_continuous_scale='YlGnBu',
                    title='Heatmap: Temperature vs Humidity Impact on Rentals')
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
+
+weather_tabs.render()
 
 # Seasonal and Temporal Patterns
+profiler.stage("2. Seasonal and Temporal Patterns", rows=filtered_rows)
 st.header("2. Seasonal and Temporal Patterns")
 
-tab1, tab2, tab3 = st.tabs(["Seasonal Analysis", "Daily Patterns", "Time Category Analysis"])
+seasonal_tabs = LazyTabs("seasonal", lazy=lazy_tabs)
 
-with tab1:
+@seasonal_tabs.tab("Seasonal Analysis")
+def seasonal_analysis_tab():
     # Seasonal distribution
     st.subheader("Rentals by Season")
     
-    season_agg = filtered_data.groupby('season_name')['cnt'].mean().reset_index()
-    season_order = ['Winter', 'Spring', 'Summer', 'Fall']
-    season_agg['season_name'] = pd.Categorical(season_agg['season_name'], categories=season_order, ordered=True)
-    season_agg = season_agg.sort_values('season_name')
+    season_agg = aggregate('season_agg', ordered_mean, 'season_name', 'cnt', season_order)
     
-    fig = px.bar(season_agg, x='season_name', y='cnt',
+    fig = fx.bar(season_agg, x='season_name', y='cnt',
                 color='season_name',
                 labels={'cnt': 'Average Hourly Rentals', 'season_name': 'Season'},
                 title='Average Rentals by Season')
     fig.update_layout(xaxis_title='Season', yaxis_title='Average Rentals')
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
     
     # Monthly trend
     st.subheader("Monthly Rental Pattern")
     
-    monthly_agg = filtered_data.groupby('month_name')['cnt'].mean().reset_index()
-    month_order = ['January', 'February', 'March', 'April', 'May', 'June', 
-                  'July', 'August', 'September', 'October', 'November', 'December']
-    monthly_agg['month_name'] = pd.Categorical(monthly_agg['month_name'], categories=month_order, ordered=True)
-    monthly_agg = monthly_agg.sort_values('month_name')
+    monthly_agg = aggregate('monthly_agg', ordered_mean, 'month_name', 'cnt', month_order)
     
-    fig = px.line(monthly_agg, x='month_name', y='cnt', markers=True,
+    fig = fx.line(monthly_agg, x='month_name', y='cnt', markers=True,
                  labels={'cnt': 'Average Hourly Rentals', 'month_name': 'Month'},
                  title='Monthly Rental Pattern')
     fig.update_layout(xaxis_title='Month', yaxis_title='Average Rentals')
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
     
     # Season-Weather interaction
     st.subheader("Season and Weather Interaction")
     
-    season_weather = filtered_data.groupby(['season_name', 'weather_condition'])['cnt'].mean().reset_index()
-    season_weather_pivot = pd.pivot_table(season_weather, values='cnt', 
-                                         index='season_name', columns='weather_condition')
+    season_weather_pivot = aggregate('season_weather_pivot', grouped_heatmap, 'season_name', 'weather_condition', 'cnt')
     
-    fig = px.imshow(season_weather_pivot,
+    fig = fx.imshow(season_weather_pivot,
                    labels=dict(x="Weather Condition", y="Season", color="Average Rentals"),
                    x=season_weather_pivot.columns,
-                   y=season_order,
+                   y=season_weather_pivot.index,
                    color_continuous_scale='YlGnBu',
                    title='Heatmap: Season vs Weather Condition')
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
 
-with tab2:
+@seasonal_tabs.tab("Daily Patterns")
+def daily_patterns_tab():
     # Weekday patterns
     st.subheader("Rentals by Day of Week")
     
-    weekday_agg = filtered_data.groupby('weekday_name')['cnt'].mean().reset_index()
-    weekday_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    weekday_agg['weekday_name'] = pd.Categorical(weekday_agg['weekday_name'], categories=weekday_order, ordered=True)
-    weekday_agg = weekday_agg.sort_values('weekday_name')
+    weekday_agg = aggregate('weekday_agg', ordered_mean, 'weekday_name', 'cnt', weekday_order)
     
-    fig = px.bar(weekday_agg, x='weekday_name', y='cnt',
+    fig = fx.bar(weekday_agg, x='weekday_name', y='cnt',
                 color='weekday_name',
                 labels={'cnt': 'Average Hourly Rentals', 'weekday_name': 'Day of Week'},
                 title='Average Rentals by Day of Week')
     fig.update_layout(xaxis_title='Day of Week', yaxis_title='Average Rentals')
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
     
     # Hourly pattern by day type
     st.subheader("Hourly Pattern by Day Type")
     
-    hourly_day_type = filtered_data.groupby(['workingday_label', 'hr'])['cnt'].mean().reset_index()
+    hourly_day_type = aggregate('hourly_day_type', grouped_mean, ['workingday_label', 'hr'], 'cnt')
     
-    fig = px.line(hourly_day_type, x='hr', y='cnt', color='workingday_label', markers=True,
+    fig = fx.line(hourly_day_type, x='hr', y='cnt', color='workingday_label', markers=True,
                  labels={'hr': 'Hour of Day', 'cnt': 'Average Rentals', 'workingday_label': 'Day Type'},
                  title='Hourly Rental Pattern by Day Type')
     fig.update_layout(xaxis=dict(tickmode='array', tickvals=list(range(0, 24))),
                      xaxis_title='Hour of Day', yaxis_title='Average Rentals')
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
     
     # Heatmap: Hour vs Day of Week
     st.subheader("Hourly Pattern by Day of Week")
     
-    hour_weekday = filtered_data.groupby(['hr', 'weekday_name'])['cnt'].mean().reset_index()
-    hour_weekday_pivot = pd.pivot_table(hour_weekday, values='cnt', 
-                                      index='hr', columns='weekday_name')
-    hour_weekday_pivot = hour_weekday_pivot[weekday_order]
+    hour_weekday_pivot = aggregate('hour_weekday_pivot', grouped_heatmap, 'hr', 'weekday_name', 'cnt')
     
-    fig = px.imshow(hour_weekday_pivot,
+    fig = fx.imshow(hour_weekday_pivot,
                    labels=dict(x="Day of Week", y="Hour of Day", color="Average Rentals"),
-                   x=weekday_order,
-                   y=list(range(0, 24)),
+                   x=hour_weekday_pivot.columns,
+                   y=hour_weekday_pivot.index,
                    color_continuous_scale='YlGnBu',
                    title='Heatmap: Hour of Day vs Day of Week')
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
 
-with tab3:
+@seasonal_tabs.tab("Time Category Analysis")
+def time_category_tab():
     # Time category analysis
     st.subheader("Rentals by Time Category")
     
-    time_cat_agg = filtered_data.groupby('time_category')['cnt'].mean().reset_index()
-    time_cat_order = ['Morning Peak', 'Day Time', 'Evening Peak', 'Night Time']
-    time_cat_agg['time_category'] = pd.Categorical(time_cat_agg['time_category'], categories=time_cat_order, ordered=True)
-    time_cat_agg = time_cat_agg.sort_values('time_category')
+    time_cat_agg = aggregate('time_cat_agg', ordered_mean, 'time_category', 'cnt', time_cat_order)
     
-    fig = px.bar(time_cat_agg, x='time_category', y='cnt',
+    fig = fx.bar(time_cat_agg, x='time_category', y='cnt',
                 color='time_category',
                 labels={'cnt': 'Average Hourly Rentals', 'time_category': 'Time Category'},
                 title='Average Rentals by Time Category')
     fig.update_layout(xaxis_title='Time Category', yaxis_title='Average Rentals')
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
     
     # Heatmap: Season vs Time Category
     st.subheader("Season and Time Category Interaction")
     
-    season_time = filtered_data.groupby(['season_name', 'time_category'])['cnt'].mean().reset_index()
-    season_time_pivot = pd.pivot_table(season_time, values='cnt', 
-                                      index='season_name', columns='time_category')
-    
-    # Ensure proper ordering
-    if not season_time_pivot.empty:
-        if all(season in season_time_pivot.index for season in season_order):
-            season_time_pivot = season_time_pivot.reindex(season_order)
-        if all(cat in season_time_pivot.columns for cat in time_cat_order):
-            season_time_pivot = season_time_pivot[time_cat_order]
-        
-        fig = px.imshow(season_time_pivot,
+    season_time_pivot = aggregate('season_time_pivot', grouped_heatmap, 'season_name', 'time_category', 'cnt')
+    
+    if season_time_pivot.notna().any().any():
+        fig = fx.imshow(season_time_pivot,
                        labels=dict(x="Time Category", y="Season", color="Average Rentals"),
                        x=season_time_pivot.columns,
                        y=season_time_pivot.index,
                        color_continuous_scale='YlGnBu',
                        title='Heatmap: Season vs Time Category')
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig)
     
     # Time category and weather interaction
     st.subheader("Time Category and Weather Interaction")
     
-    time_weather = filtered_data.groupby(['time_category', 'weather_condition'])['cnt'].mean().reset_index()
-    time_weather_pivot = pd.pivot_table(time_weather, values='cnt', 
-                                       index='time_category', columns='weather_condition')
+    time_weather_pivot = aggregate('time_weather_pivot', grouped_heatmap, 'time_category', 'weather_condition', 'cnt')
     
-    if not time_weather_pivot.empty:
-        fig = px.imshow(time_weather_pivot,
+    if time_weather_pivot.notna().any().any():
+        fig = fx.imshow(time_weather_pivot,
                        labels=dict(x="Weather Condition", y="Time Category", color="Average Rentals"),
                        x=time_weather_pivot.columns,
-                       y=time_cat_order,
+                       y=time_weather_pivot.index,
                        color_continuous_scale='YlGnBu',
                        title='Heatmap: Time Category vs Weather Condition')
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig)
+
+seasonal_tabs.render()
 
 # User Type Analysis
+profiler.stage("3. User Type Analysis", rows=filtered_rows)
 st.header("3. User Type Analysis")
 
-tab1, tab2 = st.tabs(["Casual vs Registered", "User Patterns"])
+user_tabs = LazyTabs("user", lazy=lazy_tabs)
 
-with tab1:
+@user_tabs.tab("Casual vs Registered")
+def casual_vs_registered_tab():
     # Casual vs registered users
     st.subheader("Casual vs Registered Users")
     
     # Overall proportions
+    user_totals = aggregate('user_totals', view.totals, ['casual', 'registered'])
     user_props = pd.DataFrame({
         'User Type': ['Casual', 'Registered'],
-        'Count': [filtered_data['casual'].sum(), filtered_data['registered'].sum()]
+        'Count': [user_totals['casual'], user_totals['registered']]
     })
     
-    fig = px.pie(user_props, values='Count', names='User Type',
+    fig = fx.pie(user_props, values='Count', names='User Type',
                 title='Proportion of Casual vs Registered Users',
-                color_discrete_sequence=px.colors.qualitative.Set2)
-    st.plotly_chart(fig, use_container_width=True)
+                color_discrete_sequence=qualitative.Set2)
+    show_chart(fig)
     
     # By season
-    season_user = filtered_data.groupby('season_name')[['casual', 'registered']].mean().reset_index()
-    season_user['season_name'] = pd.Categorical(season_user['season_name'], categories=season_order, ordered=True)
-    season_user = season_user.sort_values('season_name')
-    season_user_melted = pd.melt(season_user, id_vars='season_name', 
-                                value_vars=['casual', 'registered'],
-                                var_name='User Type', value_name='Average Rentals')
-    
-    fig = px.bar(season_user_melted, x='season_name', y='Average Rentals', color='User Type',
+    season_user_melted = aggregate('season_user_melted', lambda: pd.melt(
+        ordered_mean('season_name', ['casual', 'registered'], season_order),
+        id_vars='season_name', value_vars=['casual', 'registered'],
+        var_name='User Type', value_name='Average Rentals'))
+    
+    fig = fx.bar(season_user_melted, x='season_name', y='Average Rentals', color='User Type',
                 barmode='group',
                 labels={'season_name': 'Season'},
                 title='Casual vs Registered Users by Season')
     fig.update_layout(xaxis_title='Season', yaxis_title='Average Rentals')
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
     
     # By weather condition
-    weather_user = filtered_data.groupby('weather_condition')[['casual', 'registered']].mean().reset_index()
-    weather_user_melted = pd.melt(weather_user, id_vars='weather_condition', 
-                                 value_vars=['casual', 'registered'],
-                                 var_name='User Type', value_name='Average Rentals')
+    weather_user_melted = aggregate('weather_user_melted', lambda: pd.melt(
+        grouped_mean('weather_condition', ['casual', 'registered']),
+        id_vars='weather_condition', value_vars=['casual', 'registered'],
+        var_name='User Type', value_name='Average Rentals'))
     
-    fig = px.bar(weather_user_melted, x='weather_condition', y='Average Rentals', color='User Type',
+    fig = fx.bar(weather_user_melted, x='weather_condition', y='Average Rentals', color='User Type',
                 barmode='group',
                 labels={'weather_condition': 'Weather Condition'},
                 title='Casual vs Registered Users by Weather Condition')
     fig.update_layout(xaxis_title='Weather Condition', yaxis_title='Average Rentals')
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
 
-with tab2:
+@user_tabs.tab("User Patterns")
+def user_patterns_tab():
     # User patterns by day and hour
     st.subheader("User Patterns by Day and Hour")
     
     # By day of week
-    weekday_user = filtered_data.groupby('weekday_name')[['casual', 'registered']].mean().reset_index()
-    weekday_user['weekday_name'] = pd.Categorical(weekday_user['weekday_name'], categories=weekday_order, ordered=True)
-    weekday_user = weekday_user.sort_values('weekday_name')
-    weekday_user_melted = pd.melt(weekday_user, id_vars='weekday_name', 
-                                 value_vars=['casual', 'registered'],
-                                 var_name='User Type', value_name='Average Rentals')
-    
-    fig = px.bar(weekday_user_melted, x='weekday_name', y='Average Rentals', color='User Type',
+    weekday_user_melted = aggregate('weekday_user_melted', lambda: pd.melt(
+        ordered_mean('weekday_name', ['casual', 'registered'], weekday_order),
+        id_vars='weekday_name', value_vars=['casual', 'registered'],
+        var_name='User Type', value_name='Average Rentals'))
+    
+    fig = fx.bar(weekday_user_melted, x='weekday_name', y='Average Rentals', color='User Type',
                 barmode='group',
                 labels={'weekday_name': 'Day of Week'},
                 title='Casual vs Registered Users by Day of Week')
     fig.update_layout(xaxis_title='Day of Week', yaxis_title='Average Rentals')
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
     
     # By hour
-    hourly_user = filtered_data.groupby('hr')[['casual', 'registered']].mean().reset_index()
-    hourly_user_melted = pd.melt(hourly_user, id_vars='hr', 
-                               value_vars=['casual', 'registered'],
-                               var_name='User Type', value_name='Average Rentals')
+    hourly_user_melted = aggregate('hourly_user_melted', lambda: pd.melt(
+        grouped_mean('hr', ['casual', 'registered']),
+        id_vars='hr', value_vars=['casual', 'registered'],
+        var_name='User Type', value_name='Average Rentals'))
     
-    fig = px.line(hourly_user_melted, x='hr', y='Average Rentals', color='User Type', markers=True,
+    fig = fx.line(hourly_user_melted, x='hr', y='Average Rentals', color='User Type', markers=True,
                  labels={'hr': 'Hour of Day'},
                  title='Hourly Pattern: Casual vs Registered Users')
     fig.update_layout(xaxis=dict(tickmode='array', tickvals=list(range(0, 24))),
                      xaxis_title='Hour of Day', yaxis_title='Average Rentals')
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
     
     # By temperature category
-    temp_user = filtered_data.groupby('temp_category')[['casual', 'registered']].mean().reset_index()
-    temp_user_melted = pd.melt(temp_user, id_vars='temp_category', 
-                              value_vars=['casual', 'registered'],
-                              var_name='User Type', value_name='Average Rentals')
+    temp_user_melted = aggregate('temp_user_melted', lambda: pd.melt(
+        grouped_mean('temp_category', ['casual', 'registered']),
+        id_vars='temp_category', value_vars=['casual', 'registered'],
+        var_name='User Type', value_name='Average Rentals'))
     
-    fig = px.bar(temp_user_melted, x='temp_category', y='Average Rentals', color='User Type',
+    fig = fx.bar(temp_user_melted, x='temp_category', y='Average Rentals', color='User Type',
                 barmode='group',
                 labels={'temp_category': 'Temperature Category'},
                 title='Casual vs Registered Users by Temperature Category')
     fig.update_layout(xaxis_title='Temperature Category', yaxis_title='Average Rentals')
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
     
     # User ratio analysis
     st.subheader("User Ratio Analysis")
     
-    # Calculate casual to registered ratio
-    filtered_data['casual_ratio'] = filtered_data['casual'] / filtered_data['cnt']
-    filtered_data['registered_ratio'] = filtered_data['registered'] / filtered_data['cnt']
-    
     # Ratio by season and day of week
-    ratio_pivot = pd.pivot_table(filtered_data, 
-                                values='casual_ratio', 
-                                index='season_name', 
-                                columns='weekday_name', 
-                                aggfunc='mean')
-    
-    # Ensure proper ordering
-    if not ratio_pivot.empty:
-        if all(season in ratio_pivot.index for season in season_order):
-            ratio_pivot = ratio_pivot.reindex(season_order)
-        if all(day in ratio_pivot.columns for day in weekday_order):
-            ratio_pivot = ratio_pivot[weekday_order]
-        
-        fig = px.imshow(ratio_pivot,
+    ratio_pivot = aggregate('ratio_pivot', grouped_heatmap, 'season_name', 'weekday_name', 'casual_ratio')
+    
+    if ratio_pivot.notna().any().any():
+        fig = fx.imshow(ratio_pivot,
                        labels=dict(x="Day of Week", y="Season", color="Casual User Ratio"),
                        x=ratio_pivot.columns,
                        y=ratio_pivot.index,
                        color_continuous_scale='RdBu_r',
                        title='Heatmap: Casual User Ratio by Season and Day of Week')
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig)
+
+user_tabs.render()
 
 # Comfort and Environmental Analysis
+profiler.stage("4. Comfort and Environmental Analysis", rows=filtered_rows)
 st.header("4. Comfort and Environmental Analysis")
 
-tab1, tab2 = st.tabs(["Comfort Index Analysis", "Environmental Factors"])
+comfort_tabs = LazyTabs("comfort", lazy=lazy_tabs)
 
-with tab1:
+@comfort_tabs.tab("Comfort Index Analysis")
+def comfort_index_tab():
     # Comfort index analysis
     st.subheader("Comfort Index Impact on Rentals")
     
     # Comfort index by season
-    comfort_season = filtered_data.groupby('season_name')['comfort_index'].mean().reset_index()
-    comfort_season['season_name'] = pd.Categorical(comfort_season['season_name'], categories=season_order, ordered=True)
-    comfort_season = comfort_season.sort_values('season_name')
+    comfort_season = aggregate('comfort_season', ordered_mean, 'season_name', 'comfort_index', season_order)
     
-    fig = px.bar(comfort_season, x='season_name', y='comfort_index',
+    fig = fx.bar(comfort_season, x='season_name', y='comfort_index',
                 color='season_name',
                 labels={'comfort_index': 'Average Comfort Index', 'season_name': 'Season'},
                 title='Average Comfort Index by Season')
     fig.update_layout(xaxis_title='Season', yaxis_title='Comfort Index (0-1)')
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
     
     # Comfort category distribution
-    comfort_dist = filtered_data['comfort_category'].value_counts().reset_index()
-    comfort_dist.columns = ['Comfort Category', 'Count']
+    comfort_dist = aggregate('comfort_dist', lambda: view.value_counts('comfort_category')
+                             .rename_axis('Comfort Category').reset_index(name='Count'))
     
-    fig = px.pie(comfort_dist, values='Count', names='Comfort Category',
+    fig = fx.pie(comfort_dist, values='Count', names='Comfort Category',
                 title='Distribution of Comfort Categories',
-                color_discrete_sequence=px.colors.sequential.Viridis)
-    st.plotly_chart(fig, use_container_width=True)
+                color_discrete_sequence=sequential.Viridis)
+    show_chart(fig)
     
     # Comfort vs rentals scatter
-    fig = px.scatter(filtered_data, x='comfort_index', y='cnt',
-                    color='season_name', size='cnt', opacity=0.7,
+    points = scatter_points('comfort_rentals', ['comfort_index', 'cnt'], 'season_name')
+    fig = fx.scatter(points.data, x='comfort_index', y='cnt', render_mode=render_mode(points),
+                    color='season_name', size=point_size(points, 'cnt'), opacity=0.7,
                     labels={'comfort_index': 'Comfort Index', 'cnt': 'Hourly Rentals', 'season_name': 'Season'},
                     title='Relationship Between Comfort Index and Rentals')
     fig.update_layout(xaxis_title='Comfort Index (0-1)', yaxis_title='Hourly Rentals')
-    st.plotly_chart(fig, use_container_width=True)
+    show_points(fig, points)
 
-with tab2:
+@comfort_tabs.tab("Environmental Factors")
+def environmental_factors_tab():
     # Environmental factors analysis
     st.subheader("Environmental Factors Impact")
     
-    # Temperature distribution
+    # Distribusi suhu dan kelembapan: 20 bin dihitung di server, browser hanya menerima jumlah per bin
     col1, col2 = st.columns(2)
     
     with col1:
-        fig = px.histogram(filtered_data, x='temp_actual',
-                          nbins=20,
-                          labels={'temp_actual': 'Temperature (°C)'},
-                          title='Temperature Distribution')
-        fig.update_layout(xaxis_title='Temperature (°C)', yaxis_title='Frequency')
-        st.plotly_chart(fig, use_container_width=True)
+        temp_hist = aggregate('temp_hist', view.histogram, 'temp_actual')
+        fig = fx.bar(temp_hist, x='bin_center', y='count', hover_data=['bin_start', 'bin_end'],
+                    labels={'bin_center': 'Temperature (°C)', 'count': 'Frequency'},
+                    title='Temperature Distribution')
+        fig.update_layout(xaxis_title='Temperature (°C)', yaxis_title='Frequency', bargap=0)
+        show_chart(fig)
     
     with col2:
-        fig = px.histogram(filtered_data, x='hum_actual',
-                          nbins=20,
-                          labels={'hum_actual': 'Humidity (%)'},
-                          title='Humidity Distribution')
-        fig.update_layout(xaxis_title='Humidity (%)', yaxis_title='Frequency')
-        st.plotly_chart(fig, use_container_width=True)
+        hum_hist = aggregate('hum_hist', view.histogram, 'hum_actual')
+        fig = fx.bar(hum_hist, x='bin_center', y='count', hover_data=['bin_start', 'bin_end'],
+                    labels={'bin_center': 'Humidity (%)', 'count': 'Frequency'},
+                    title='Humidity Distribution')
+        fig.update_layout(xaxis_title='Humidity (%)', yaxis_title='Frequency', bargap=0)
+        show_chart(fig)
     
     # Wind speed analysis
     st.subheader("Wind Speed Analysis")
     
-    wind_cat_agg = filtered_data.groupby('windspeed_category')['cnt'].mean().reset_index()
+    wind_cat_agg = aggregate('wind_cat_agg', grouped_mean, 'windspeed_category', 'cnt')
     
-    fig = px.bar(wind_cat_agg, x='windspeed_category', y='cnt',
+    fig = fx.bar(wind_cat_agg, x='windspeed_category', y='cnt',
                 color='windspeed_category',
                 labels={'windspeed_category': 'Wind Speed Category', 'cnt': 'Average Rentals'},
                 title='Average Rentals by Wind Speed Category')
     fig.update_layout(xaxis_title='Wind Speed Category', yaxis_title='Average Rentals')
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
     
     # Combined environmental factors
     st.subheader("Combined Environmental Factors")
     
     # Create a bubble chart
-    fig = px.scatter(filtered_data, x='temp_actual', y='hum_actual',
-                    size='cnt', color='season_name',
-                    hover_name='dteday', hover_data=['windspeed_actual', 'cnt'],
+    points = scatter_points('environment_bubbles', ['temp_actual', 'hum_actual'], 'season_name', ['cnt', 'windspeed_actual'])
+    fig = fx.scatter(points.data, x='temp_actual', y='hum_actual', render_mode=render_mode(points),
+                    size=point_size(points, 'cnt'), color='season_name',
+                    hover_name=None if points.aggregated or compact(points) else 'dteday',
+                    hover_data=['windspeed_actual', 'cnt'],
                     labels={'temp_actual': 'Temperature (°C)', 
                            'hum_actual': 'Humidity (%)', 
                            'cnt': 'Rentals',
@@ -755,20 +813,25 @@ with tab2:
                            'windspeed_actual': 'Wind Speed (km/h)'},
                     title='Combined Environmental Factors Impact on Rentals')
     fig.update_layout(xaxis_title='Temperature (°C)', yaxis_title='Humidity (%)')
-    st.plotly_chart(fig, use_container_width=True)
+    show_points(fig, points)
+
+comfort_tabs.render()
 
 # Interactive Exploration
+profiler.stage("5. Interactive Exploration", rows=filtered_rows)
 st.header("5. Interactive Exploration")
 
-tab1, tab2 = st.tabs(["3D Visualization", "Correlation Analysis"])
+exploration_tabs = LazyTabs("exploration", lazy=lazy_tabs)
 
-with tab1:
+@exploration_tabs.tab("3D Visualization")
+def visualization_3d_tab():
     # 3D scatter plot
     st.subheader("3D Exploration: Temperature, Humidity, and Rentals")
     
-    fig = px.scatter_3d(filtered_data, x='temp_actual', y='hum_actual', z='cnt',
+    points = scatter_points('3d_temp_hum', ['temp_actual', 'hum_actual', 'cnt'], 'season_name')
+    fig = fx.scatter_3d(points.data, x='temp_actual', y='hum_actual', z='cnt',
                        color='season_name',
-                       size='cnt',
+                       size=point_size(points, 'cnt'),
                        opacity=0.7,
                        labels={'temp_actual': 'Temperature (°C)', 
                               'hum_actual': 'Humidity (%)', 
@@ -777,7 +840,7 @@ with tab1:
     fig.update_layout(scene=dict(xaxis_title='Temperature (°C)',
                                 yaxis_title='Humidity (%)',
                                 zaxis_title='Hourly Rentals'))
-    st.plotly_chart(fig, use_container_width=True)
+    show_points(fig, points)
     
     # Advanced 3D visualization
     st.subheader("Advanced 3D Visualization")
@@ -785,55 +848,349 @@ with tab1:
     viz_options = ['Temperature-Humidity-Rentals', 'Temperature-Wind-Rentals', 'Humidity-Wind-Rentals', 'Hour-Temperature-Rentals']
     selected_viz = st.selectbox("Select 3D Visualization", viz_options)
     
-    if selected_viz == 'Temperature-Humidity-Rentals':
-        fig = px.scatter_3d(filtered_data, x='temp_actual', y='hum_actual', z='cnt',
-                           color='weather_condition',
-                           size='cnt', opacity=0.7)
-    elif selected_viz == 'Temperature-Wind-Rentals':
-        fig = px.scatter_3d(filtered_data, x='temp_actual', y='windspeed_actual', z='cnt',
-                           color='weather_condition',
-                           size='cnt', opacity=0.7)
-    elif selected_viz == 'Humidity-Wind-Rentals':
-        fig = px.scatter_3d(filtered_data, x='hum_actual', y='windspeed_actual', z='cnt',
-                           color='weather_condition',
-                           size='cnt', opacity=0.7)
-    else:  # Hour-Temperature-Rentals
-        fig = px.scatter_3d(filtered_data, x='hr', y='temp_actual', z='cnt',
-                           color='workingday_label',
-                           size='cnt', opacity=0.7)
-    
-    st.plotly_chart(fig, use_container_width=True)
-
-with tab2:
+    # Sumbu x, sumbu y dan warna untuk tiap pilihan visualisasi
+    viz_axes = {
+        'Temperature-Humidity-Rentals': ('temp_actual', 'hum_actual', 'weather_condition'),
+        'Temperature-Wind-Rentals': ('temp_actual', 'windspeed_actual', 'weather_condition'),
+        'Humidity-Wind-Rentals': ('hum_actual', 'windspeed_actual', 'weather_condition'),
+        'Hour-Temperature-Rentals': ('hr', 'temp_actual', 'workingday_label'),
+    }
+    x_col, y_col, color_col = viz_axes[selected_viz]
+    points = scatter_points(f'3d_{x_col}_{y_col}', [x_col, y_col, 'cnt'], color_col)
+    fig = fx.scatter_3d(points.data, x=x_col, y=y_col, z='cnt',
+                       color=color_col,
+                       size=point_size(points, 'cnt'), opacity=0.7)
+    show_points(fig, points)
+
+@exploration_tabs.tab("Correlation Analysis")
+def correlation_tab():
     # Correlation heatmap
     st.subheader("Correlation Analysis")
     
     numeric_cols = ['temp', 'atemp', 'hum', 'windspeed', 'cnt', 'casual', 'registered', 'comfort_index']
-    corr_matrix = filtered_data[numeric_cols].corr()
+    corr_method = st.selectbox("Correlation Method", ['Pearson', 'Spearman']).lower()
+    # Pearson dijumlahkan dari momen per sel kubus, Spearman dari indeks peringkat (tanpa mengurutkan ulang)
+    corr_matrix = aggregate(f'corr_matrix_{corr_method}', view.corr, numeric_cols, corr_method)
     
-    fig = px.imshow(corr_matrix,
+    fig = fx.imshow(corr_matrix,
                    labels=dict(color="Correlation Coefficient"),
                    x=corr_matrix.columns,
                    y=corr_matrix.columns,
                    color_continuous_scale='RdBu_r',
                    zmin=-1, zmax=1)
-    fig.update_layout(title='Correlation Between Numerical Variables')
-    st.plotly_chart(fig, use_container_width=True)
+    fig.update_layout(title=f'{corr_method.title()} Correlation Between Numerical Variables')
+    show_chart(fig)
     
     # Feature importance
     st.subheader("Feature Importance for Rentals")
     
     # Sort correlation with cnt
-    cnt_corr = corr_matrix['cnt'].drop('cnt').sort_values(ascending=False)
-    cnt_corr = cnt_corr.reset_index()
-    cnt_corr.columns = ['Feature', 'Correlation']
+    cnt_corr = aggregate(f'cnt_corr_{corr_method}',
+                         lambda: corr_matrix['cnt'].drop('cnt').sort_values(ascending=False)
+                         .rename_axis('Feature').reset_index(name='Correlation'))
     
-    fig = px.bar(cnt_corr, x='Feature', y='Correlation',
+    fig = fx.bar(cnt_corr, x='Feature', y='Correlation',
                 color='Correlation',
                 color_continuous_scale='RdBu_r',
                 title='Feature Importance for Predicting Rentals')
     fig.update_layout(xaxis_title='Feature', yaxis_title='Correlation with Rentals')
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
+
+exploration_tabs.render()
+
+# Demand Forecast
+profiler.stage("6. Demand Forecast")
+st.header("6. Demand Forecast")
+
+forecast_tabs = LazyTabs("forecast", lazy=lazy_tabs)
+# Jendela latih: jumlah minggu sebelum awal forecast (None = seluruh riwayat)
+training_windows = {'8 weeks': 8, '26 weeks': 26, '52 weeks': 52, 'All history': None}
+# Riwayat minimum sebelum awal forecast agar setiap jam punya cukup baris latih
+min_training_days = 28
+# Rentang data yang benar-benar dimuat backend; pada mode partisi hanya bulan yang lolos pruning,
+# bukan seluruh rentang katalog di sidebar
+first_day, last_day = (pd.Timestamp(day) for day in backend.bounds('dteday'))
+
+def training_window(forecast_start):
+    # Jendela latih berakhir sehari sebelum awal forecast, paling lambat hari terakhir data
+    train_end = min(forecast_start - pd.Timedelta(days=1), last_day)
+    weeks = training_windows[window_label]
+    train_start = first_day if weeks is None else max(first_day, forecast_start - pd.Timedelta(weeks=weeks))
+    return train_start.date(), train_end.date()
+
+def fit_forecast(train_start, train_end):
+    # Model dilatih pada semua baris di jendela latih; filter sidebar tidak berlaku
+    return ForecastModel.fit(backend.rows(TRAINING_COLUMNS, train_start, train_end))
+
+def forecast_model(train_start, train_end):
+    # Satu model per versi data dan jendela latih, dipakai bersama oleh semua sesi
+    return aggregate_cache.get_or_compute('forecast_model', f"{data_version}/{train_start}/{train_end}",
+                                          fit_forecast, train_start, train_end)
+
+def forecast_backtest(train_start, train_end, forecast_start, horizon_end):
+    model = forecast_model(train_start, train_end)
+    return backtest(model, backend.rows(TRAINING_COLUMNS, forecast_start, horizon_end))
+
+@forecast_tabs.tab("Forecast vs Actuals")
+def forecast_tab():
+    st.subheader("Hourly Forecast vs. Actual Rentals")
+    col1, col2 = st.columns(2)
+    with col1:
+        forecast_start = pd.Timestamp(st.date_input(
+            "Forecast Start",
+            max(last_day - pd.Timedelta(days=13), first_day + pd.Timedelta(days=min_training_days)).date(),
+            min_value=(first_day + pd.Timedelta(days=min_training_days)).date(),
+            max_value=last_day.date(),
+        ))
+    with col2:
+        horizon_days = st.slider("Horizon (days)", 1, 28, 14)
+
+    train_start, train_end = training_window(forecast_start)
+    horizon_end = min(forecast_start + pd.Timedelta(days=horizon_days - 1), last_day).date()
+    try:
+        model = forecast_model(train_start, train_end)
+    except ValueError as error:
+        st.info(f"No forecast for the training window {train_start} to {train_end}: {error}.")
+        return
+    hourly = aggregate_cache.get_or_compute(
+        'forecast_backtest', f"{data_version}/{train_start}/{train_end}/{horizon_end}",
+        forecast_backtest, train_start, train_end, forecast_start.date(), horizon_end)
+    errors = forecast_errors(hourly)
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Mean Absolute Error", f"{errors['mae']:.1f} rentals/hour")
+    with col2:
+        st.metric("RMSE", f"{errors['rmse']:.1f} rentals/hour")
+    with col3:
+        st.metric("Total Forecast Error", f"{errors['bias']:+.1%}")
+    st.caption(f"Trained on {model.rows:,} hourly rows from {model.start:%Y-%m-%d} to {model.end:%Y-%m-%d} "
+               f"in {model.fit_seconds * 1000:.0f} ms. The forecast uses the weather recorded in each hour "
+               "of the horizon.")
+
+    series = hourly.rename(columns={'actual': 'Actual', 'forecast': 'Forecast'}).melt(
+        id_vars=['time'], value_vars=['Actual', 'Forecast'], var_name='Series', value_name='Rentals')
+    fig = fx.line(series, x='time', y='Rentals', color='Series',
+                  title=f'Hourly Rentals from {forecast_start:%Y-%m-%d} to {horizon_end:%Y-%m-%d}')
+    fig.update_layout(xaxis_title='Time', yaxis_title='Rentals per Hour')
+    show_chart(fig)
+
+    # Profil jam rata-rata di horizon, dipisah per tipe hari
+    profile = hourly.groupby(['workingday', 'hr'])[['actual', 'forecast']].mean().reset_index()
+    profile['Day Type'] = profile['workingday'].map({0: 'Non-Working Day', 1: 'Working Day'})
+    profile = profile.rename(columns={'actual': 'Actual', 'forecast': 'Forecast'}).melt(
+        id_vars=['Day Type', 'hr'], value_vars=['Actual', 'Forecast'], var_name='Series', value_name='Rentals')
+    fig = fx.line(profile, x='hr', y='Rentals', color='Series', line_dash='Day Type', markers=True,
+                  title='Average Hourly Profile in the Forecast Horizon')
+    fig.update_layout(xaxis_title='Hour of Day', yaxis_title='Average Rentals')
+    show_chart(fig)
+
+# Grid skenario cuaca bawaan (~38 ribu skenario), tidak tergantung data sehingga dibangun sekali per proses
+@st.cache_resource
+def load_weather_grid():
+    return weather_grid(**DEFAULT_GRID)
+
+def what_if(train_start, train_end, window_start, window_end):
+    # Semua skenario grid dievaluasi sekaligus; heatmap dan metrik di bawah hanya mengiris hasilnya
+    return simulate(forecast_model(train_start, train_end), calendar_rows(window_start, window_end),
+                    load_weather_grid())
+
+@forecast_tabs.tab("What-if Scenarios")
+def what_if_tab():
+    st.subheader("What-if Weather Scenarios")
+    col1, col2 = st.columns(2)
+    with col1:
+        window_start = pd.Timestamp(st.date_input(
+            "Scenario Start",
+            (last_day + pd.Timedelta(days=1)).date(),
+            min_value=(first_day + pd.Timedelta(days=min_training_days)).date(),
+            max_value=(last_day + pd.Timedelta(days=365)).date(),
+        ))
+    with col2:
+        window_days = st.slider("Scenario Length (days)", 1, 14, 7)
+    window_end = window_start + pd.Timedelta(days=window_days - 1)
+
+    weather_labels = list(WEATHER_FEATURE.labels)
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        selected_condition = st.selectbox("Weather", weather_labels, index=2)
+    with col2:
+        selected_temp = st.select_slider("Temperature (°C)", DEFAULT_GRID['temp_actual'], value=8)
+    with col3:
+        selected_hum = st.select_slider("Humidity (%)", DEFAULT_GRID['hum_actual'], value=85)
+    with col4:
+        selected_wind = st.select_slider("Wind Speed (km/h)", DEFAULT_GRID['windspeed_actual'], value=10)
+    selected_code = weather_labels.index(selected_condition) + 1
+
+    train_start, train_end = training_window(window_start)
+    started = time.perf_counter()
+    try:
+        results = aggregate_cache.get_or_compute(
+            'what_if', f"{data_version}/{train_start}/{train_end}/{window_start.date()}/{window_end.date()}",
+            what_if, train_start, train_end, window_start.date(), window_end.date())
+    except ValueError as error:
+        st.info(f"No scenarios for the training window {train_start} to {train_end}: {error}.")
+        return
+    lookup_seconds = time.perf_counter() - started
+    # Cuaca tanpa jam di jendela latih mendapat efek tingkat teringan berikutnya yang ada
+    fitted_codes = forecast_model(train_start, train_end).fitted_weather(list(range(1, len(weather_labels) + 1)))
+    scenario_labels = [label if fitted == code else f"{label} (as {weather_labels[fitted - 1]})"
+                       for code, (label, fitted) in enumerate(zip(weather_labels, fitted_codes), start=1)]
+    if fitted_codes[selected_code - 1] != selected_code:
+        st.warning(f"The training window {train_start} to {train_end} has no {selected_condition} hours: "
+                   f"these scenarios use the effect of {weather_labels[fitted_codes[selected_code - 1] - 1]}.")
+
+    same_values = ((results['temp_actual'] == selected_temp) & (results['hum_actual'] == selected_hum)
+                   & (results['windspeed_actual'] == selected_wind))
+    selected = results[same_values & (results['weathersit'] == selected_code)].iloc[0]
+    clear = results[same_values & (results['weathersit'] == 1)].iloc[0]
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Expected Rentals per Day", f"{selected['cnt']:,.0f}",
+                  delta=f"{selected['cnt'] - clear['cnt']:+,.0f} vs. Clear" if selected_code != 1 else None)
+    with col2:
+        st.metric("Casual per Day", f"{selected['casual']:,.0f}")
+    with col3:
+        st.metric("Registered per Day", f"{selected['registered']:,.0f}")
+    with col4:
+        st.metric("Comfort Index", f"{selected['comfort_index']:.2f}/1.0")
+    st.caption(f"{len(results):,} scenarios over {window_days * 24:,} hours from {window_start:%Y-%m-%d} to "
+               f"{window_end:%Y-%m-%d} in {lookup_seconds * 1000:.0f} ms. Model trained from {train_start} "
+               f"to {train_end}.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        temp_hum = results[(results['weathersit'] == selected_code) & (results['windspeed_actual'] == selected_wind)]
+        temp_hum_pivot = temp_hum.pivot(index='hum_actual', columns='temp_actual', values='cnt')
+        fig = fx.imshow(temp_hum_pivot,
+                       labels=dict(x="Temperature (°C)", y="Humidity (%)", color="Rentals per Day"),
+                       x=temp_hum_pivot.columns,
+                       y=temp_hum_pivot.index,
+                       origin='lower',
+                       color_continuous_scale='YlGnBu',
+                       title=f'Scenarios: {selected_condition}, Wind {selected_wind} km/h')
+        show_chart(fig)
+    with col2:
+        weather_temp = results[(results['hum_actual'] == selected_hum) & (results['windspeed_actual'] == selected_wind)]
+        weather_temp_pivot = weather_temp.pivot(index='weathersit', columns='temp_actual', values='cnt')
+        fig = fx.imshow(weather_temp_pivot,
+                       labels=dict(x="Temperature (°C)", y="Weather Condition", color="Rentals per Day"),
+                       x=weather_temp_pivot.columns,
+                       y=[scenario_labels[code - 1] for code in weather_temp_pivot.index],
+                       color_continuous_scale='YlGnBu',
+                       title=f'Scenarios: Humidity {selected_hum}%, Wind {selected_wind} km/h')
+        show_chart(fig)
+
+    # Profil per jam dari skenario terpilih dan Clear dengan suhu, kelembapan dan angin yang sama
+    profile_scenarios = weather_grid(sorted({1, selected_code}), [selected_temp], [selected_hum], [selected_wind])
+    profile_rows = scenario_grid(calendar_rows(window_start, window_end),
+                                 profile_scenarios.set_index('weather_condition')[WEATHER_COLUMNS])
+    profile = forecast_model(train_start, train_end).predict(profile_rows)
+    profile['time'] = profile_rows['dteday'] + pd.to_timedelta(profile_rows['hr'].astype('int64'), unit='h')
+    profile['Scenario'] = profile_rows['scenario'].astype(str)
+    fig = fx.line(profile, x='time', y='cnt', color='Scenario',
+                  title=f'Expected Hourly Rentals: {selected_condition} at {selected_temp}°C, '
+                        f'{selected_hum}% Humidity')
+    fig.update_layout(xaxis_title='Time', yaxis_title='Expected Rentals per Hour')
+    show_chart(fig)
+
+if last_day - first_day < pd.Timedelta(days=min_training_days):
+    st.info(f"At least {min_training_days} days of data are needed to train a forecast.")
+else:
+    # Jendela latih dipakai bersama oleh kedua tab
+    window_label = st.selectbox("Training Window", list(training_windows), index=2,
+                                help="Weeks of history before the forecast start used to train the model")
+    forecast_tabs.render()
+
+# Anomaly Detection
+profiler.stage("7. Anomaly Detection")
+st.header("7. Anomaly Detection")
+
+anomaly_tabs = LazyTabs("anomalies", lazy=lazy_tabs)
+anomaly_directions = {True: 'Unusually High', False: 'Unusually Low'}
+anomaly_colors = {'Normal': qualitative.Plotly[0], 'Unusually High': qualitative.Plotly[2],
+                  'Unusually Low': qualitative.Plotly[1]}
+
+if live_dataset is not None:
+    # Dataset hidup menilai setiap batch saat masuk, tanpa memindai ulang baris lama
+    detector = live_dataset.detector
+else:
+    detector = load_anomaly_feed(backend.source, tuple(backend.cities or ())).refresh(backend)
+anomalies = detector.anomalies.assign(
+    Direction=lambda frame: (frame['score'] > 0).map(anomaly_directions),
+    **{'Day Type': lambda frame: frame['workingday'].map({0: 'Non-Working Day', 1: 'Working Day'})})
+
+@anomaly_tabs.tab("Anomaly Timeline")
+def anomaly_timeline_tab():
+    st.subheader("Abnormal Hours over Time")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Hours Scored", f"{detector.hours:,}")
+    with col2:
+        st.metric("Flagged Hours", f"{len(anomalies):,}",
+                  delta=f"{len(anomalies) / max(detector.hours, 1):.1%} of hours", delta_color="off")
+    with col3:
+        st.metric("Unusually High / Low",
+                  f"{(anomalies['score'] > 0).sum():,} / {(anomalies['score'] < 0).sum():,}")
+    with col4:
+        st.metric("Flagged in Ingested Batches", f"{(anomalies['batch'] > 0).sum():,}")
+    st.caption(f"Each hour is compared with the running level of its hour and day type (log scale) and flagged "
+               f"beyond {detector.threshold:g} mean absolute deviations. The latest rows were scored in "
+               f"{detector.scan_seconds * 1000:.1f} ms without rescanning older rows.")
+
+    if anomalies.empty:
+        st.info("No abnormal hours found.")
+        return
+    fig = fx.scatter(anomalies, x='time', y='score', color='Direction',
+                     hover_data=['cnt', 'expected', 'Day Type'],
+                     color_discrete_map=anomaly_colors,
+                     title='Flagged Hours: Deviation from the Hourly Profile')
+    fig.update_layout(xaxis_title='Time', yaxis_title='Score (deviations)')
+    show_chart(fig)
+
+    by_hour = anomalies.groupby(['hr', 'Direction']).size().reset_index(name='Flagged Hours')
+    fig = fx.bar(by_hour, x='hr', y='Flagged Hours', color='Direction', barmode='stack',
+                 color_discrete_map=anomaly_colors,
+                 title='Flagged Hours by Hour of Day')
+    fig.update_layout(xaxis_title='Hour of Day')
+    show_chart(fig)
+
+@anomaly_tabs.tab("Flagged Hours")
+def flagged_hours_tab():
+    st.subheader("Flagged Hours")
+    if anomalies.empty:
+        st.info("No abnormal hours found.")
+        return
+    table = anomalies.sort_values('time', ascending=False)
+    st.dataframe(
+        table[['time', 'Day Type', 'Direction', 'cnt', 'expected', 'score', 'batch']].rename(columns={
+            'time': 'Time', 'cnt': 'Rentals', 'expected': 'Expected', 'score': 'Score', 'batch': 'Batch'}),
+        hide_index=True, column_config={
+            'Time': st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:00"),
+            'Rentals': st.column_config.NumberColumn(format="%.0f"),
+            'Expected': st.column_config.NumberColumn(format="%.0f"),
+            'Score': st.column_config.NumberColumn(format="%+.1f"),
+        })
+    st.caption("Batch 0 is the data loaded at startup; later batches were flagged as they were ingested.")
+
+    # Jam per jam pada satu hari dengan anomali, jam tertandai diwarnai
+    flagged_days = table['dteday'].drop_duplicates()
+    selected_day = pd.Timestamp(st.selectbox("Day", flagged_days.dt.date.tolist()))
+    day_rows = backend.rows(['dteday', 'hr', 'cnt'], selected_day.date(), selected_day.date())
+    day = day_rows.groupby('hr', as_index=False)['cnt'].sum()
+    flagged = anomalies[anomalies['dteday'] == selected_day].set_index('hr')
+    day['Hour'] = day['hr'].map(flagged['Direction']).fillna('Normal')
+    day['Expected'] = day['hr'].map(flagged['expected'])
+    fig = fx.bar(day, x='hr', y='cnt', color='Hour', hover_data=['Expected'],
+                 color_discrete_map=anomaly_colors,
+                 title=f'Hourly Rentals on {selected_day:%Y-%m-%d}')
+    fig.update_layout(xaxis_title='Hour of Day', yaxis_title='Rentals')
+    show_chart(fig)
+
+anomaly_tabs.render()
+
+# Tunggu figure yang masih dibangun di pool dan gambar sesuai urutan tempatnya
+flush_charts()
 
 st.markdown("""
 ### Temuan Utama
@@ -875,4 +1232,90 @@ st.markdown("""
    - Pastikan ketersediaan sepeda yang cukup di pusat transportasi selama jam sibuk.
    - Integrasikan prakiraan cuaca dalam aplikasi penyewaan sepeda.
    - Kembangkan program loyalitas bagi pengguna rutin.
-""")
\ No newline at end of file
+""")
+profiler.stage("sidebar panels")
+
+# Statistik cache agregat (ditulis terakhir agar mencakup semua lookup pada rerun ini)
+with st.sidebar.expander("Aggregate Cache", expanded=False):
+    cache_stats = aggregate_cache.stats()
+    st.markdown(
+        f"- Hits: {cache_stats['hits']:,} / Misses: {cache_stats['misses']:,} "
+        f"({cache_stats['hit_rate']:.0%} hit rate)\n"
+        f"- Entries: {cache_stats['entries']:,} (evicted {cache_stats['evictions']:,})\n"
+        f"- Memory: {cache_stats['bytes'] / 1024 / 1024:.1f} / {cache_stats['max_bytes'] / 1024 / 1024:.0f} MB"
+    )
+    if aggregate_cache.store is not None:
+        store_stats = aggregate_cache.store.stats()
+        stored_mb = (store_stats['bytes'] or 0) / 1024 / 1024
+        st.markdown(
+            f"- Shared store: {cache_stats['shared_hits']:,} hits from the shared store, "
+            f"{store_stats['entries'] or 0:,} entries, {stored_mb:.1f} / {store_stats['max_bytes'] / 1024 / 1024:.0f} MB"
+            + (f", {store_stats['errors']:,} busy lookups" if store_stats['errors'] else "")
+        )
+
+# Memori frame bersama vs. tata letak lama (int64/float64 dan string object), plus frame filter per sesi
+with st.sidebar.expander("Memory", expanded=False):
+    if isinstance(view, FrameView):
+        main_data = backend.main_data
+        memory = aggregate_cache.get_or_compute('memory_report', data_version, memory_report, main_data)
+        shared_bytes, legacy_bytes = memory['bytes'].sum(), memory['legacy_bytes'].sum()
+        if view.data is main_data:
+            filtered_note = "the shared frame itself (no copy)"
+        else:
+            filtered_note = (f"{view.data.memory_usage(deep=True).sum() / 1024 / 1024:.1f} MB, "
+                             "shared by sessions with the same filters")
+        st.markdown(
+            f"- Shared frame: {shared_bytes / 1024 / 1024:.1f} MB "
+            f"(was {legacy_bytes / 1024 / 1024:.1f} MB, {legacy_bytes / max(shared_bytes, 1):.1f}x smaller)\n"
+            f"- Filtered data: {filtered_note}"
+        )
+        st.dataframe(memory.sort_values('legacy_bytes', ascending=False), hide_index=True)
+    else:
+        # Backend DuckDB: baris tetap di file, hanya hasil agregat yang masuk ke memori
+        st.markdown(
+            f"- Backend: DuckDB over `{backend.source}`\n"
+            f"- Filtered rows: {filtered_rows:,} (queried on disk, not loaded)"
+        )
+
+if live_dataset is not None and live_dataset.source is not None:
+    with st.sidebar.expander("Live Ingestion", expanded=False):
+        st.markdown(
+            f"- Source: `{live_dataset.source.path}`\n"
+            f"- Appended: {live_dataset.appended_rows:,} rows in {live_dataset.batches:,} batches\n"
+            f"- Rejected: {live_dataset.rejected:,}\n"
+            f"- Total rows: {len(live_dataset.snapshot().main_data):,}"
+        )
+
+# Statistik render per rerun: waktu dan ukuran payload tab yang dirender vs. tab yang dilewati
+with st.sidebar.expander("Render Stats", expanded=False):
+    render_summary = render_stats.summary()
+    payload_note = "" if measure_payload else " (enable payload measurement for sizes)"
+    st.markdown(
+        f"- Rendered: {render_summary['rendered_tabs']} tabs in {render_summary['rendered_seconds'] * 1000:.0f} ms, "
+        f"{render_summary['rendered_bytes'] / 1024:.0f} KB{payload_note}\n"
+        f"- Skipped: {render_summary['skipped_tabs']} tabs, saving ~{render_summary['saved_seconds'] * 1000:.0f} ms "
+        f"and ~{render_summary['saved_bytes'] / 1024:.0f} KB\n"
+        f"- Not yet measured: {render_summary['unmeasured_skips']} skipped tabs"
+    )
+
+# Profil rerun ini: waktu, baris, ukuran JSON grafik dan perubahan memori per tahap, tab dan grafik
+if profiler.enabled:
+    profile_records = profiler.finish()
+    export_trace(profiler)
+    with st.sidebar.expander("Performance", expanded=True):
+        memory_note = " (memory traced, so timings run slower)" if profile_records[0]['memory_delta'] is not None else ""
+        st.markdown(f"Rerun: {profiler.total_seconds * 1000:.0f} ms{memory_note}")
+        profile_table = pd.DataFrame(profile_records)
+        profile_table['name'] = ['\u2003' * depth + name
+                                 for depth, name in zip(profile_table['depth'], profile_table['name'])]
+        profile_table['ms'] = profile_table['seconds'] * 1000
+        profile_table['chart KB'] = profile_table['chart_bytes'] / 1024
+        profile_table['memory KB'] = profile_table['memory_delta'].astype(float) / 1024
+        st.dataframe(profile_table[['name', 'ms', 'rows', 'charts', 'chart KB', 'memory KB']],
+                     hide_index=True, column_config={
+                         'ms': st.column_config.NumberColumn(format="%.1f"),
+                         'chart KB': st.column_config.NumberColumn(format="%.0f"),
+                         'memory KB': st.column_config.NumberColumn(format="%.0f"),
+                     })
+        st.download_button("Download trace (JSONL)", session_trace_jsonl(),
+                           file_name="dashboard_profile.jsonl", mime="application/jsonl")
@@ -0,0 +1,130 @@
+"""Memoized aggregates keyed by the normalized filter state.
+
+Every chart aggregate is stored under ``(name, filter_key)`` in a process-wide
+LRU bounded by an approximate memory budget. Reruns triggered by widgets that
+do not change the filters (tab-local selectboxes, expanders, ...) then reuse
+the previous results instead of re-running the groupbys.
+
+With a ``store`` (``shared_cache.SharedStore``), a local miss is looked up
+there before computing, and shareable results are written back, so
+replicas on the same host compute each aggregate once.
+"""
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from shared_cache import shareable
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def make_filter_key(state, data_version=''):
+    """Canonical hash of a FilterState (plus the dataset it applies to)."""
+    parts = [str(data_version)]
+    for field, value in zip(state._fields, state):
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        elif isinstance(value, float):
+            # Nilai slider float dinormalisasi agar 20.000000001 dan 20.0 memakai kunci yang sama
+            value = f"{value:.6f}"
+        parts.append(f"{field}={value}")
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+
+def estimate_nbytes(value):
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, 'sum') else int(usage)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(estimate_nbytes(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_nbytes(item) for item in value.values())
+    if isinstance(getattr(value, 'nbytes', None), int):
+        # Objek yang membungkus frame (mis. backends.FrameView) melaporkan ukurannya sendiri
+        return value.nbytes
+    return sys.getsizeof(value)
+
+
+class AggregateCache:
+    """Thread-safe LRU of aggregate results with memory-based eviction.
+
+    Cached values are shared between sessions, so callers must treat them
+    as read-only.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, store=None):
+        self.max_bytes = max_bytes
+        self.store = store
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.evictions = 0
+
+    def get_or_compute(self, name, key, compute, *args, **kwargs):
+        cache_key = (name, key)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        if self.store is not None:
+            found, value, nbytes = self.store.get(f"{name}\x1f{key}")
+            if found:
+                with self._lock:
+                    self.shared_hits += 1
+                # Ukuran pickle cukup sebagai perkiraan dan jauh lebih murah daripada memory_usage(deep=True)
+                return self._insert(cache_key, value, nbytes)
+
+        value = compute(*args, **kwargs)
+        if self.store is not None and shareable(value):
+            self.store.put(f"{name}\x1f{key}", value)
+        return self._insert(cache_key, value)
+
+    def _insert(self, cache_key, value, nbytes=None):
+        if nbytes is None:
+            nbytes = estimate_nbytes(value)
+        with self._lock:
+            if nbytes > self.max_bytes:
+                # Hasil yang lebih besar dari seluruh anggaran tidak disimpan
+                return value
+            previous = self._entries.pop(cache_key, None)
+            if previous is not None:
+                self.total_bytes -= previous[1]
+            self._entries[cache_key] = (value, nbytes)
+            self.total_bytes += nbytes
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_bytes
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'shared_hits': self.shared_hits,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,213 @@
+"""Streaming detection of abnormal hourly rental counts.
+
+``AnomalyDetector`` keeps robust running statistics of ``log1p(cnt)`` for
+each of the 48 daily profiles (hour × workingday): an exponentially
+weighted level and an exponentially weighted mean absolute deviation of
+the one-step-ahead residuals. An hour is scored against its profile before
+the profile is updated, and flagged when its residual exceeds
+``threshold`` deviations. Residuals are clipped at the threshold before
+they update the statistics, so a storm or a data outage does not drag the
+level or widen the spread it is measured against. Counts are compared on
+the log scale, so an hour at 3 in the morning and one at rush hour are
+judged relative to their own size.
+
+Folding in rows costs a fixed number of operations per hour and never
+rescans older rows: ``extended`` takes only the new rows and returns a new
+detector (the old one is left untouched, as the cube and filter index
+are), so ``LiveDataset`` scores each ingested batch as it arrives. Rows of
+the same hour (scaled or multi-city data) are summed first, as in the cube.
+Without a live dataset (DuckDB backend) an ``AnomalyFeed`` keeps the
+detector between data versions and asks the backend only for the hourly
+totals after the last hour it scored.
+Within a batch, hours are processed in rounds: round ``k`` holds the
+``k``-th hour of every profile, and each round updates all profiles in a
+few vector operations.
+"""
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Kolom yang dibutuhkan detektor dari setiap baris
+DETECTOR_COLUMNS = ['dteday', 'hr', 'workingday', 'cnt']
+
+# 24 jam x 2 tipe hari
+PROFILES = 48
+# Bobot EWMA per jam baru di profilnya (paruh waktu sekitar 14 hari dengan tipe hari yang sama)
+ALPHA = 0.05
+# Residual (skala log) dalam kelipatan deviasi absolut rata-rata; ~4 sigma untuk residual normal
+THRESHOLD = 5.0
+# Jam per profil sebelum skor dipakai
+WARMUP = 14
+# Deviasi minimum agar profil yang sangat stabil tidak menandai setiap perubahan kecil
+MIN_SPREAD = 0.05
+# Jam tertandai yang disimpan (terbaru)
+MAX_ANOMALIES = 5000
+
+
+def hourly_totals(rows):
+    """Hour numbers (hours since the epoch), workingday and summed ``cnt`` of ``rows``, in time order.
+
+    An hour shared by several rows is a working hour only if all of them are
+    (``MIN(workingday)`` in the SQL of ``DuckDBBackend.hourly_totals``).
+    """
+    hours = (rows['dteday'].to_numpy(dtype='datetime64[D]').astype(np.int64) * 24
+             + rows['hr'].to_numpy(dtype=np.int64))
+    workingday = rows['workingday'].to_numpy(dtype=np.int64)
+    counts = rows['cnt'].to_numpy(dtype=np.float64)
+    if len(hours) > 1 and not (np.diff(hours) > 0).all():
+        # Urutkan dan jumlahkan baris dengan jam yang sama (data berskala atau banyak kota)
+        order = np.argsort(hours, kind='stable')
+        hours, workingday, counts = hours[order], workingday[order], counts[order]
+        starts = np.flatnonzero(np.r_[True, hours[1:] != hours[:-1]])
+        hours, workingday, counts = hours[starts], np.minimum.reduceat(workingday, starts), np.add.reduceat(counts, starts)
+    return hours, workingday, counts
+
+
+def hourly_frame(hours, workingday, counts):
+    """``DETECTOR_COLUMNS`` frame with one row per hour number in ``hours``."""
+    return pd.DataFrame({
+        'dteday': (hours // 24).astype('datetime64[D]').astype('datetime64[ns]'),
+        'hr': (hours % 24).astype(np.int8), 'workingday': workingday.astype(np.int8), 'cnt': counts,
+    })
+
+
+def _rounds(profiles):
+    """Positions of ``profiles`` grouped by round: the ``k``-th occurrence of every profile is in round ``k``."""
+    order = np.argsort(profiles, kind='stable')
+    sorted_profiles = profiles[order]
+    starts = np.flatnonzero(np.r_[True, sorted_profiles[1:] != sorted_profiles[:-1]])
+    occurrence = np.empty(len(profiles), dtype=np.int64)
+    occurrence[order] = np.arange(len(profiles)) - np.repeat(starts, np.diff(np.r_[starts, len(profiles)]))
+    by_round = np.argsort(occurrence, kind='stable')
+    return np.split(by_round, np.cumsum(np.bincount(occurrence))[:-1])
+
+
+def _empty_anomalies():
+    return pd.DataFrame({
+        'time': pd.Series(dtype='datetime64[ns]'), 'dteday': pd.Series(dtype='datetime64[ns]'),
+        'hr': pd.Series(dtype=np.int8), 'workingday': pd.Series(dtype=np.int8),
+        'cnt': pd.Series(dtype=np.float64), 'expected': pd.Series(dtype=np.float64),
+        'score': pd.Series(dtype=np.float64), 'batch': pd.Series(dtype=np.int64),
+    })
+
+
+class AnomalyDetector:
+    """Running level and spread of ``log1p(cnt)`` per hour × workingday profile, plus the flagged hours."""
+
+    def __init__(self, alpha=ALPHA, threshold=THRESHOLD, warmup=WARMUP):
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+        self.level = np.zeros(PROFILES)
+        self.spread = np.zeros(PROFILES)
+        self.seen = np.zeros(PROFILES, dtype=np.int64)
+        # Jam terakhir yang sudah dinilai; jam yang lebih lama di batch berikutnya dilewati
+        self.last_hour = np.iinfo(np.int64).min
+        self.hours = 0
+        self.late_hours = 0
+        # Waktu penilaian batch terakhir
+        self.scan_seconds = 0.0
+        self.anomalies = _empty_anomalies()
+
+    @property
+    def nbytes(self):
+        return int(self.level.nbytes * 3 + self.anomalies.memory_usage(deep=True).sum())
+
+    def extended(self, rows, batch=0):
+        """Detector with the hours of ``rows`` (``DETECTOR_COLUMNS``) scored and folded in; ``self`` is left untouched.
+
+        Hours at or before the last hour already scored arrive too late for
+        the running statistics and are only counted in ``late_hours``.
+        ``batch`` is recorded with every hour flagged from these rows.
+        """
+        started = time.perf_counter()
+        merged = AnomalyDetector(self.alpha, self.threshold, self.warmup)
+        merged.level, merged.spread, merged.seen = self.level.copy(), self.spread.copy(), self.seen.copy()
+        merged.last_hour, merged.hours, merged.late_hours = self.last_hour, self.hours, self.late_hours
+        merged.anomalies = self.anomalies
+
+        hours, workingday, counts = hourly_totals(rows)
+        fresh = hours > self.last_hour
+        merged.late_hours += int(len(hours) - fresh.sum())
+        hours, workingday, counts = hours[fresh], workingday[fresh], counts[fresh]
+        if not len(hours):
+            merged.scan_seconds = time.perf_counter() - started
+            return merged
+        profiles = (hours % 24) + 24 * workingday
+        values = np.log1p(counts)
+        expected, scores = merged._scan(profiles, values)
+
+        flagged = np.flatnonzero(np.abs(scores) > self.threshold)
+        if len(flagged):
+            stamps = pd.to_datetime(hours[flagged] * 3600, unit='s')
+            found = pd.DataFrame({
+                'time': stamps, 'dteday': stamps.normalize(),
+                'hr': (hours[flagged] % 24).astype(np.int8), 'workingday': workingday[flagged].astype(np.int8),
+                'cnt': counts[flagged], 'expected': np.expm1(expected[flagged]), 'score': scores[flagged],
+                'batch': np.full(len(flagged), batch, dtype=np.int64),
+            })
+            found = pd.concat([self.anomalies, found], ignore_index=True) if len(self.anomalies) else found
+            merged.anomalies = found.iloc[-MAX_ANOMALIES:].reset_index(drop=True)
+        merged.last_hour = int(hours[-1])
+        merged.hours += len(hours)
+        merged.scan_seconds = time.perf_counter() - started
+        return merged
+
+    def _scan(self, profiles, values):
+        """Score and fold in ``values`` (in time order), updating the profile arrays in place.
+
+        Returns the level each hour was compared with and its score (NaN while its profile warms up).
+        """
+        expected = np.empty(len(values))
+        scores = np.full(len(values), np.nan)
+        limit = self.threshold
+        for positions in _rounds(profiles):
+            # Dalam satu putaran setiap profil muncul paling banyak sekali
+            profile, value = profiles[positions], values[positions]
+            level, seen = self.level[profile], self.seen[profile]
+            spread = np.maximum(self.spread[profile], MIN_SPREAD)
+            residual = value - level
+            warm = seen >= self.warmup
+            scores[positions] = np.where(warm, residual / spread, np.nan)
+            expected[positions] = level
+            # Residual dipotong di ambang agar anomali tidak menggeser statistiknya sendiri
+            clipped = np.where(warm, np.clip(residual, -limit * spread, limit * spread), residual)
+            weight = np.maximum(self.alpha, 1.0 / (seen + 1))
+            self.level[profile] = level + weight * clipped
+            # Jam pertama profil hanya menetapkan level; deviasi dihitung mulai jam kedua
+            spread_weight = np.where(seen > 0, np.maximum(self.alpha, 1.0 / np.maximum(seen, 1)), 0.0)
+            self.spread[profile] = self.spread[profile] + spread_weight * (np.abs(clipped) - self.spread[profile])
+            self.seen[profile] = seen + 1
+        return expected, scores
+
+
+class AnomalyFeed:
+    """Detector kept across the data versions of a query backend.
+
+    ``refresh`` folds in only the hours after the last one scored, summed
+    per hour by the backend; hours that a new version adds before that hour
+    are not scored (the detector only moves forward in time).
+    """
+
+    def __init__(self, detector=None):
+        self.detector = detector if detector is not None else AnomalyDetector()
+        self.version = None
+        self.batches = 0
+        # Sesi Streamlit berbagi feed yang sama
+        self._lock = threading.Lock()
+
+    def refresh(self, backend):
+        """The detector with the new hours of ``backend`` folded in, once per ``backend.version``."""
+        with self._lock:
+            version = backend.version
+            if version != self.version:
+                after_hour = self.detector.last_hour if self.detector.hours else None
+                rows = backend.hourly_totals(after_hour)
+                if len(rows):
+                    # Batch 0 adalah seluruh riwayat versi pertama
+                    self.detector = self.detector.extended(rows, self.batches)
+                    self.batches += 1
+                self.version = version
+            return self.detector
@@ -0,0 +1,619 @@
+"""Query backends for the sidebar filters and the chart aggregates.
+
+Both backends answer the same questions (totals, grouped means, heatmap
+tensors, value counts, correlations, histograms and scatter points) for one
+``FilterState`` through a *view*:
+
+- ``FrameBackend`` is the in-memory reference. Its ``FrameView`` works on
+  the frame selected by the filter index and answers grouped aggregates
+  and Pearson correlations from the first cube whose cells the filters map
+  onto (the default cube, a cube per chart dimension, or the coarsest daily,
+  weekly or monthly tier that fits, see ``rollups.py``), and Spearman
+  correlations from the rank index.
+- ``DuckDBBackend`` leaves the rows on disk (a CSV, a Parquet file or a
+  partitioned root, see ``partitions.py``) and runs every filter and
+  aggregate as SQL in DuckDB, so only aggregates (and the few thousand rows
+  of a sampled scatter plot) are ever materialized in Python. The derived
+  columns are compiled from the declarations in ``features.py`` into SQL
+  (only those a query reads), so both backends bin and label every row
+  identically.
+
+Set ``DASHBOARD_BACKEND=duckdb`` to use DuckDB. Grouped SQL results are
+finished by the same pandas code as the reference (``frame_mean``,
+``HeatmapTensor``), so both return frames with the same shape, labels and
+dtypes; ``benchmarks/check_backends.py`` compares every chart's numbers.
+"""
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from anomalies import hourly_frame, hourly_totals
+from correlation import PEARSON, SPEARMAN
+from cube import MEASURES, frame_mean
+from downsample import (
+    DEFAULT_POINT_BUDGET, DEFAULT_STRATA, MODE_ALL, MODE_AUTO, MODE_BINS, Downsampled,
+    bin_centers, bins_note, choose_reduction, density_grid, reduce_points, sample_key_sql, sample_note,
+)
+from features import (
+    BIN_FEATURES, COMFORT_FEATURE, LABEL_FEATURES, SCALED_FEATURES, TIME_CATEGORY_FEATURE,
+    USER_TYPE_LABELS, categorical_dtypes,
+)
+from filter_index import (
+    ALL_DAYS, ALL_SEASONS, ALL_TEMPS, ALL_USERS, ALL_WEATHER, BALANCED_RATIO_THRESHOLD,
+)
+from heatmaps import AXIS_NAMES, HEATMAP_MEASURES, HeatmapTensor
+from ingest import RAW_COLUMNS
+from partitions import CITY_COLUMN, PartitionCatalog
+from preprocess import source_version
+from rollups import BASE, Rollups
+from schema import COLUMN_DTYPES
+
+BACKEND_ENV = 'DASHBOARD_BACKEND'
+PANDAS_BACKEND = 'pandas'
+DUCKDB_BACKEND = 'duckdb'
+BACKENDS = [PANDAS_BACKEND, DUCKDB_BACKEND]
+
+HISTOGRAM_BINS = 20
+# Kolom yang selalu ikut pada titik scatter (mis. hover_name tanggal), di luar sumbu dan warna
+POINT_CONTEXT_COLUMNS = ['dteday', 'hr']
+
+CATEGORICAL_DTYPES = categorical_dtypes()
+
+
+def backend_name():
+    """Backend selected by ``DASHBOARD_BACKEND`` (pandas by default)."""
+    name = os.environ.get(BACKEND_ENV, PANDAS_BACKEND).strip().lower() or PANDAS_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"{BACKEND_ENV} must be one of {', '.join(BACKENDS)}, not {name!r}")
+    return name
+
+
+def histogram_frame(counts, low, span, bins=HISTOGRAM_BINS):
+    """Equal-width bins from ``low`` to ``low + span`` with their row counts."""
+    edges = low + span * np.arange(bins + 1) / bins
+    return pd.DataFrame({'bin_start': edges[:-1], 'bin_end': edges[1:],
+                         'bin_center': (edges[:-1] + edges[1:]) / 2,
+                         'count': np.asarray(counts, dtype=np.int64)})
+
+
+def _empty_histogram():
+    return pd.DataFrame({'bin_start': [], 'bin_end': [], 'bin_center': [],
+                         'count': np.array([], dtype=np.int64)})
+
+
+def _histogram_span(low, high):
+    return high - low if high > low else 1.0
+
+
+class FrameView:
+    """Aggregates of the filtered in-memory frame, from the cubes of ``tiers`` when one holds them.
+
+    ``tiers`` are the cubes that answer the filters exactly (``Rollups.select``);
+    every aggregate comes from the first one holding its columns, and from the
+    filtered rows otherwise.
+    """
+
+    def __init__(self, data, tiers=(), ranks=None):
+        self.data = data
+        self.tiers = list(tiers)
+        self.ranks = ranks
+
+    def _source(self, group_cols=()):
+        """The first cube of ``tiers`` holding ``group_cols`` with its selected cells, or None."""
+        for tier in self.tiers:
+            if all(name in tier.cube.dimensions for name in group_cols):
+                return tier
+        return None
+
+    def granularity(self, group_cols=()):
+        """Level that answers an aggregate over ``group_cols``: the name of a cube, or the rows."""
+        if isinstance(group_cols, str):
+            group_cols = [group_cols]
+        source = self._source(group_cols)
+        return source.name if source is not None else 'rows'
+
+    @property
+    def nbytes(self):
+        return int(self.data.memory_usage(deep=True).sum()) + sum(int(tier.cells.nbytes) for tier in self.tiers)
+
+    def row_count(self):
+        return len(self.data)
+
+    def totals(self, measures):
+        source = self._source()
+        if source is not None:
+            return source.cube.totals(measures, source.cells)
+        return {name: self.data[name].sum() for name in measures}
+
+    def means(self, columns):
+        source = self._source()
+        if source is not None and set(columns) <= set(MEASURES):
+            return source.cube.means(columns, source.cells)
+        return {name: self.data[name].mean() for name in columns}
+
+    def mean(self, group_cols, value_cols):
+        source = self._source([group_cols] if isinstance(group_cols, str) else group_cols)
+        if source is not None:
+            return source.cube.mean(group_cols, value_cols, source.cells)
+        return frame_mean(self.data, group_cols, value_cols)
+
+    def heatmaps(self):
+        return HeatmapTensor.from_cubes(self.tiers, self.data)
+
+    def value_counts(self, column):
+        source = self._source([column])
+        if source is not None:
+            return source.cube.value_counts(column, source.cells)
+        return self.data[column].value_counts()
+
+    def corr(self, columns, method=PEARSON):
+        result = None
+        source = self._source()
+        if method == PEARSON and source is not None:
+            result = source.cube.corr(columns, source.cells)
+        elif method == SPEARMAN and self.ranks is not None:
+            # Label indeks frame terfilter adalah posisi baris di frame utama
+            result = self.ranks.spearman(columns, self.data.index.to_numpy())
+        return self.data[columns].corr(method=method) if result is None else result
+
+    def histogram(self, column, bins=HISTOGRAM_BINS):
+        values = self.data[column].to_numpy(dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return _empty_histogram()
+        low = values.min()
+        span = _histogram_span(low, values.max())
+        codes = np.clip(np.floor((values - low) / span * bins).astype(np.int64), 0, bins - 1)
+        return histogram_frame(np.bincount(codes, minlength=bins), low, span, bins)
+
+    def points(self, axes, budget=DEFAULT_POINT_BUDGET, mode=MODE_AUTO, color=None, value_columns=()):
+        return reduce_points(self.data, axes, budget, mode, color, value_columns)
+
+
+class FrameBackend:
+    """The shared in-memory frame with its filter index, cubes and rank index (the reference backend).
+
+    ``cube`` is the default cube (``rollups.BASE``) of ``rollups``.
+    """
+
+    name = PANDAS_BACKEND
+
+    def __init__(self, main_data, filter_index, cube, ranks=None, rollups=None):
+        self.main_data = main_data
+        self.filter_index = filter_index
+        self.cube = cube
+        self.ranks = ranks
+        self.rollups = rollups if rollups is not None else Rollups(main_data, {BASE: cube})
+
+    @property
+    def version(self):
+        return self.filter_index.version
+
+    def options(self, column):
+        return self.main_data[column].dropna().unique().tolist()
+
+    def bounds(self, column):
+        values = self.main_data[column]
+        low, high = values.min(), values.max()
+        if hasattr(low, 'date'):
+            return low.date(), high.date()
+        return low, high
+
+    def view(self, state):
+        return FrameView(self.filter_index.select(self.main_data, state), self.rollups.select(state), self.ranks)
+
+    def rows(self, columns, date_start=None, date_end=None):
+        """``columns`` of the unfiltered rows dated from ``date_start`` to ``date_end`` (e.g. to train a forecast)."""
+        if date_start is None or date_end is None:
+            return self.main_data[columns].reset_index(drop=True)
+        dteday = self.main_data['dteday']
+        mask = (dteday >= pd.Timestamp(date_start)) & (dteday <= pd.Timestamp(date_end))
+        return self.main_data.loc[mask, columns].reset_index(drop=True)
+
+    def hourly_totals(self, after_hour=None):
+        """``DETECTOR_COLUMNS`` with one row per hour after hour number ``after_hour``, ``cnt`` summed over cities."""
+        hours, workingday, counts = hourly_totals(self.main_data)
+        if after_hour is not None:
+            fresh = hours > after_hour
+            hours, workingday, counts = hours[fresh], workingday[fresh], counts[fresh]
+        return hourly_frame(hours, workingday, counts)
+
+
+# Tipe SQL untuk dtype ringkas di schema.COLUMN_DTYPES
+_SQL_TYPES = {np.int8: 'TINYINT', np.int16: 'SMALLINT', np.int32: 'INTEGER', np.float32: 'REAL'}
+
+DAY_TYPE_SQL = {
+    'Working Day': 'workingday = 1',
+    'Non-Working Day': 'workingday = 0',
+    'Weekday': 'weekday BETWEEN 1 AND 5',
+    'Weekend': 'weekday IN (0, 6)',
+    'Holiday': 'holiday = 1',
+}
+USER_TYPE_SQL = {
+    'Casual Dominant': 'casual > registered',
+    'Registered Dominant': 'registered > casual',
+    'Balanced': f'abs(casual - registered) / cnt < {BALANCED_RATIO_THRESHOLD!r}::DOUBLE',
+}
+
+
+def _quote(text):
+    return "'" + str(text).replace("'", "''") + "'"
+
+
+def _double(value):
+    return f"{float(value)!r}::DOUBLE"
+
+
+def _label_sql(feature, source):
+    table = range(len(feature.labels)) if feature.codes is None else feature.codes
+    whens = ' '.join(f"WHEN {feature.offset + value} THEN {_quote(feature.labels[code])}"
+                     for value, code in enumerate(table))
+    return f"CASE {source} {whens} END"
+
+
+def _bin_sql(feature, expression):
+    # Bin tertutup kanan seperti features._bin_codes: edges[i] < x <= edges[i + 1]
+    whens = ' '.join(f"WHEN {expression} > {_double(low)} AND {expression} <= {_double(high)} "
+                     f"THEN {_quote(label)}"
+                     for low, high, label in zip(feature.edges[:-1], feature.edges[1:], feature.labels))
+    return f"CASE {whens} END"
+
+
+def _cast(expression, name):
+    sql_type = _SQL_TYPES.get(COLUMN_DTYPES.get(name))
+    return f"CAST({expression} AS {sql_type})" if sql_type else expression
+
+
+def hourly_columns(extra_columns=()):
+    """SQL expression of every dashboard column over the raw relation ``src``, by column name.
+
+    Mirrors ``apply_schema(derive_features(raw))``: derived values are
+    computed from the raw doubles and then cast to the compact dtypes.
+    """
+    raw = {name: f"CAST(src.{name} AS DOUBLE)" for name in RAW_COLUMNS if name != 'dteday'}
+    columns = {'dteday': "CAST(src.dteday AS DATE)"}
+    columns.update((name, _cast('src.' + name, name)) for name in RAW_COLUMNS if name != 'dteday')
+    columns.update((name, f"src.{name}") for name in extra_columns)
+
+    expressions = {}
+    for feature in SCALED_FEATURES:
+        expressions[feature.name] = f"({raw[feature.source]} * {feature.factor})"
+    expressions['comfort_index'] = (f"(({raw['temp']} * 0.5::DOUBLE) + ((1 - {raw['hum']}) * 0.3::DOUBLE) + "
+                                    f"((1 - {raw['windspeed']}) * 0.2::DOUBLE))")
+    for feature in LABEL_FEATURES + [TIME_CATEGORY_FEATURE]:
+        columns[feature.name] = _label_sql(feature, 'src.' + feature.source)
+    for name, expression in expressions.items():
+        columns[name] = _cast(expression, name)
+    for feature in BIN_FEATURES + [COMFORT_FEATURE]:
+        columns[feature.name] = _bin_sql(feature, expressions[feature.source])
+    # Jam tanpa rental: pandas memberi NaN yang dilewati oleh mean, padanannya di SQL adalah NULL
+    # (NaN di DuckDB ikut dirata-rata). cnt = casual + registered, jadi x / 0 dengan x > 0 tidak terjadi
+    columns['casual_ratio'] = _cast('src.casual / NULLIF(src.cnt, 0)', 'casual_ratio')
+    columns['registered_ratio'] = _cast('src.registered / NULLIF(src.cnt, 0)', 'registered_ratio')
+    columns['user_type'] = (f"CASE WHEN src.casual > src.registered THEN {_quote(USER_TYPE_LABELS[0])} "
+                            f"ELSE {_quote(USER_TYPE_LABELS[1])} END")
+    return columns
+
+
+def hourly_sql(source_sql, extra_columns=(), columns=None):
+    """SELECT of the dashboard columns over ``source_sql`` (a relation with the raw columns).
+
+    With ``columns``, only those are derived: DuckDB binds every expression
+    of the relation in each query, so a narrow SELECT plans several times
+    faster than the ~35 columns of the full one.
+    """
+    expressions = hourly_columns(extra_columns)
+    names = [name for name in expressions if columns is None or name in columns]
+    return f"SELECT {', '.join(f'{expressions[name]} AS {name}' for name in names)} FROM ({source_sql}) AS src"
+
+
+def parquet_copy(connection, csv_path):
+    """Parquet copy of the raw columns of ``csv_path`` next to it, rewritten when the CSV changes.
+
+    Queries then scan compressed columns instead of parsing the CSV every
+    time; a read-only deploy keeps querying the CSV itself.
+    """
+    import duckdb
+
+    parquet_path = os.path.splitext(csv_path)[0] + '.parquet'
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path):
+        return parquet_path
+    # Tulis ke file sementara dulu supaya worker lain tidak membaca salinan setengah jadi
+    tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+    try:
+        connection.execute(f"COPY (SELECT {', '.join(RAW_COLUMNS)} FROM read_csv({_quote(csv_path)})) "
+                           f"TO {_quote(tmp_path)} (FORMAT parquet)")
+        os.replace(tmp_path, parquet_path)
+    except (OSError, duckdb.Error):
+        return csv_path
+    return parquet_path
+
+
+def conform(frame):
+    """Give the label and bin columns of a SQL result the dtypes of the in-memory frame."""
+    dtypes = {name: dtype for name, dtype in CATEGORICAL_DTYPES.items() if name in frame}
+    return frame.astype(dtypes) if dtypes else frame
+
+
+class DuckDBBackend:
+    """Filters and aggregates as DuckDB queries over the files at ``source``.
+
+    ``source`` is a ``.csv`` or ``.parquet`` file with the raw columns of
+    ``data/data_2.csv`` or a partitioned root; for a root, ``cities``
+    limits the view to those cities and date filters skip the months
+    outside the range without opening their files.
+    """
+
+    name = DUCKDB_BACKEND
+    VIEW = 'hourly'
+
+    def __init__(self, source, cities=None):
+        import duckdb
+
+        self.source = source
+        self.partitioned = os.path.isdir(source)
+        self.cities = list(cities) if cities else None
+        self._connection = duckdb.connect()
+        if source.endswith('.csv'):
+            self.source = parquet_copy(self._connection, source)
+        self._scan, self._extra_columns = self._scan_sql()
+        self._column_names = frozenset(hourly_columns(self._extra_columns))
+        self._relations = {}
+        # Urutan baris seperti frame di memori, agar sampel berstrata memilih baris yang sama
+        self.row_order = 'dteday, hr' + (f', {CITY_COLUMN}' if self.partitioned else '')
+
+    def _scan_sql(self):
+        if not self.partitioned:
+            reader = 'read_parquet' if self.source.endswith('.parquet') else 'read_csv'
+            return f"SELECT * FROM {reader}({_quote(self.source)})", []
+        files = os.path.join(self.source, f'{CITY_COLUMN}=*', 'year=*', 'month=*', '*.parquet')
+        scan = (f"SELECT * FROM read_parquet({_quote(files)}, hive_partitioning = true, "
+                f"hive_types = {{'{CITY_COLUMN}': VARCHAR, 'year': SMALLINT, 'month': TINYINT}})")
+        if self.cities is not None:
+            scan += f" WHERE {CITY_COLUMN} IN ({', '.join(_quote(city) for city in self.cities)})"
+        return scan, [CITY_COLUMN, 'year', 'month']
+
+    def _files(self):
+        if not self.partitioned:
+            return [self.source]
+        catalog = PartitionCatalog(self.source)
+        partitions = catalog.prune(self.cities if self.cities is not None else catalog.cities)
+        return [os.path.join(partition.path, name) for partition in partitions
+                for name in sorted(os.listdir(partition.path)) if name.endswith('.parquet')]
+
+    @property
+    def version(self):
+        """``source_version`` of the scan and every file it reads, the same in every process.
+
+        The files are read again by every query, so a rewritten file gives a
+        new version (and new cache keys) without restarting the dashboard.
+        """
+        stamps = [self._scan] + [source_version(path) for path in self._files()]
+        return hashlib.sha1(json.dumps(stamps).encode()).hexdigest()
+
+    def relation(self, *sql):
+        """FROM item deriving only the dashboard columns named in the ``sql`` fragments."""
+        names = frozenset(re.findall(r'\w+', ' '.join(sql))) & self._column_names
+        relation = self._relations.get(names)
+        if relation is None:
+            relation = f"({hourly_sql(self._scan, self._extra_columns, names or ['cnt'])}) AS {self.VIEW}"
+            self._relations[names] = relation
+        return relation
+
+    def query(self, sql, params=()):
+        # Satu cursor per query: sesi Streamlit berjalan di thread yang berbeda
+        return self._connection.cursor().execute(sql, list(params))
+
+    def options(self, column):
+        return [row[0] for row in self.query(
+            f"SELECT DISTINCT {column} FROM {self.relation(column)} WHERE {column} IS NOT NULL").fetchall()]
+
+    def bounds(self, column):
+        return self.query(f"SELECT MIN({column}), MAX({column}) FROM {self.relation(column)}").fetchone()
+
+    def _date_clauses(self, date_start, date_end):
+        clauses, params = [], []
+        if date_start is not None and date_end is not None:
+            if self.partitioned:
+                # Pembatasan pada kolom partisi: bulan di luar rentang tidak dibaca sama sekali
+                clauses.append('(year > ? OR (year = ? AND month >= ?)) AND (year < ? OR (year = ? AND month <= ?))')
+                params += [date_start.year, date_start.year, date_start.month,
+                           date_end.year, date_end.year, date_end.month]
+            clauses.append('dteday BETWEEN ? AND ?')
+            params += [date_start, date_end]
+        return clauses, params
+
+    def where(self, state):
+        """SQL condition and parameters equivalent to ``FilterIndex.mask(state)``."""
+        clauses, params = self._date_clauses(state.date_start, state.date_end)
+        for column, value, everything in (('season_name', state.season, ALL_SEASONS),
+                                          ('weather_condition', state.weather, ALL_WEATHER),
+                                          ('temp_category', state.temp_category, ALL_TEMPS)):
+            if value != everything:
+                clauses.append(f'{column} = ?')
+                params.append(value)
+        if state.day_type != ALL_DAYS:
+            clauses.append(DAY_TYPE_SQL.get(state.day_type, 'FALSE'))
+        clauses.append('temp_actual BETWEEN ? AND ?')
+        params += [float(state.temp_min), float(state.temp_max)]
+        if state.user_type != ALL_USERS:
+            clauses.append(USER_TYPE_SQL.get(state.user_type, 'FALSE'))
+        return ' AND '.join(f'({clause})' for clause in clauses), params
+
+    def view(self, state):
+        return SqlView(self, state)
+
+    def rows(self, columns, date_start=None, date_end=None):
+        clauses, params = self._date_clauses(date_start, date_end)
+        where = f" WHERE {' AND '.join(f'({clause})' for clause in clauses)}" if clauses else ''
+        relation = self.relation(*columns, where, self.row_order)
+        frame = self.query(f"SELECT {', '.join(columns)} FROM {relation}{where} ORDER BY {self.row_order}",
+                           params).df()
+        return conform(frame)
+
+    def hourly_totals(self, after_hour=None):
+        clauses, params = [], []
+        if after_hour is not None:
+            day = pd.Timestamp(after_hour // 24, unit='D')
+            if self.partitioned:
+                clauses.append('year > ? OR (year = ? AND month >= ?)')
+                params += [day.year, day.year, day.month]
+            clauses.append("dteday >= ? AND date_diff('day', DATE '1970-01-01', dteday) * 24 + hr > ?")
+            params += [day.date(), int(after_hour)]
+        where = f" WHERE {' AND '.join(f'({clause})' for clause in clauses)}" if clauses else ''
+        relation = self.relation('dteday, hr, workingday, cnt', where)
+        frame = self.query(f"SELECT dteday, hr, MIN(workingday) AS workingday, SUM(cnt) AS cnt "
+                           f"FROM {relation}{where} GROUP BY dteday, hr ORDER BY dteday, hr", params).df()
+        return conform(frame)
+
+
+class SqlView:
+    """The ``FrameView`` questions answered by DuckDB for one filter state."""
+
+    def __init__(self, backend, state):
+        self.backend = backend
+        self.where, self.params = backend.where(state)
+        self._row_count = None
+
+    def _execute(self, select, params=(), group_by=(), where='', order_by=''):
+        relation = self.backend.relation(select, where, order_by, *group_by, self.where)
+        sql = f"SELECT {select} FROM {relation} WHERE {self.where}"
+        if where:
+            sql += f" AND ({where})"
+        if group_by:
+            sql += f" GROUP BY {', '.join(group_by)}"
+        if order_by:
+            sql += f" ORDER BY {order_by}"
+        # Parameter kolom SELECT muncul sebelum parameter filter
+        return self.backend.query(sql, list(params) + self.params)
+
+    def _frame(self, select, params=(), **clauses):
+        return conform(self._execute(select, params, **clauses).df())
+
+    def row_count(self):
+        if self._row_count is None:
+            self._row_count = self._execute('COUNT(*)').fetchone()[0]
+        return self._row_count
+
+    def totals(self, measures):
+        row = self._execute(', '.join(f'SUM({name})' for name in measures)).fetchone()
+        return {name: 0 if value is None else value for name, value in zip(measures, row)}
+
+    def means(self, columns):
+        row = self._execute(', '.join(f'AVG({name})' for name in columns)).fetchone()
+        return {name: np.nan if value is None else value for name, value in zip(columns, row)}
+
+    def mean(self, group_cols, value_cols):
+        if isinstance(group_cols, str):
+            group_cols = [group_cols]
+        values = [value_cols] if isinstance(value_cols, str) else list(value_cols)
+        grouped = self._frame(', '.join(list(group_cols) + [f'AVG({name}) AS {name}' for name in values]),
+                              group_by=group_cols)
+        # Satu baris per grup; frame_mean menambahkan bin kosong dan mengurutkan seperti referensinya
+        return frame_mean(grouped, group_cols, value_cols)
+
+    def heatmaps(self):
+        measures = [f'SUM({name}) AS sum_{name}, COUNT({name}) AS count_{name}' for name in HEATMAP_MEASURES]
+        grouped = self._frame(', '.join(AXIS_NAMES + measures), group_by=AXIS_NAMES)
+        return HeatmapTensor.from_frame(grouped, {name: f'sum_{name}' for name in HEATMAP_MEASURES},
+                                        {name: f'count_{name}' for name in HEATMAP_MEASURES})
+
+    def value_counts(self, column):
+        grouped = self._execute(f'{column}, COUNT(*)', where=f'{column} IS NOT NULL',
+                                group_by=[column]).fetchall()
+        dtype = CATEGORICAL_DTYPES[column]
+        counts = dict(grouped)
+        series = pd.Series([counts.get(label, 0) for label in dtype.categories],
+                           index=pd.CategoricalIndex(dtype.categories, dtype=dtype, name=column),
+                           name='count', dtype=np.int64)
+        return series.sort_values(ascending=False, kind='stable')
+
+    def corr(self, columns, method=PEARSON):
+        pairs = [(i, j) for i in range(len(columns)) for j in range(i, len(columns))]
+        select = ', '.join(f'corr({columns[i]}, {columns[j]})' for i, j in pairs)
+        if method == SPEARMAN:
+            # Peringkat rata-rata untuk nilai kembar, seperti rank() di pandas
+            ranks = ', '.join(f'(2 * rank() OVER (ORDER BY {name}) + COUNT(*) OVER (PARTITION BY {name}) - 1) / 2.0 '
+                              f'AS {name}' for name in columns)
+            relation = self.backend.relation(*columns, self.where)
+            row = self.backend.query(f"SELECT {select} FROM (SELECT {ranks} FROM {relation} "
+                                     f"WHERE {self.where})", self.params).fetchone()
+        else:
+            row = self._execute(select).fetchone()
+        matrix = np.full((len(columns), len(columns)), np.nan)
+        for (i, j), value in zip(pairs, row):
+            if value is not None:
+                matrix[i, j] = matrix[j, i] = value
+        return pd.DataFrame(matrix, index=columns, columns=columns)
+
+    def histogram(self, column, bins=HISTOGRAM_BINS):
+        value = f'CAST({column} AS DOUBLE)'
+        low, high = self._execute(f'MIN({value}), MAX({value})').fetchone()
+        if low is None:
+            return _empty_histogram()
+        span = _histogram_span(low, high)
+        # Rumus bin yang sama dengan FrameView.histogram, dihitung di DuckDB
+        code = f'LEAST(GREATEST(CAST(floor(({value} - ?) / ? * ?) AS BIGINT), 0), ?)'
+        grouped = self._execute(f'{code} AS bin, COUNT(*)', [low, span, bins, bins - 1],
+                                where=f'{column} IS NOT NULL', group_by=['bin']).fetchall()
+        counts = np.zeros(bins, dtype=np.int64)
+        for code_value, count in grouped:
+            counts[code_value] = count
+        return histogram_frame(counts, low, span, bins)
+
+    def _density_bins(self, axes, budget, color, value_columns):
+        # Seperti density_bins: baris tanpa nilai sumbu (atau warna) tidak masuk bin mana pun
+        present = ' AND '.join(f'{name} IS NOT NULL' for name in list(axes) + ([color] if color is not None else []))
+        n_groups = self._execute(f'COUNT(DISTINCT {color})', where=present).fetchone()[0] if color is not None else 1
+        bins_per_axis = density_grid(budget, n_groups, len(axes))
+        bounds = self._execute(', '.join(f'MIN(CAST({axis} AS DOUBLE)), MAX(CAST({axis} AS DOUBLE))'
+                                         for axis in axes), where=present).fetchone()
+        # Kode bin per sumbu seperti bin_codes: floor((x - min) / span * n), dijepit ke [0, n - 1]
+        limits, codes, params = [], [], []
+        for position, axis in enumerate(axes):
+            low, high = (bounds[2 * position], bounds[2 * position + 1]) if bounds[0] is not None else (0.0, 0.0)
+            span = high - low if high > low else 1.0
+            limits.append((low, high))
+            codes.append(f'LEAST(GREATEST(CAST(floor((CAST({axis} AS DOUBLE) - ?) / ? * ?) AS BIGINT), 0), ?) '
+                         f'AS _bin{position}')
+            params += [low, span, bins_per_axis, bins_per_axis - 1]
+        columns = [name for name in dict.fromkeys(value_columns) if name not in axes]
+        keys = ([color] if color is not None else []) + [f'_bin{position}' for position in range(len(axes))]
+        select = ', '.join(keys[:len(keys) - len(axes)] + codes + [f'AVG({name}) AS {name}' for name in columns]
+                           + ['COUNT(*) AS points'])
+        binned = self._frame(select, params, where=present, group_by=keys, order_by=', '.join(keys))
+        for position, (axis, (low, high)) in enumerate(zip(axes, limits)):
+            binned[axis] = bin_centers(binned.pop(f'_bin{position}'), low, high, bins_per_axis)
+        return binned
+
+    def points(self, axes, budget=DEFAULT_POINT_BUDGET, mode=MODE_AUTO, color=None, value_columns=()):
+        """Same reduction as ``reduce_points``; density bins are computed in DuckDB."""
+        n_rows = self.row_count()
+        reduction = choose_reduction(n_rows, budget, mode)
+        if reduction == MODE_BINS:
+            binned = self._density_bins(axes, budget, color, value_columns)
+            return Downsampled(binned, bins_note(int(binned['points'].sum()), len(binned)), True)
+        strata = DEFAULT_STRATA if reduction != MODE_ALL else []
+        columns = list(dict.fromkeys(list(axes) + ([color] if color is not None else [])
+                                     + list(value_columns) + strata + POINT_CONTEXT_COLUMNS))
+        if reduction == MODE_ALL:
+            return Downsampled(self._frame(', '.join(columns), order_by=self.backend.row_order), None, False)
+        sample = self._stratified_sample(columns, budget, n_rows)
+        return Downsampled(sample, sample_note(len(sample), n_rows), False)
+
+    def _stratified_sample(self, columns, budget, n_rows):
+        """``stratified_sample`` in DuckDB: only the sampled rows leave the database."""
+        strata = ', '.join(DEFAULT_STRATA)
+        relation = self.backend.relation(*columns, strata, sample_key_sql(), self.backend.row_order, self.where)
+        # Peringkat per strata menurut kunci sampel (urutan baris sebagai pemecah seri), kuota proporsional
+        ranked = (f"SELECT *, ROW_NUMBER() OVER (PARTITION BY {strata} "
+                  f"ORDER BY {sample_key_sql()}, {self.backend.row_order}) AS _rank, "
+                  f"COUNT(*) OVER (PARTITION BY {strata}) AS _size "
+                  f"FROM {relation} WHERE {self.where}")
+        sql = (f"SELECT {', '.join(columns)} FROM ({ranked}) "
+               f"WHERE _rank <= GREATEST(1, floor(CAST(_size AS DOUBLE) * ? / ?)) ORDER BY {self.backend.row_order}")
+        return conform(self.backend.query(sql, self.params + [budget, n_rows]).df())
@@ -0,0 +1,187 @@
+"""Correlation matrices of filtered rows without a pass over every row.
+
+- ``CellMoments`` keeps, per cube cell, the row count plus the sums and
+  cross-products of the correlation columns. The Pearson matrix of any set
+  of cells adds up those per-cell moments, so its cost depends on the number
+  of cells and not on the number of hourly rows. Values are shifted by a
+  fixed reference (the column means when the moments were first built) so
+  the sums of squares stay well conditioned.
+- ``RankIndex`` keeps the distinct sorted values of every column and the
+  value group of each row. The average ranks within any subset of rows then
+  follow from a count per group and a cumulative sum, without sorting again.
+  A Spearman matrix is the Pearson matrix of those ranks.
+
+Both fold in appended rows without revisiting the old ones (``combined`` /
+``extended``). Results match ``data[columns].corr(method=...)`` on columns
+without missing values; either class returns None for anything it cannot
+answer exactly, and callers fall back to pandas.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+PEARSON = 'pearson'
+SPEARMAN = 'spearman'
+METHODS = [PEARSON, SPEARMAN]
+
+CORR_COLUMNS = ['temp', 'atemp', 'hum', 'windspeed', 'cnt', 'casual', 'registered', 'comfort_index']
+
+# Variansi di bawah batas relatif ini dianggap nol (kolom konstan), seperti pembagi nol di pandas
+CONSTANT_TOLERANCE = 1e-10
+
+
+def correlation_matrix(n, sums, cross, columns):
+    """Pearson matrix from a row count, column sums and the full cross-product matrix."""
+    k = len(columns)
+    matrix = np.full((k, k), np.nan)
+    if n >= 2:
+        cov = cross - np.outer(sums, sums) / n
+        squares = np.diag(cross)
+        variance = np.diag(cov)
+        varying = variance > CONSTANT_TOLERANCE * squares
+        with np.errstate(divide='ignore', invalid='ignore'):
+            matrix = np.clip(cov / np.sqrt(np.outer(variance, variance)), -1.0, 1.0)
+        matrix[~varying, :] = np.nan
+        matrix[:, ~varying] = np.nan
+        matrix[np.diag_indices(k)] = np.where(varying, 1.0, np.nan)
+    return pd.DataFrame(matrix, index=list(columns), columns=list(columns))
+
+
+def _column_values(frame, columns):
+    return frame[columns].to_numpy(dtype=np.float64)
+
+
+class CellMoments:
+    """Row count, shifted sums and cross-products of ``CORR_COLUMNS`` per cube cell."""
+
+    def __init__(self, count, sums, products, shift):
+        self.count = count
+        self.sums = sums
+        self.products = products
+        self.shift = shift
+
+    @classmethod
+    def from_rows(cls, frame, inverse, n_cells, shift=None):
+        """Moments of ``frame`` grouped by ``inverse`` (cell of every row); None when a value is missing."""
+        values = _column_values(frame, CORR_COLUMNS)
+        if np.isnan(values).any():
+            # pandas memakai pasangan baris lengkap per kolom; tanpa nilai kosong semua kolom berbagi baris
+            return None
+        if shift is None:
+            shift = values.mean(axis=0) if len(values) else np.zeros(len(CORR_COLUMNS))
+        values -= shift
+        count = np.bincount(inverse, minlength=n_cells).astype(np.float64)
+        sums = np.column_stack([np.bincount(inverse, weights=values[:, i], minlength=n_cells)
+                                for i in range(len(CORR_COLUMNS))])
+        upper = np.triu_indices(len(CORR_COLUMNS))
+        products = np.column_stack([np.bincount(inverse, weights=values[:, i] * values[:, j], minlength=n_cells)
+                                    for i, j in zip(*upper)])
+        return cls(count, sums, products, shift)
+
+    def combined(self, other, inverse, n_cells):
+        """Moments of the cells of ``self`` followed by those of ``other``, merged by ``inverse``."""
+        if other is None or not np.array_equal(self.shift, other.shift):
+            return None
+
+        def combine(left, right):
+            stacked = np.concatenate([left, right])
+            return np.column_stack([np.bincount(inverse, weights=stacked[:, i], minlength=n_cells)
+                                    for i in range(stacked.shape[1])])
+
+        count = np.bincount(inverse, weights=np.concatenate([self.count, other.count]), minlength=n_cells)
+        return CellMoments(count, combine(self.sums, other.sums), combine(self.products, other.products),
+                           self.shift)
+
+    def pearson(self, columns, cell_mask):
+        """Equivalent of ``data[columns].corr()`` for the rows of the selected cells, or None."""
+        if not set(columns) <= set(CORR_COLUMNS):
+            return None
+        k = len(CORR_COLUMNS)
+        n = self.count[cell_mask].sum()
+        sums = self.sums[cell_mask].sum(axis=0)
+        cross = np.empty((k, k))
+        upper = np.triu_indices(k)
+        cross[upper] = self.products[cell_mask].sum(axis=0)
+        cross.T[upper] = cross[upper]
+        positions = [CORR_COLUMNS.index(name) for name in columns]
+        return correlation_matrix(n, sums[positions], cross[np.ix_(positions, positions)], columns)
+
+
+class _RankedColumn:
+    """Sorted distinct values of one column and the value group of every row."""
+
+    def __init__(self, uniques, groups):
+        self.uniques = uniques
+        self.groups = groups
+
+    @classmethod
+    def build(cls, values):
+        uniques, groups = np.unique(values, return_inverse=True)
+        return cls(uniques, groups.astype(np.int32))
+
+    def extended(self, new_values):
+        """Groups of the existing rows followed by ``new_values``, remapping codes instead of re-sorting."""
+        uniques = np.union1d(self.uniques, new_values)
+        remap = np.searchsorted(uniques, self.uniques).astype(np.int32)
+        new_groups = np.searchsorted(uniques, new_values).astype(np.int32)
+        return _RankedColumn(uniques, np.concatenate([remap[self.groups], new_groups]))
+
+    def ranks(self, rows):
+        """Average ranks (ties share the mean rank, as in pandas) of ``rows`` among themselves."""
+        groups = self.groups[rows]
+        counts = np.bincount(groups, minlength=len(self.uniques))
+        before = np.cumsum(counts) - counts
+        return (before + (counts + 1) / 2)[groups]
+
+
+class RankIndex:
+    """Value groups per correlation column of ``main_data``, for Spearman on any subset of rows.
+
+    Rows are identified by their index labels, which must be the positions
+    ``0..n-1`` (a RangeIndex, as kept by ingestion and partition loading).
+    Columns are ranked on first use, so a dashboard that never asks for
+    Spearman never pays for the sort.
+    """
+
+    def __init__(self, main_data, columns=CORR_COLUMNS):
+        self.main_data = main_data
+        self.columns = list(columns)
+        self.available = (main_data.index.equals(pd.RangeIndex(len(main_data)))
+                          and not main_data[self.columns].isna().any().any())
+        self._ranked = {}
+        self._lock = threading.Lock()
+
+    def _column(self, name):
+        with self._lock:
+            ranked = self._ranked.get(name)
+            if ranked is None:
+                ranked = self._ranked[name] = _RankedColumn.build(self.main_data[name].to_numpy(dtype=np.float64))
+            return ranked
+
+    def extended(self, main_data, new_rows):
+        """Index over ``main_data`` (the old rows followed by ``new_rows``); ``self`` is left untouched."""
+        merged = RankIndex.__new__(RankIndex)
+        merged.main_data = main_data
+        merged.columns = self.columns
+        # Hanya baris baru yang diperiksa; baris lama sudah diperiksa saat indeks ini dibuat
+        merged.available = (self.available and main_data.index.equals(pd.RangeIndex(len(main_data)))
+                            and not new_rows[self.columns].isna().any().any())
+        merged._ranked = {}
+        merged._lock = threading.Lock()
+        if merged.available:
+            with self._lock:
+                ranked = dict(self._ranked)
+            for name, column in ranked.items():
+                merged._ranked[name] = column.extended(new_rows[name].to_numpy(dtype=np.float64))
+        return merged
+
+    def spearman(self, columns, rows):
+        """Equivalent of ``main_data.iloc[rows][columns].corr('spearman')``, or None."""
+        if not self.available or not set(columns) <= set(self.columns):
+            return None
+        if len(rows) < 2:
+            return correlation_matrix(len(rows), None, None, columns)
+        ranks = np.column_stack([self._column(name).ranks(rows) for name in columns])
+        centered = ranks - ranks.mean(axis=0)
+        return correlation_matrix(len(rows), centered.sum(axis=0), centered.T @ centered, columns)
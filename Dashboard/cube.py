@@ -0,0 +1,446 @@
+"""Pre-aggregated cubes of the hourly data.
+
+A cube holds sum and non-null count arrays per cell of its key dimensions.
+The default key is the set of dimensions the sidebar filters read (season,
+weather, temperature bin, user mix and the day type flags), plus the city on
+multi-city data (cities may have different holidays). The calendar day is
+not part of the key, so the number of cells is bounded by the label
+combinations and stops growing with the number of hourly rows.
+``rollups.py`` adds one chart dimension (hour, humidity, wind, comfort) or
+one calendar period (day, week, month) to that key for the aggregates the
+default cells cannot answer.
+
+Chart aggregates (means of ``cnt``, ``casual``, ``registered``, ...
+grouped by one or two low-cardinality dimensions) then become weighted
+``np.bincount`` reductions over the cells selected by the sidebar filters,
+so their cost depends on the number of distinct cells instead of the number
+of hourly rows.
+
+Results mirror ``frame_mean``: ordered categoricals (the bins) list every
+category, other dimensions list only the observed groups, in category order
+for unordered categoricals and in sorted order otherwise.
+
+Per-cell moments of the correlation columns (``correlation.CellMoments``)
+give the Pearson matrix of the selected cells the same way.
+
+New rows are folded in with ``Cube.extended``, which merges a cube of the
+new rows into the existing cells without touching the old rows.
+"""
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from correlation import CellMoments
+from filter_index import (
+    ALL_DAYS, ALL_SEASONS, ALL_TEMPS, ALL_USERS, ALL_WEATHER, BALANCED_RATIO_THRESHOLD,
+)
+
+MEASURES = ['cnt', 'casual', 'registered', 'comfort_index', 'casual_ratio',
+            'temp_actual', 'hum_actual', 'windspeed_actual']
+
+# Kunci sel bawaan: dimensi yang dibaca filter sidebar ('user_mix' adalah bit tipe pengguna), tanpa hari kalender
+KEY_DIMENSIONS = ['season_name', 'weather_condition', 'temp_category', 'user_mix',
+                  'weekday', 'workingday', 'holiday']
+# Dimensi periode: hari pertama (hari sejak epoch) dari hari, minggu (Senin-Minggu) atau bulan setiap baris
+PERIOD_DIMENSIONS = ['day', 'week', 'month']
+# Dimensi yang mengikuti dimensi kunci (nilai harian atau per jam): ikut di kubus bila salah satu
+# sumbernya ada di kunci, dan harus konstan dalam satu sel
+DEPENDENT_DIMENSIONS = {
+    'season_name': ['day'], 'month_name': ['day', 'month'],
+    'weekday_name': ['weekday', 'day'], 'workingday_label': ['workingday', 'day'],
+    'weekday': ['day'], 'workingday': ['day'], 'holiday': ['day'], 'time_category': ['hr'],
+}
+
+# Dimensi yang dibaca oleh filter tipe hari
+DAY_TYPE_DIMENSIONS = ['weekday', 'workingday', 'holiday']
+
+# Bit pada kode user_mix, sesuai opsi filter tipe pengguna
+CASUAL_DOMINANT = 1
+REGISTERED_DOMINANT = 2
+BALANCED = 4
+USER_TYPE_BITS = {'Casual Dominant': CASUAL_DOMINANT, 'Registered Dominant': REGISTERED_DOMINANT,
+                  'Balanced': BALANCED}
+
+
+class _Dimension:
+    """Labels of one dimension plus the code of every cube cell (``-1`` = missing)."""
+
+    def __init__(self, name, labels, cell_codes, categorical=False, ordered=False):
+        self.name = name
+        self.labels = labels
+        self.cell_codes = cell_codes
+        self.categorical = categorical
+        self.ordered = ordered
+
+    @property
+    def size(self):
+        return len(self.labels)
+
+    @property
+    def complete(self):
+        """True when grouped results list every label, observed or not."""
+        return self.categorical and self.ordered
+
+    def cells_of(self, label):
+        """Mask of the cells holding ``label``; no cell for an unknown label (code -1 marks missing values)."""
+        matches = np.flatnonzero(np.asarray(self.labels, dtype=object) == label)
+        if not matches.size:
+            return np.zeros(len(self.cell_codes), dtype=bool)
+        return self.cell_codes == matches[0]
+
+    def cell_values(self):
+        return np.asarray(self.labels)[self.cell_codes]
+
+    def to_column(self, codes):
+        if self.categorical:
+            return pd.Categorical.from_codes(codes, categories=self.labels, ordered=self.ordered)
+        return np.asarray(self.labels)[codes]
+
+
+def _factorize(values):
+    """Codes (``-1`` for missing), labels, categorical flag and ordered flag.
+
+    Object and numeric columns get sorted labels, as in a sorted groupby.
+    """
+    if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy().astype(np.int64), values.cat.categories, True, values.cat.ordered
+    codes, uniques = pd.factorize(values, sort=True)
+    return codes.astype(np.int64), np.asarray(uniques), False, False
+
+
+def _align_labels(left, right):
+    """Shared labels for two dimensions and the code remapping of each side."""
+    if left.categorical or right.categorical:
+        if not (left.categorical and right.categorical and list(left.labels) == list(right.labels)):
+            raise ValueError(f"{left.name}: categories differ between the cube and the new rows")
+        identity = np.arange(left.size)
+        return left.labels, identity, identity
+    labels = np.union1d(np.asarray(left.labels), np.asarray(right.labels))
+    return (labels, np.searchsorted(labels, np.asarray(left.labels)),
+            np.searchsorted(labels, np.asarray(right.labels)))
+
+
+def _remap(codes, mapping):
+    return np.where(codes >= 0, mapping[np.maximum(codes, 0)], -1)
+
+
+def _cell_keys(code_arrays, sizes):
+    """Unique int64 key per combination of key-dimension codes (missing shifted to 0)."""
+    return np.ravel_multi_index([codes + 1 for codes in code_arrays], [size + 1 for size in sizes])
+
+
+def _is_complete(column):
+    return isinstance(column.dtype, pd.CategoricalDtype) and column.cat.ordered
+
+
+def frame_mean(frame, group_cols, value_cols):
+    """Row-level reference for ``Cube.mean``: a groupby mean listing every bin of
+    ordered categoricals and only the observed values of other columns."""
+    if isinstance(group_cols, str):
+        group_cols = [group_cols]
+    result = frame.groupby(group_cols, observed=True)[value_cols].mean()
+    if any(_is_complete(frame[col]) for col in group_cols):
+        levels = [frame[col].cat.categories if _is_complete(frame[col])
+                  else result.index.unique(level=col).sort_values() for col in group_cols]
+        if len(group_cols) == 1:
+            full = pd.CategoricalIndex(levels[0], dtype=frame[group_cols[0]].dtype, name=group_cols[0])
+        else:
+            full = pd.MultiIndex.from_product(levels, names=group_cols)
+        result = result.reindex(full)
+    return result.reset_index()
+
+
+def _user_mix(main_data):
+    casual = main_data['casual'].to_numpy()
+    registered = main_data['registered'].to_numpy()
+    cnt = main_data['cnt'].to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        balanced = np.abs(casual - registered) / cnt < BALANCED_RATIO_THRESHOLD
+    return ((casual > registered) * CASUAL_DOMINANT
+            + (registered > casual) * REGISTERED_DOMINANT
+            + balanced * BALANCED).astype(np.int64)
+
+
+def period_start(days, period):
+    """First day (days since epoch) of the ``period`` (``PERIOD_DIMENSIONS``) holding each of ``days``."""
+    days = np.asarray(days, dtype=np.int64)
+    if period == 'day':
+        return days
+    if period == 'week':
+        # 1970-01-01 jatuh pada hari Kamis; minggu dimulai hari Senin
+        return days - (days + 3) % 7
+    if period == 'month':
+        return days.astype('datetime64[D]').astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+    raise ValueError(f"unknown period {period!r}")
+
+
+def _days(main_data):
+    return main_data['dteday'].to_numpy().astype('datetime64[D]').astype(np.int64)
+
+
+def _dimension_values(main_data, name):
+    if name in PERIOD_DIMENSIONS:
+        return period_start(_days(main_data), name)
+    if name == 'user_mix':
+        return _user_mix(main_data)
+    return main_data[name]
+
+
+def key_dimensions(main_data, dimensions=KEY_DIMENSIONS):
+    """Cell key of a cube over ``main_data``: ``dimensions`` plus the city on multi-city data."""
+    # Diimpor di sini: partitions mengimpor ingest, yang mengimpor modul ini.
+    # Kota ikut menjadi kunci sel karena kota berbeda bisa punya hari libur dan hari kerja berbeda
+    from partitions import CITY_COLUMN
+
+    key = list(dimensions)
+    if CITY_COLUMN in main_data and CITY_COLUMN not in key:
+        key.append(CITY_COLUMN)
+    return key
+
+
+def dependent_dimensions(key):
+    """Dimensions that follow from the ``key`` dimensions and are read from the cell codes."""
+    return [name for name, sources in DEPENDENT_DIMENSIONS.items()
+            if name not in key and any(source in key for source in sources)]
+
+
+def _cell_ranges(values, inverse):
+    by_cell = pd.Series(values).groupby(inverse)
+    return by_cell.min().to_numpy(), by_cell.max().to_numpy()
+
+
+class Cube:
+    """Sums and non-null counts of ``MEASURES`` per cell of the ``key`` dimensions."""
+
+    def __init__(self, main_data, key=KEY_DIMENSIONS, corr_shift=None):
+        self.key_dimensions = key_dimensions(main_data, key)
+        row_codes = {}
+        self.dimensions = {}
+        for name in self.key_dimensions + dependent_dimensions(self.key_dimensions):
+            codes, labels, categorical, ordered = _factorize(_dimension_values(main_data, name))
+            row_codes[name] = codes
+            self.dimensions[name] = _Dimension(name, labels, None, categorical, ordered)
+
+        keys = _cell_keys([row_codes[name] for name in self.key_dimensions],
+                          [self.dimensions[name].size for name in self.key_dimensions])
+        cell_keys, first_row, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        self.n_cells = len(cell_keys)
+        self.n_rows = len(main_data)
+
+        for name, dimension in self.dimensions.items():
+            dimension.cell_codes = row_codes[name][first_row]
+            # Dimensi turunan harus konstan dalam satu sel agar bisa dibaca dari kodenya
+            if name not in self.key_dimensions and not np.array_equal(row_codes[name],
+                                                                      dimension.cell_codes[inverse]):
+                raise ValueError(f"{name} varies within a cell of {', '.join(self.key_dimensions)}; "
+                                 "it cannot be a cube dimension")
+
+        self.count = np.bincount(inverse, minlength=self.n_cells).astype(np.float64)
+        self.sums = {}
+        self.counts = {}
+        self.measure_kinds = {}
+        for name in MEASURES:
+            values = main_data[name].to_numpy(dtype=np.float64)
+            valid = ~np.isnan(values)
+            self.sums[name] = np.bincount(inverse, weights=np.where(valid, values, 0.0), minlength=self.n_cells)
+            self.counts[name] = np.bincount(inverse, weights=valid, minlength=self.n_cells)
+            self.measure_kinds[name] = main_data[name].dtype.kind
+
+        # Rentang suhu dan hari per sel, untuk menentukan apakah slider suhu dan rentang tanggal
+        # memotong sel secara persis
+        self.cell_temp_min, self.cell_temp_max = _cell_ranges(main_data['temp_actual'].to_numpy(), inverse)
+        self.cell_day_min, self.cell_day_max = _cell_ranges(_days(main_data), inverse)
+
+        # Momen kolom korelasi per sel (None bila ada nilai kosong; korelasi lalu dihitung dari baris)
+        self.moments = CellMoments.from_rows(main_data, inverse, self.n_cells, corr_shift)
+
+    def extended(self, new_rows):
+        """New cube holding the existing cells plus ``new_rows``; ``self`` is left untouched."""
+        # Baris baru digeser dengan acuan yang sama agar momennya bisa dijumlahkan
+        shift = self.moments.shift if self.moments is not None else None
+        other = Cube(new_rows, self.key_dimensions, corr_shift=shift)
+        if other.key_dimensions != self.key_dimensions:
+            raise ValueError("the new rows and the cube differ in their city column")
+        merged = Cube.__new__(Cube)
+        merged.key_dimensions = self.key_dimensions
+        merged.n_rows = self.n_rows + other.n_rows
+        merged.measure_kinds = self.measure_kinds
+
+        codes = {}
+        merged.dimensions = {}
+        for name, left in self.dimensions.items():
+            right = other.dimensions[name]
+            labels, left_map, right_map = _align_labels(left, right)
+            codes[name] = np.concatenate([_remap(left.cell_codes, left_map), _remap(right.cell_codes, right_map)])
+            merged.dimensions[name] = _Dimension(name, labels, None, left.categorical, left.ordered)
+
+        keys = _cell_keys([codes[name] for name in merged.key_dimensions],
+                          [merged.dimensions[name].size for name in merged.key_dimensions])
+        cell_keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        merged.n_cells = len(cell_keys)
+        for name, dimension in merged.dimensions.items():
+            dimension.cell_codes = codes[name][first]
+            if name not in merged.key_dimensions and not np.array_equal(codes[name], dimension.cell_codes[inverse]):
+                raise ValueError(f"{name} of the new rows contradicts the existing cells")
+
+        def combine(left, right):
+            return np.bincount(inverse, weights=np.concatenate([left, right]), minlength=merged.n_cells)
+
+        def bound(reduce, fill, left, right):
+            out = np.full(merged.n_cells, fill)
+            reduce.at(out, inverse, np.concatenate([left, right]))
+            return out
+
+        merged.count = combine(self.count, other.count)
+        merged.sums = {name: combine(self.sums[name], other.sums[name]) for name in MEASURES}
+        merged.counts = {name: combine(self.counts[name], other.counts[name]) for name in MEASURES}
+        merged.cell_temp_min = bound(np.minimum, np.inf, self.cell_temp_min, other.cell_temp_min)
+        merged.cell_temp_max = bound(np.maximum, -np.inf, self.cell_temp_max, other.cell_temp_max)
+        merged.cell_day_min = bound(np.minimum, np.iinfo(np.int64).max, self.cell_day_min, other.cell_day_min)
+        merged.cell_day_max = bound(np.maximum, np.iinfo(np.int64).min, self.cell_day_max, other.cell_day_max)
+        merged.moments = (self.moments.combined(other.moments, inverse, merged.n_cells)
+                          if self.moments is not None else None)
+        return merged
+
+    def cell_mask(self, state):
+        """Cells selected by ``state``, or None when the cube cannot answer it exactly.
+
+        The date range and the temperature slider are exact only when no
+        selected cell straddles one of their bounds: the full range always
+        is, a narrower one needs a cube keyed by a calendar period
+        (``rollups.py``). A cube also returns None for filters on dimensions
+        it does not have.
+        """
+        mask = np.ones(self.n_cells, dtype=bool)
+        for name, value, everything in (('season_name', state.season, ALL_SEASONS),
+                                        ('weather_condition', state.weather, ALL_WEATHER),
+                                        ('temp_category', state.temp_category, ALL_TEMPS)):
+            if value != everything:
+                if name not in self.dimensions:
+                    return None
+                mask &= self.dimensions[name].cells_of(value)
+        if state.day_type != ALL_DAYS:
+            if not set(DAY_TYPE_DIMENSIONS) <= set(self.dimensions):
+                return None
+            mask &= self._day_type_mask(state.day_type)
+        if state.user_type != ALL_USERS:
+            if 'user_mix' not in self.dimensions:
+                return None
+            mask &= (self.dimensions['user_mix'].cell_values() & USER_TYPE_BITS[state.user_type]) != 0
+
+        ranges = [(self.cell_temp_min, self.cell_temp_max, state.temp_min, state.temp_max)]
+        if state.date_start is not None and state.date_end is not None:
+            ranges.append((self.cell_day_min, self.cell_day_max,
+                           np.datetime64(state.date_start, 'D').astype(np.int64),
+                           np.datetime64(state.date_end, 'D').astype(np.int64)))
+        for low, high, lower, upper in ranges:
+            inside = (low >= lower) & (high <= upper)
+            outside = (high < lower) | (low > upper)
+            if np.any(mask & ~inside & ~outside):
+                return None
+            mask &= inside
+        return mask
+
+    def _day_type_mask(self, day_type):
+        weekday = self.dimensions['weekday'].cell_values()
+        if day_type == 'Working Day':
+            return self.dimensions['workingday'].cell_values() == 1
+        if day_type == 'Non-Working Day':
+            return self.dimensions['workingday'].cell_values() == 0
+        if day_type == 'Weekday':
+            return (weekday >= 1) & (weekday <= 5)
+        if day_type == 'Weekend':
+            return (weekday == 0) | (weekday == 6)
+        if day_type == 'Holiday':
+            return self.dimensions['holiday'].cell_values() == 1
+        return np.zeros(self.n_cells, dtype=bool)
+
+    def _group(self, group_cols, cell_mask):
+        """Flat group code per selected cell plus the labels of every group slot."""
+        dims = [self.dimensions[name] for name in group_cols]
+        cell_codes = [dim.cell_codes[cell_mask] for dim in dims]
+        valid = np.ones(len(cell_codes[0]), dtype=bool)
+        for codes in cell_codes:
+            valid &= codes >= 0
+        shape = [dim.size for dim in dims]
+        group = np.ravel_multi_index([codes[valid] for codes in cell_codes], shape)
+        return dims, shape, group, valid
+
+    def reduce(self, group_cols, measures, cell_mask):
+        """Per-group sums, non-null counts and row counts over the full label grid.
+
+        Returns ``(dims, shape, {measure: (sums, counts)}, rows)`` with flat
+        arrays of ``prod(shape)`` slots.
+        """
+        dims, shape, group, valid = self._group(group_cols, cell_mask)
+        n_slots = int(np.prod(shape))
+        rows = np.bincount(group, weights=self.count[cell_mask][valid], minlength=n_slots)
+        out = {}
+        for name in measures:
+            out[name] = (np.bincount(group, weights=self.sums[name][cell_mask][valid], minlength=n_slots),
+                         np.bincount(group, weights=self.counts[name][cell_mask][valid], minlength=n_slots))
+        return dims, shape, out, rows
+
+    def mean(self, group_cols, value_cols, cell_mask):
+        """Equivalent of ``groupby(group_cols)[value_cols].mean().reset_index()``."""
+        if isinstance(group_cols, str):
+            group_cols = [group_cols]
+        measures = [value_cols] if isinstance(value_cols, str) else list(value_cols)
+        dims, shape, reduced, rows = self.reduce(group_cols, measures, cell_mask)
+        rows_present = rows > 0
+
+        if any(dim.complete for dim in dims):
+            # Bin berurutan ditampilkan lengkap, dimensi lain hanya nilai yang teramati
+            axes = []
+            observed = rows_present.reshape(shape)
+            for axis, dim in enumerate(dims):
+                if dim.complete:
+                    axes.append(np.arange(dim.size))
+                else:
+                    other = tuple(i for i in range(len(dims)) if i != axis)
+                    axes.append(np.flatnonzero(observed.any(axis=other) if other else observed))
+            combos = np.array(list(itertools.product(*axes)), dtype=np.int64).reshape(-1, len(dims))
+            slots = np.ravel_multi_index(combos.T, shape) if len(combos) else np.array([], dtype=np.int64)
+        else:
+            slots = np.flatnonzero(rows_present)
+        group_codes = np.unravel_index(slots, shape)
+
+        result = pd.DataFrame({dim.name: dim.to_column(codes) for dim, codes in zip(dims, group_codes)})
+        for name in measures:
+            sums, counts = reduced[name]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result[name] = np.where(counts[slots] > 0, sums[slots] / counts[slots], np.nan)
+        return result
+
+    def totals(self, measures, cell_mask):
+        """Sums over the selected cells, cast back to integers for integer columns."""
+        out = {}
+        for name in measures:
+            value = self.sums[name][cell_mask].sum()
+            out[name] = int(round(value)) if self.measure_kinds[name] in 'iu' else float(value)
+        return out
+
+    def means(self, measures, cell_mask):
+        """Means over the selected cells, skipping missing values like ``Series.mean``."""
+        out = {}
+        for name in measures:
+            count = self.counts[name][cell_mask].sum()
+            out[name] = self.sums[name][cell_mask].sum() / count if count else np.nan
+        return out
+
+    def corr(self, columns, cell_mask):
+        """Equivalent of ``data[columns].corr()`` from the per-cell moments, or None."""
+        if self.moments is None:
+            return None
+        return self.moments.pearson(columns, cell_mask)
+
+    def value_counts(self, dim_name, cell_mask):
+        """Equivalent of ``data[dim_name].value_counts()`` (row counts per label)."""
+        dims, _, _, rows = self.reduce([dim_name], [], cell_mask)
+        counts = rows.astype(np.int64)
+        labels = dims[0].to_column(np.arange(dims[0].size))
+        series = pd.Series(counts, index=pd.CategoricalIndex(labels) if dims[0].categorical else labels,
+                           name='count')
+        series.index.name = dim_name
+        return series.sort_values(ascending=False, kind='stable')
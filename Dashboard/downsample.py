@@ -0,0 +1,157 @@
+"""Server-side point reduction for the large scatter and 3D plots.
+
+Below the point budget every row is plotted. Above it the rows are either
+sampled proportionally per ``season_name``/``weather_condition`` stratum, or
+(far above it) aggregated into a 2D/3D grid of density bins, so the
+browser receives at most roughly ``budget`` markers. The returned note is
+meant to be shown on the chart so readers know the data was reduced.
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_POINT_BUDGET = 3000
+DEFAULT_STRATA = ['season_name', 'weather_condition']
+
+MODE_AUTO = 'Auto'
+MODE_SAMPLE = 'Stratified sample'
+MODE_BINS = 'Density bins'
+MODE_ALL = 'All points'
+MODES = [MODE_AUTO, MODE_SAMPLE, MODE_BINS, MODE_ALL]
+
+# Dalam mode Auto, sampling dipakai sampai jumlah baris melebihi budget x faktor ini
+AUTO_BIN_FACTOR = 20
+
+# Kunci acak semu per baris: hash perkalian (Knuth) dari instant, dihitung sama persis di pandas dan DuckDB
+SAMPLE_HASH_MULTIPLIER = 2654435761
+SAMPLE_HASH_MODULUS = 2 ** 32
+
+# data: rows to plot; note: text for the chart (None when nothing was reduced);
+# aggregated: True when each row is a bin rather than an observation
+Downsampled = namedtuple('Downsampled', ['data', 'note', 'aggregated'])
+
+
+def sample_keys(data, seed=0):
+    """Pseudo-random sort key of every row, from ``instant`` (row position when absent)."""
+    ids = data['instant'].to_numpy(dtype=np.int64) if 'instant' in data else np.arange(len(data), dtype=np.int64)
+    return (ids + seed) * SAMPLE_HASH_MULTIPLIER % SAMPLE_HASH_MODULUS
+
+
+def sample_key_sql(seed=0):
+    """``sample_keys`` as a DuckDB expression."""
+    return f"((CAST(instant AS BIGINT) + {int(seed)}) * {SAMPLE_HASH_MULTIPLIER}) % {SAMPLE_HASH_MODULUS}"
+
+
+def stratified_sample(data, budget, strata=DEFAULT_STRATA, seed=0):
+    """Proportional sample of about ``budget`` rows, keeping every stratum.
+
+    Each stratum keeps its rows with the smallest ``sample_keys``, so reruns
+    with the same filters plot the same points and DuckDB can take the same
+    sample in SQL.
+    """
+    if len(data) <= budget:
+        return data
+    keys = sample_keys(data, seed)
+    strata = [column for column in strata if column in data]
+    if not strata:
+        return data.iloc[np.sort(np.argsort(keys, kind='stable')[:budget])]
+
+    group = data.groupby(strata, observed=True, sort=False).ngroup().to_numpy()
+    sizes = np.bincount(group)
+    # Kuota proporsional, minimal satu titik per strata yang tidak kosong
+    quotas = np.maximum(1, np.floor(sizes * budget / len(data))).astype(np.int64)
+
+    order = np.lexsort((keys, group))
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    rank = np.empty(len(data), dtype=np.int64)
+    rank[order] = np.arange(len(data)) - starts[group[order]]
+    return data[rank < quotas[group]]
+
+
+def density_grid(budget, n_groups, n_axes):
+    """Bins per axis so that ``n_groups`` grids hold about ``budget`` bins in total."""
+    return max(2, int((budget / max(n_groups, 1)) ** (1.0 / n_axes)))
+
+
+def bin_codes(values, low, high, bins):
+    """Bin of each of ``values`` among ``bins`` equal bins over ``[low, high]``."""
+    span = high - low if high > low else 1.0
+    return np.clip(np.floor((values - low) / span * bins).astype(np.int64), 0, bins - 1)
+
+
+def bin_centers(codes, low, high, bins):
+    """Centre of bins ``codes`` of ``bin_codes`` (``low`` when the axis holds a single value)."""
+    return low + (np.asarray(codes, dtype=np.float64) + 0.5) * (high - low) / bins
+
+
+def density_bins(data, axes, budget, color=None, value_columns=()):
+    """2D/3D histogram of the rows in about ``budget`` bins in total, split over the colour groups.
+
+    Each axis is cut into equal bins between its minimum and maximum and each
+    non-empty bin becomes one row at the centre of its cell: ``points`` holds
+    the number of rows in it and the other ``value_columns`` are averaged.
+    Rows without a value on one of the axes are left out.
+    """
+    columns = [column for column in dict.fromkeys(value_columns) if column not in axes]
+    # Hanya kolom yang dipakai disalin; baris tanpa nilai sumbu (NaN) tidak punya bin
+    data = data[list(dict.fromkeys(list(axes) + columns + ([color] if color is not None else [])))]
+    data = data[data.drop(columns=columns).notna().all(axis=1).to_numpy()]
+    n_groups = data[color].nunique() if color is not None else 1
+    bins_per_axis = density_grid(budget, n_groups, len(axes))
+    keys, bounds = [], []
+    if color is not None:
+        keys.append(data[color])
+    for position, axis in enumerate(axes):
+        values = data[axis].to_numpy(dtype=np.float64)
+        low, high = (values.min(), values.max()) if len(values) else (0.0, 0.0)
+        bounds.append((low, high))
+        keys.append(pd.Series(bin_codes(values, low, high, bins_per_axis), index=data.index, name=f'_bin{position}'))
+
+    grouped = data[columns].groupby(keys, observed=True, sort=False)
+    binned = grouped.mean() if columns else pd.DataFrame(index=grouped.size().index)
+    binned['points'] = grouped.size()
+    binned = binned.reset_index()
+    for position, (axis, (low, high)) in enumerate(zip(axes, bounds)):
+        binned[axis] = bin_centers(binned.pop(f'_bin{position}'), low, high, bins_per_axis)
+    return binned
+
+
+def choose_reduction(n_rows, budget=DEFAULT_POINT_BUDGET, mode=MODE_AUTO):
+    """``MODE_ALL``, ``MODE_BINS`` or ``MODE_SAMPLE``: the reduction ``reduce_points`` applies to ``n_rows`` rows."""
+    if mode == MODE_ALL or n_rows <= budget:
+        return MODE_ALL
+    if mode == MODE_BINS or (mode == MODE_AUTO and n_rows > budget * AUTO_BIN_FACTOR):
+        return MODE_BINS
+    return MODE_SAMPLE
+
+
+def bins_note(n_rows, n_bins):
+    return f"Aggregated: {n_rows:,} points in {n_bins:,} density bins (marker size = points in the bin)"
+
+
+def sample_note(n_sample, n_rows):
+    return f"Sampled: {n_sample:,} of {n_rows:,} points, stratified by season and weather"
+
+
+def reduce_points(data, axes, budget=DEFAULT_POINT_BUDGET, mode=MODE_AUTO, color=None,
+                  value_columns=(), strata=DEFAULT_STRATA):
+    """Pick and apply the reduction for one scatter plot."""
+    n_rows = len(data)
+    reduction = choose_reduction(n_rows, budget, mode)
+    if reduction == MODE_ALL:
+        return Downsampled(data, None, False)
+    if reduction == MODE_BINS:
+        binned = density_bins(data, axes, budget, color=color, value_columns=value_columns)
+        return Downsampled(binned, bins_note(int(binned['points'].sum()), len(binned)), True)
+    sample = stratified_sample(data, budget, strata=strata)
+    return Downsampled(sample, sample_note(len(sample), n_rows), False)
+
+
+def annotate_reduction(fig, note):
+    """Put the reduction note in the top-right corner of ``fig``."""
+    if note:
+        fig.add_annotation(text=note, xref='paper', yref='paper', x=1, y=1.06,
+                           xanchor='right', yanchor='bottom', showarrow=False,
+                           font=dict(size=11, color='gray'))
+    return fig
@@ -0,0 +1,137 @@
+"""Derived columns of the hourly data, declared once.
+
+Every label column is an index into a label table, every bin column is a
+``searchsorted`` against its edges, and ``time_category`` is a 24-entry
+lookup by hour, so deriving the features costs a handful of array
+operations regardless of the number of rows. Label and bin columns are
+emitted as categoricals with the shared dtypes below: reloads and ingested
+batches always agree on their categories and codes.
+
+Bins are ordered categoricals (every bin is listed in grouped results, even
+when empty); labels are unordered and only the observed ones are listed.
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+WEEKDAY_LABELS = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+MONTH_LABELS = ['January', 'February', 'March', 'April', 'May', 'June',
+                'July', 'August', 'September', 'October', 'November', 'December']
+TIME_CATEGORY_LABELS = ['Morning Peak', 'Day Time', 'Evening Peak', 'Night Time']
+
+# Kode time_category untuk jam 0-23: 6-9 pagi sibuk, 10-15 siang, 16-19 sore sibuk, sisanya malam
+HOUR_TIME_CATEGORY = np.array([3] * 6 + [0] * 4 + [1] * 6 + [2] * 4 + [3] * 4, dtype=np.int8)
+
+# name: output column; source: input column; labels: label table; codes: code of
+# each source value starting at ``offset`` (None = the value minus offset itself)
+LabelFeature = namedtuple('LabelFeature', ['name', 'source', 'labels', 'offset', 'codes'])
+# Right-closed bins like pd.cut: edges[i] < value <= edges[i + 1] falls in labels[i]
+BinFeature = namedtuple('BinFeature', ['name', 'source', 'edges', 'labels'])
+ScaledFeature = namedtuple('ScaledFeature', ['name', 'source', 'factor'])
+
+LABEL_FEATURES = [
+    LabelFeature('season_name', 'season', ['Winter', 'Spring', 'Summer', 'Fall'], 1, None),
+    LabelFeature('weather_condition', 'weathersit',
+                 ['Clear', 'Mist/Cloudy', 'Light Rain/Snow', 'Heavy Rain/Snow'], 1, None),
+    LabelFeature('workingday_label', 'workingday', ['Non-Working Day', 'Working Day'], 0, None),
+    LabelFeature('weekday_name', 'weekday', WEEKDAY_LABELS, 0, None),
+    LabelFeature('month_name', 'mnth', MONTH_LABELS, 1, None),
+]
+
+# Satuan asli: suhu °C, kelembapan %, kecepatan angin km/h
+SCALED_FEATURES = [
+    ScaledFeature('temp_actual', 'temp', 41),
+    ScaledFeature('atemp_actual', 'atemp', 50),
+    ScaledFeature('hum_actual', 'hum', 100),
+    ScaledFeature('windspeed_actual', 'windspeed', 67),
+]
+
+BIN_FEATURES = [
+    BinFeature('temp_category', 'temp_actual', [-20, 0, 10, 20, 30, 50],
+               ['Very Cold (< 0°C)', 'Cold (0-10°C)', 'Mild (10-20°C)', 'Warm (20-30°C)', 'Hot (> 30°C)']),
+    BinFeature('hum_category', 'hum_actual', [0, 30, 60, 80, 100],
+               ['Low (< 30%)', 'Medium (30-60%)', 'High (60-80%)', 'Very High (> 80%)']),
+    BinFeature('windspeed_category', 'windspeed_actual', [0, 10, 20, 30, 70],
+               ['Low (< 10 km/h)', 'Medium (10-20 km/h)', 'High (20-30 km/h)', 'Very High (> 30 km/h)']),
+]
+COMFORT_FEATURE = BinFeature('comfort_category', 'comfort_index', [0, 0.3, 0.5, 0.7, 1],
+                             ['Uncomfortable', 'Moderately Comfortable', 'Comfortable', 'Very Comfortable'])
+
+TIME_CATEGORY_FEATURE = LabelFeature('time_category', 'hr', TIME_CATEGORY_LABELS, 0, HOUR_TIME_CATEGORY)
+
+USER_TYPE_LABELS = ['Casual Dominant', 'Registered Dominant']
+
+
+def label_dtype(feature):
+    return pd.CategoricalDtype(feature.labels, ordered=False)
+
+
+def bin_dtype(feature):
+    return pd.CategoricalDtype(feature.labels, ordered=True)
+
+
+def categorical_dtypes():
+    """Dtype of every label and bin column ``derive_features`` emits, by column name."""
+    dtypes = {feature.name: label_dtype(feature) for feature in LABEL_FEATURES + [TIME_CATEGORY_FEATURE]}
+    dtypes.update({feature.name: bin_dtype(feature) for feature in BIN_FEATURES + [COMFORT_FEATURE]})
+    dtypes['user_type'] = pd.CategoricalDtype(USER_TYPE_LABELS, ordered=False)
+    return dtypes
+
+
+def _label_codes(values, feature):
+    """Code of every value in the label table, ``-1`` for missing or unknown values."""
+    values = np.asarray(values, dtype=np.float64) - feature.offset
+    table = np.arange(len(feature.labels)) if feature.codes is None else feature.codes
+    valid = np.isfinite(values) & (values >= 0) & (values < len(table)) & (values == np.floor(values))
+    return np.where(valid, table[np.where(valid, values, 0).astype(np.int64)], -1)
+
+
+def _bin_codes(values, feature):
+    values = np.asarray(values, dtype=np.float64)
+    edges = np.asarray(feature.edges, dtype=np.float64)
+    codes = np.searchsorted(edges, values, side='left') - 1
+    # Di luar (edges[0], edges[-1]] atau NaN: tidak masuk bin mana pun
+    valid = (values > edges[0]) & (values <= edges[-1])
+    return np.where(valid, codes, -1)
+
+
+def label_column(values, feature):
+    return pd.Categorical.from_codes(_label_codes(values, feature), dtype=label_dtype(feature))
+
+
+def bin_column(values, feature):
+    return pd.Categorical.from_codes(_bin_codes(values, feature), dtype=bin_dtype(feature))
+
+
+def comfort_index(temp, hum, windspeed):
+    """Comfort index from the normalized temperature, humidity and wind speed (higher is more comfortable)."""
+    return (temp * 0.5) + ((1 - hum) * 0.3) + ((1 - windspeed) * 0.2)
+
+
+def derive_features(main_data):
+    """Add every derived column to ``main_data`` (in place) and return it.
+
+    ``main_data`` needs the raw columns of ``data/data_2.csv``. Columns that
+    would only duplicate a raw column (year, month name variants, ...) are
+    not derived; see ``schema.REDUNDANT_COLUMNS``.
+    """
+    for feature in LABEL_FEATURES:
+        main_data[feature.name] = label_column(main_data[feature.source], feature)
+    for feature in SCALED_FEATURES:
+        main_data[feature.name] = main_data[feature.source] * feature.factor
+    for feature in BIN_FEATURES:
+        main_data[feature.name] = bin_column(main_data[feature.source], feature)
+    main_data[TIME_CATEGORY_FEATURE.name] = label_column(main_data['hr'], TIME_CATEGORY_FEATURE)
+
+    main_data['comfort_index'] = comfort_index(main_data['temp'], main_data['hum'], main_data['windspeed'])
+    main_data[COMFORT_FEATURE.name] = bin_column(main_data['comfort_index'], COMFORT_FEATURE)
+
+    # Rasio tipe pengguna dihitung sekali saat load, bukan ditulis ke frame hasil filter saat render
+    main_data['casual_ratio'] = main_data['casual'] / main_data['cnt']
+    main_data['registered_ratio'] = main_data['registered'] / main_data['cnt']
+
+    registered_dominant = ~(main_data['casual'].to_numpy() > main_data['registered'].to_numpy())
+    main_data['user_type'] = pd.Categorical.from_codes(registered_dominant.astype(np.int8),
+                                                       categories=USER_TYPE_LABELS)
+    return main_data
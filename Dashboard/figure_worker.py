@@ -0,0 +1,45 @@
+"""Entry point of the figure worker processes (``figures.FigurePool``).
+
+A worker is started as ``python figure_worker.py`` with pipes on stdin and
+stdout. It first reads the Plotly template of the dashboard, then answers
+each pickled ``FigureSpec`` with ``(True, figure dict)`` or ``(False,
+error message)``, one at a time, until stdin is closed.
+
+The workers are plain subprocesses rather than ``multiprocessing`` children:
+``spawn`` re-imports the parent's ``__main__``, which under Streamlit is the
+dashboard script itself.
+"""
+import pickle
+import sys
+
+import plotly.io as pio
+
+
+def serve(requests, replies):
+    template_name, template = pickle.load(requests)
+    # Templat bawaan proses induk (Streamlit memasang templat "streamlit" saat diimpor) dipakai juga di worker
+    pio.templates[template_name] = template
+    pio.templates.default = template_name
+
+    from figures import FigureSpec
+
+    # Impor plotly.express dan templatnya sekali per worker, bukan pada grafik pertama
+    FigureSpec('bar', x=[0], y=[0]).build()
+    while True:
+        try:
+            spec = pickle.load(requests)
+        except EOFError:
+            return
+        try:
+            reply = (True, spec.build().to_dict())
+        except Exception as error:
+            reply = (False, f"{type(error).__name__}: {error}")
+        pickle.dump(reply, replies, protocol=pickle.HIGHEST_PROTOCOL)
+        replies.flush()
+
+
+if __name__ == '__main__':
+    requests, replies = sys.stdin.buffer, sys.stdout.buffer
+    # Keluaran teks apa pun dari plotly tidak boleh merusak aliran pickle
+    sys.stdout = sys.stderr
+    serve(requests, replies)
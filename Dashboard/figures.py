@@ -0,0 +1,246 @@
+"""Plotly figures built in worker processes, emitted by the script in order.
+
+Building a Plotly Express figure is pure Python and takes tens of
+milliseconds, more than the cube aggregates behind it, so a rerun that
+renders many tabs spends most of its time in ``px.*`` calls that only need
+small aggregate frames. Threads would not help (the GIL), but the calls are
+independent of each other:
+
+- ``express`` mirrors ``plotly.express``; its functions return a
+  ``FigureSpec`` (the ``px`` function name, its data and keyword arguments,
+  plus later ``update_layout`` / ``add_annotation`` calls) instead of a
+  figure. A spec is plain picklable data.
+- ``ChartQueue.submit`` reserves an ``st.empty`` placeholder where the chart
+  belongs and sends the spec to a ``FigurePool``; ``flush`` fills the
+  placeholders in script order as the figures come back. Workers
+  (``figure_worker.py``) return the figure as a dict, which the script
+  wraps without validating it again. A spec that fails is reported in its
+  own placeholder; the other charts are still drawn.
+
+The pool is opt-in: ``DASHBOARD_FIGURE_WORKERS`` sets the number of worker
+processes. Unset, 0 or 1 builds every spec in the script thread right away,
+as before.
+
+Large scatter plots can be sent in a compact encoding (``compact_points``):
+WebGL traces from ``DASHBOARD_WEBGL_THRESHOLD`` points on (default 1000)
+and every numeric array as a float32 typed array, which Plotly ships as
+base64 instead of a JSON list of numbers.
+
+``plotly.express`` itself is only imported where a spec is built (in the
+workers, or in the script thread without a pool), so starting the
+dashboard does not pay for it.
+"""
+import functools
+import os
+import pickle
+import queue
+import subprocess
+import sys
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+FIGURE_WORKERS_ENV = 'DASHBOARD_FIGURE_WORKERS'
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'figure_worker.py')
+
+COMPACT_POINTS_ENV = 'DASHBOARD_COMPACT_POINTS'
+WEBGL_THRESHOLD_ENV = 'DASHBOARD_WEBGL_THRESHOLD'
+DEFAULT_WEBGL_THRESHOLD = 1000
+# Atribut trace titik yang berisi satu angka per titik
+POINT_ARRAYS = [('x',), ('y',), ('z',), ('customdata',), ('marker', 'size'), ('marker', 'color')]
+
+
+class FigureSpec:
+    """A ``plotly.express`` call plus the figure methods applied to its result."""
+
+    def __init__(self, kind, *args, **kwargs):
+        self.kind = kind
+        self.args = args
+        self.kwargs = kwargs
+        self.calls = []
+
+    def update_layout(self, *args, **kwargs):
+        self.calls.append(('update_layout', args, kwargs))
+        return self
+
+    def add_annotation(self, *args, **kwargs):
+        self.calls.append(('add_annotation', args, kwargs))
+        return self
+
+    def pipe(self, function, *args, **kwargs):
+        """Apply ``function(fig, *args, **kwargs)`` to the built figure; a module-level function keeps the spec picklable."""
+        self.calls.append((function, args, kwargs))
+        return self
+
+    def build(self):
+        import plotly.express as px
+
+        fig = getattr(px, self.kind)(*self.args, **self.kwargs)
+        for method, args, kwargs in self.calls:
+            if callable(method):
+                method(fig, *args, **kwargs)
+            else:
+                getattr(fig, method)(*args, **kwargs)
+        return fig
+
+
+class _Express:
+    """``plotly.express`` look-alike whose plotting functions return ``FigureSpec``s."""
+
+    def __getattr__(self, kind):
+        # Nama fungsi tidak dicek terhadap plotly.express agar modul itu tidak diimpor di sini; nama yang salah
+        # gagal saat spec dibangun
+        if kind.startswith('_'):
+            raise AttributeError(kind)
+        return functools.partial(FigureSpec, kind)
+
+
+express = _Express()
+
+
+def figure_workers():
+    """Worker processes from ``DASHBOARD_FIGURE_WORKERS`` (default 0: no pool)."""
+    value = os.environ.get(FIGURE_WORKERS_ENV, '').strip()
+    return max(int(value), 0) if value else 0
+
+
+def webgl_threshold():
+    """Points from which ``compact_points`` applies, from ``DASHBOARD_WEBGL_THRESHOLD``."""
+    value = os.environ.get(WEBGL_THRESHOLD_ENV, '').strip()
+    return max(int(value), 0) if value else DEFAULT_WEBGL_THRESHOLD
+
+
+def _float32(values):
+    array = np.asarray(values)
+    if array.dtype == object:
+        try:
+            array = array.astype(np.float64)
+        except (TypeError, ValueError):
+            return None
+    if array.dtype.kind != 'f' or array.dtype.itemsize <= 4:
+        return None
+    return array.astype(np.float32)
+
+
+def compact_arrays(fig):
+    """Send the per-point numbers of every trace as float32 typed arrays (base64 in the figure JSON)."""
+    for trace in fig.data:
+        for path in POINT_ARRAYS:
+            parent = trace
+            for name in path[:-1]:
+                parent = getattr(parent, name, None)
+            values = getattr(parent, path[-1], None) if parent is not None else None
+            if values is None or isinstance(values, (str, int, float)):
+                continue
+            compact = _float32(values)
+            if compact is not None:
+                # Plotly mengabaikan nilai yang sama dengan nilai lama, termasuk array yang hanya beda dtype
+                parent[path[-1]] = None
+                parent[path[-1]] = compact
+    return fig
+
+
+def compact_points(fig):
+    """``compact_arrays`` for a figure or, applied when it is built, for a ``FigureSpec``."""
+    if isinstance(fig, FigureSpec):
+        return fig.pipe(compact_arrays)
+    return compact_arrays(fig)
+
+
+class FigurePool:
+    """``workers`` processes running ``figure_worker.py``, each fed one spec at a time by its own thread."""
+
+    def __init__(self, workers):
+        self.workers = workers
+        template_name = pio.templates.default
+        self._template = (template_name, pio.templates[template_name])
+        self._jobs = queue.SimpleQueue()
+        for index in range(workers):
+            threading.Thread(target=self._serve, name=f"figure-worker-{index}", daemon=True).start()
+
+    def submit(self, spec):
+        """Future of the figure dict of ``spec``."""
+        future = Future()
+        self._jobs.put((future, spec))
+        return future
+
+    def _start_worker(self):
+        worker = subprocess.Popen([sys.executable, WORKER_SCRIPT], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        pickle.dump(self._template, worker.stdin, protocol=pickle.HIGHEST_PROTOCOL)
+        worker.stdin.flush()
+        return worker
+
+    def _serve(self):
+        # Worker dimulai sekarang, bukan saat grafik pertama menunggu; bila gagal, dicoba lagi pada spec pertama
+        try:
+            worker = self._start_worker()
+        except OSError:
+            worker = None
+        while True:
+            future, spec = self._jobs.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if worker is None or worker.poll() is not None:
+                    worker = self._start_worker()
+                pickle.dump(spec, worker.stdin, protocol=pickle.HIGHEST_PROTOCOL)
+                worker.stdin.flush()
+                built, result = pickle.load(worker.stdout)
+            except (OSError, EOFError, pickle.PickleError, AttributeError, TypeError) as error:
+                # Spec tidak bisa di-pickle atau worker mati di tengah jalan: aliran pipe tidak bisa dipakai lagi,
+                # worker baru dimulai untuk spec berikutnya
+                if worker is not None:
+                    worker.kill()
+                    worker.wait()
+                    worker = None
+                future.set_exception(RuntimeError(f"figure worker failed: {error}"))
+                continue
+            if built:
+                future.set_result(result)
+            else:
+                future.set_exception(RuntimeError(result))
+
+
+def figure_pool(workers=None):
+    """Pool of figure workers, or None when figures should be built in the script thread."""
+    workers = figure_workers() if workers is None else workers
+    if workers <= 1:
+        return None
+    return FigurePool(workers)
+
+
+def figure_from_dict(figure):
+    # Dict berasal dari figure yang sudah tervalidasi di worker; validasi ulang memakan waktu sebesar membangunnya
+    return go.Figure(figure, _validate=False)
+
+
+class ChartQueue:
+    """Figure specs of one rerun, built by ``pool`` and emitted in submission order."""
+
+    def __init__(self, pool=None):
+        self.pool = pool
+        self._pending = []
+
+    @property
+    def parallel(self):
+        return self.pool is not None
+
+    def submit(self, spec, placeholder, tag=None):
+        """Build ``spec`` in the pool; ``flush`` draws it into ``placeholder``."""
+        self._pending.append((self.pool.submit(spec), placeholder, tag))
+
+    def flush(self, emit, fail):
+        """Call ``emit(placeholder, fig, tag)`` for every pending spec in submission order, or
+        ``fail(placeholder, error, tag)`` for a spec that could not be built."""
+        pending, self._pending = self._pending, []
+        for future, placeholder, tag in pending:
+            try:
+                figure = future.result()
+            except Exception as error:
+                fail(placeholder, error, tag)
+                continue
+            emit(placeholder, figure_from_dict(figure), tag)
+        return len(pending)
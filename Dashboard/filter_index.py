@@ -0,0 +1,217 @@
+"""Precomputed index for the sidebar filters.
+
+``FilterIndex`` is built once per loaded frame. It keeps a packed bitset per
+value of every categorical filter and a sorted copy of the range-filtered
+columns, so any combination of sidebar selections resolves to a single array
+of row positions without materializing intermediate DataFrames.
+
+Appended rows are folded in with ``FilterIndex.extended``, which returns a
+new index instead of rebuilding one over the whole frame.
+"""
+import uuid
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+ALL_SEASONS = 'All Seasons'
+ALL_WEATHER = 'All Weather Conditions'
+ALL_DAYS = 'All Days'
+ALL_TEMPS = 'All Temperature Ranges'
+ALL_USERS = 'All Users'
+
+DAY_TYPE_OPTIONS = [ALL_DAYS, 'Working Day', 'Non-Working Day', 'Weekday', 'Weekend', 'Holiday']
+USER_TYPE_OPTIONS = [ALL_USERS, 'Casual Dominant', 'Registered Dominant', 'Balanced']
+
+# Batas selisih casual/registered (10% dari cnt) untuk tipe pengguna 'Balanced'
+BALANCED_RATIO_THRESHOLD = 0.1
+
+# Normalized sidebar selection. date_start/date_end are ``datetime.date`` or
+# None (no date filter), the temp bounds are in °C and inclusive.
+FilterState = namedtuple('FilterState', [
+    'date_start', 'date_end', 'season', 'weather', 'day_type',
+    'temp_category', 'temp_min', 'temp_max', 'user_type',
+])
+
+
+def _bitset(mask):
+    return np.packbits(np.asarray(mask, dtype=bool))
+
+
+def _value_bitsets(column):
+    codes, uniques = pd.factorize(column)
+    return {str(value): _bitset(codes == code) for code, value in enumerate(uniques)}
+
+
+def _concat_bitsets(left, n_left, right, n_right):
+    """Bitsets of ``left`` rows followed by ``right`` rows, per key of either side."""
+    merged = {}
+    for key in list(left) + [key for key in right if key not in left]:
+        parts = []
+        for bitsets, n_rows in ((left, n_left), (right, n_right)):
+            bits = bitsets.get(key)
+            parts.append(np.zeros(n_rows, dtype=np.uint8) if bits is None else np.unpackbits(bits, count=n_rows))
+        merged[key] = np.packbits(np.concatenate(parts))
+    return merged
+
+
+class _SortedColumn:
+    """Sorted view of one column for inclusive range lookups."""
+
+    def __init__(self, values):
+        values = np.asarray(values)
+        if values.size and np.all(values[1:] >= values[:-1]):
+            # Data per jam biasanya sudah urut tanggal, jadi rentang cukup berupa slice
+            self.order = None
+            self.sorted_values = values
+        else:
+            self.order = np.argsort(values, kind='stable')
+            self.sorted_values = values[self.order]
+
+    def extended(self, new_values):
+        """Sorted column of the existing rows followed by ``new_values``."""
+        new = _SortedColumn(new_values)
+        n_old = self.sorted_values.size
+        merged = _SortedColumn.__new__(_SortedColumn)
+        if self.order is None and new.order is None and (
+                n_old == 0 or not new.sorted_values.size or new.sorted_values[0] >= self.sorted_values[-1]):
+            # Baris baru yang datang urut tanggal cukup disambung di belakang
+            merged.order = None
+            merged.sorted_values = np.concatenate([self.sorted_values, new.sorted_values])
+            return merged
+        old_order = np.arange(n_old) if self.order is None else self.order
+        new_order = np.arange(new.sorted_values.size) if new.order is None else new.order
+        # side='right' menaruh nilai kembar baru setelah yang lama, sama seperti argsort stabil
+        insert_at = np.searchsorted(self.sorted_values, new.sorted_values, side='right')
+        merged.sorted_values = np.insert(self.sorted_values, insert_at, new.sorted_values)
+        merged.order = np.insert(old_order, insert_at, new_order + n_old)
+        return merged
+
+    def range_bitset(self, low, high):
+        """Bitset of rows with ``low <= value <= high``, or None if that is every row."""
+        n_rows = self.sorted_values.size
+        start = np.searchsorted(self.sorted_values, low, side='left')
+        stop = np.searchsorted(self.sorted_values, high, side='right')
+        if start == 0 and stop == n_rows:
+            return None
+        mask = np.zeros(n_rows, dtype=bool)
+        if self.order is None:
+            mask[start:stop] = True
+        else:
+            mask[self.order[start:stop]] = True
+        return _bitset(mask)
+
+
+class FilterIndex:
+    BITSET_GROUPS = ('season', 'weather', 'temp_category', 'day_type', 'user_type')
+
+    def __init__(self, main_data, version=None):
+        self.n_rows = len(main_data)
+        # Penanda data yang diindeks, dipakai sebagai bagian kunci cache agregat. Versi tetap (mis. dari
+        # preprocess.source_version) membuat kunci yang sama di setiap proses untuk data yang sama
+        self.version = version or uuid.uuid4().hex
+
+        self.season = _value_bitsets(main_data['season_name'])
+        self.weather = _value_bitsets(main_data['weather_condition'])
+        self.temp_category = _value_bitsets(main_data['temp_category'])
+
+        workingday = main_data['workingday'].to_numpy()
+        weekday = main_data['weekday'].to_numpy()
+        holiday = main_data['holiday'].to_numpy()
+        self.day_type = {
+            'Working Day': _bitset(workingday == 1),
+            'Non-Working Day': _bitset(workingday == 0),
+            'Weekday': _bitset((weekday >= 1) & (weekday <= 5)),
+            'Weekend': _bitset((weekday == 0) | (weekday == 6)),
+            'Holiday': _bitset(holiday == 1),
+        }
+
+        casual = main_data['casual'].to_numpy()
+        registered = main_data['registered'].to_numpy()
+        cnt = main_data['cnt'].to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            balanced = np.abs(casual - registered) / cnt < BALANCED_RATIO_THRESHOLD
+        self.user_type = {
+            'Casual Dominant': _bitset(casual > registered),
+            'Registered Dominant': _bitset(registered > casual),
+            'Balanced': _bitset(balanced),
+        }
+
+        self.dteday = _SortedColumn(main_data['dteday'].to_numpy().astype('datetime64[D]'))
+        self.temp_actual = _SortedColumn(main_data['temp_actual'].to_numpy())
+
+    def extended(self, new_rows):
+        """New index over the existing rows followed by ``new_rows``; ``self`` is left untouched."""
+        other = FilterIndex(new_rows)
+        merged = FilterIndex.__new__(FilterIndex)
+        merged.n_rows = self.n_rows + other.n_rows
+        merged.version = other.version
+        for group in self.BITSET_GROUPS:
+            setattr(merged, group, _concat_bitsets(getattr(self, group), self.n_rows,
+                                                   getattr(other, group), other.n_rows))
+        merged.dteday = self.dteday.extended(new_rows['dteday'].to_numpy().astype('datetime64[D]'))
+        merged.temp_actual = self.temp_actual.extended(new_rows['temp_actual'].to_numpy())
+        return merged
+
+    def _empty(self):
+        return np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+
+    def _lookup(self, bitsets, key):
+        bits = bitsets.get(key)
+        return self._empty() if bits is None else bits
+
+    def bitsets(self, state):
+        """Bitsets of every active filter in ``state``."""
+        active = []
+        if state.date_start is not None and state.date_end is not None:
+            bits = self.dteday.range_bitset(np.datetime64(state.date_start, 'D'),
+                                            np.datetime64(state.date_end, 'D'))
+            if bits is not None:
+                active.append(bits)
+        if state.season != ALL_SEASONS:
+            active.append(self._lookup(self.season, state.season))
+        if state.weather != ALL_WEATHER:
+            active.append(self._lookup(self.weather, state.weather))
+        if state.day_type != ALL_DAYS:
+            active.append(self._lookup(self.day_type, state.day_type))
+        if state.temp_category != ALL_TEMPS:
+            active.append(self._lookup(self.temp_category, state.temp_category))
+        bits = self.temp_actual.range_bitset(state.temp_min, state.temp_max)
+        if bits is not None:
+            active.append(bits)
+        if state.user_type != ALL_USERS:
+            active.append(self._lookup(self.user_type, state.user_type))
+        return active
+
+    def _combine(self, active):
+        if not active:
+            return np.ones(self.n_rows, dtype=bool)
+        combined = active[0].copy()
+        for bits in active[1:]:
+            np.bitwise_and(combined, bits, out=combined)
+        return np.unpackbits(combined, count=self.n_rows).astype(bool)
+
+    def mask(self, state):
+        """Boolean row mask for ``state``."""
+        return self._combine(self.bitsets(state))
+
+    def resolve(self, state):
+        """Row positions (ascending) matching every filter in ``state``."""
+        return np.flatnonzero(self.mask(state))
+
+    def select(self, main_data, state):
+        """Rows of ``main_data`` matching ``state`` without copying when possible.
+
+        No active filter returns ``main_data`` itself and a contiguous run of
+        rows (e.g. a date range on date-sorted data) returns an ``iloc`` slice;
+        only scattered rows are gathered into a new frame.
+        """
+        active = self.bitsets(state)
+        if not active:
+            return main_data
+        rows = np.flatnonzero(self._combine(active))
+        if len(rows) == self.n_rows:
+            return main_data
+        if len(rows) and rows[-1] - rows[0] + 1 == len(rows):
+            return main_data.iloc[rows[0]:rows[-1] + 1]
+        return main_data.take(rows)
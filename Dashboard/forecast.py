@@ -0,0 +1,253 @@
+"""Hourly demand forecasts of casual and registered rentals.
+
+``ForecastModel.fit`` regresses ``log1p(casual)`` and ``log1p(registered)``
+on the features of ``data/data_2.csv`` in one training window: an hour
+profile per day type (hour × workingday), weekday, weather, temperature
+(and its square), humidity and wind speed, plus a step per calendar year
+for the growth between years. This is the demand regression of
+``synthetic.py`` (``demand_design``) without its season columns: within a
+window, season is confounded with temperature, and a window that misses a
+season cannot place it, so backtests were better without it. Both targets
+are solved in a single least-squares call on one design matrix, and
+predictions are taken back from the log scale with Duan's smearing factor,
+so the expected counts are not biased low.
+
+``predict`` scores any number of rows in one matrix product: hours of past
+days with their recorded weather (``backtest``), or future hours crossed
+with weather scenarios. ``calendar_rows`` builds the calendar columns of
+future hours (season, holidays, weekday, workingday) and
+``scenario_grid`` crosses them with a table of scenarios. The log-scale
+level is a calendar part plus a weather part (``calendar_level``,
+``weather_level``), which ``scenarios.py`` combines without building rows.
+
+Fitting takes milliseconds on the bundled data; the dashboard caches one
+model per data version and training window in the ``AggregateCache``.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+FEATURES = ['hr', 'weekday', 'workingday', 'season', 'weathersit', 'temp', 'hum', 'windspeed']
+TARGETS = ['casual', 'registered']
+# Kolom baris yang dibutuhkan predict: fitur plus tanggal untuk tahun (season hanya dipakai synthetic.py)
+ROW_COLUMNS = ['dteday'] + FEATURES
+# Kolom untuk melatih model dan membandingkan forecast dengan data
+TRAINING_COLUMNS = ROW_COLUMNS + TARGETS + ['cnt']
+
+N_WEATHER = 4
+N_SEASONS = 4
+# Blok kolom desain: 48 profil jam (jam x hari kerja, pengganti intersep), lalu one-hot tanpa kategori pertama
+WEEKDAY_OFFSET = 48
+WEATHER_OFFSET = WEEKDAY_OFFSET + 6
+SEASON_OFFSET = WEATHER_OFFSET + N_WEATHER - 1
+# temp, temp kuadrat, hum, windspeed
+N_NUMERIC = 4
+
+# Awal musim (bulan * 100 + tanggal) seperti pada data: Spring, Summer, Fall; Winter mulai 21 Desember
+SEASON_STARTS = [321, 621, 923]
+WINTER_START = 1221
+
+
+def design_width(season=True, extra_columns=0):
+    return SEASON_OFFSET + (N_SEASONS - 1 if season else 0) + N_NUMERIC + extra_columns
+
+
+# Desain model forecast: tanpa musim, plus satu kolom tahun
+MODEL_WIDTH = design_width(season=False, extra_columns=1)
+
+
+def demand_design(hr, workingday, weekday, weathersit, season, temp, hum, windspeed, extra_columns=0):
+    """Design matrix of the demand regression, one row per hour.
+
+    With ``season=None`` the season columns are left out; ``extra_columns``
+    zero columns are appended at the end for the caller to fill.
+    """
+    hr = np.asarray(hr, dtype=np.intp)
+    design = np.zeros((len(hr), design_width(season is not None, extra_columns)))
+    rows = np.arange(len(hr))
+    design[rows, hr + 24 * np.asarray(workingday, dtype=np.intp)] = 1.0
+    blocks = [(weekday, 0, 7), (weathersit, 1, N_WEATHER)]
+    if season is not None:
+        blocks.append((season, 1, N_SEASONS))
+    offset = WEEKDAY_OFFSET
+    for values, first, size in blocks:
+        codes = np.asarray(values, dtype=np.intp) - first
+        # Kategori pertama adalah acuan dan tidak punya kolom
+        present = codes > 0
+        design[rows[present], offset + codes[present] - 1] = 1.0
+        offset += size - 1
+    temp = np.asarray(temp, dtype=np.float64)
+    design[:, offset] = temp
+    design[:, offset + 1] = temp ** 2
+    design[:, offset + 2] = hum
+    design[:, offset + 3] = windspeed
+    return design
+
+
+def season_of(dates):
+    """Season code (1 = Winter ... 4 = Fall) of each date, with the boundaries of the data."""
+    dates = pd.DatetimeIndex(dates)
+    month_day = dates.month.to_numpy() * 100 + dates.day.to_numpy()
+    season = 1 + np.searchsorted(SEASON_STARTS, month_day, side='right')
+    season[month_day >= WINTER_START] = 1
+    return season.astype(np.int8)
+
+
+def calendar_rows(start, end):
+    """Calendar columns of every hour from ``start`` to ``end`` (inclusive dates), in time order."""
+    # Diimpor di sini: synthetic.py memakai demand_design dari modul ini
+    from synthetic import BikeHolidayCalendar
+
+    dates = pd.date_range(start, end, freq='D')
+    holiday = dates.isin(BikeHolidayCalendar().holidays(dates.min(), dates.max())).astype(np.int8)
+    weekday = ((dates.dayofweek.to_numpy() + 1) % 7).astype(np.int8)
+    workingday = ((weekday != 0) & (weekday != 6) & (holiday == 0)).astype(np.int8)
+    return pd.DataFrame({
+        'dteday': dates.repeat(24),
+        'hr': np.tile(np.arange(24, dtype=np.int8), len(dates)),
+        'season': season_of(dates).repeat(24),
+        'holiday': holiday.repeat(24),
+        'weekday': weekday.repeat(24),
+        'workingday': workingday.repeat(24),
+    })
+
+
+def scenario_grid(calendar, scenarios):
+    """Every calendar row crossed with every scenario (weather columns), scenario by scenario.
+
+    ``scenarios`` holds ``weathersit``, ``temp``, ``hum`` and ``windspeed`` on
+    the normalized scale of the data; its index becomes the ``scenario`` column.
+    """
+    hours, count = len(calendar), len(scenarios)
+    grid = {name: np.tile(calendar[name].to_numpy(), count) for name in calendar.columns}
+    grid['scenario'] = np.repeat(scenarios.index.to_numpy(), hours)
+    for name in scenarios.columns:
+        grid[name] = np.repeat(scenarios[name].to_numpy(), hours)
+    return pd.DataFrame(grid)
+
+
+class ForecastModel:
+    """Log-linear demand model of one training window; build it with ``ForecastModel.fit``."""
+
+    def __init__(self, coef, smearing, weather_levels, start, end, rows, residual_std, fit_seconds):
+        self.coef = coef
+        self.smearing = smearing
+        self.weather_levels = weather_levels
+        self.start = start
+        self.end = end
+        self.rows = rows
+        self.residual_std = residual_std
+        self.fit_seconds = fit_seconds
+
+    @classmethod
+    def fit(cls, frame, start=None, end=None):
+        """Fit to the rows of ``frame`` (``ROW_COLUMNS`` plus ``TARGETS``) dated from ``start`` to ``end``."""
+        started = time.perf_counter()
+        dteday = frame['dteday']
+        mask = np.ones(len(frame), dtype=bool)
+        if start is not None:
+            mask &= (dteday >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            mask &= (dteday <= pd.Timestamp(end)).to_numpy()
+        rows = frame[mask]
+        if len(rows) < MODEL_WIDTH + 1:
+            raise ValueError(f"{len(rows)} rows are too few to fit a forecast model")
+        model = cls(None, None, np.unique(rows['weathersit'].to_numpy()), rows['dteday'].min(),
+                    rows['dteday'].max(), len(rows), None, None)
+        design = model._design(rows)
+        target = np.log1p(rows[TARGETS].to_numpy(np.float64))
+        # Persamaan normal untuk kedua target sekaligus: X'X hanya MODEL_WIDTH x MODEL_WIDTH, jauh lebih murah
+        # daripada SVD atas semua baris. lstsq memberi solusi norma minimum yang sama bila ada kolom nol
+        # (mis. kolom tahun untuk jendela dalam satu tahun)
+        model.coef = np.linalg.lstsq(design.T @ design, design.T @ target, rcond=None)[0]
+        residuals = target - design @ model.coef
+        model.smearing = np.exp(residuals).mean(axis=0)
+        model.residual_std = residuals.std(axis=0)
+        model.fit_seconds = time.perf_counter() - started
+        return model
+
+    def fitted_weather(self, codes):
+        """Weather level whose effect each of ``codes`` gets: itself when the training window has it."""
+        # Cuaca yang tidak ada di jendela latih (mis. hujan lebat) memakai tingkat teringan berikutnya yang ada,
+        # bukan efek nol (sama dengan cerah)
+        position = np.searchsorted(self.weather_levels, np.asarray(codes), side='right') - 1
+        return self.weather_levels[np.clip(position, 0, len(self.weather_levels) - 1)]
+
+    def _weather(self, rows):
+        return self.fitted_weather(rows['weathersit'].to_numpy())
+
+    def _years(self, rows):
+        # Tahun relatif terhadap tahun terakhir jendela latih: 0 berarti level terakhir, dan kolom nol
+        # (jendela dalam satu tahun) tidak menambah pertumbuhan
+        return (rows['dteday'].dt.year - self.end.year).to_numpy(np.float64)
+
+    def _design(self, rows):
+        design = demand_design(rows['hr'].to_numpy(), rows['workingday'].to_numpy(), rows['weekday'].to_numpy(),
+                               self._weather(rows), None, rows['temp'].to_numpy(), rows['hum'].to_numpy(),
+                               rows['windspeed'].to_numpy(), extra_columns=1)
+        design[:, -1] = self._years(rows)
+        return design
+
+    def calendar_level(self, rows):
+        """Calendar part of the log-scale level of ``rows``: hour x workingday, weekday and year (n x 2)."""
+        coef = self.coef
+        hour = rows['hr'].to_numpy(np.intp) + 24 * rows['workingday'].to_numpy(np.intp)
+        level = coef[hour]
+        # Kategori acuan punya koefisien nol
+        weekday_coef = np.vstack([np.zeros((1, coef.shape[1])), coef[WEEKDAY_OFFSET:WEATHER_OFFSET]])
+        level += weekday_coef[rows['weekday'].to_numpy(np.intp)]
+        level += np.outer(self._years(rows), coef[-1])
+        return level
+
+    def weather_level(self, rows):
+        """Weather part of the log-scale level of ``rows``: condition, temperature, humidity and wind (n x 2)."""
+        coef = self.coef
+        weather_coef = np.vstack([np.zeros((1, coef.shape[1])), coef[WEATHER_OFFSET:SEASON_OFFSET]])
+        level = weather_coef[self._weather(rows).astype(np.intp) - 1]
+        temp = rows['temp'].to_numpy(np.float64)
+        numeric = np.column_stack([temp, temp ** 2, rows['hum'].to_numpy(np.float64),
+                                   rows['windspeed'].to_numpy(np.float64)])
+        level += numeric @ coef[SEASON_OFFSET:SEASON_OFFSET + N_NUMERIC]
+        return level
+
+    def _level(self, rows):
+        # ``_design(rows) @ coef`` tanpa membangun desain: model aditif pada skala log, bagian kalender + cuaca
+        return self.calendar_level(rows) + self.weather_level(rows)
+
+    @property
+    def nbytes(self):
+        return int(self.coef.nbytes + self.smearing.nbytes + self.residual_std.nbytes + self.weather_levels.nbytes)
+
+    def predict(self, rows):
+        """Expected ``casual``, ``registered`` and ``cnt`` of each row of ``rows`` (``ROW_COLUMNS``)."""
+        level = self._level(rows)
+        # Koreksi smearing Duan: rata-rata exp(residual) mengembalikan nilai harapan dari skala log
+        expected = np.maximum(np.exp(level) * self.smearing - 1.0, 0.0)
+        result = pd.DataFrame(expected, columns=TARGETS, index=rows.index)
+        result['cnt'] = expected.sum(axis=1)
+        return result
+
+
+def backtest(model, rows):
+    """Forecast of ``rows`` (``TRAINING_COLUMNS``) next to the recorded ``cnt``, summed per hour."""
+    frame = pd.DataFrame({
+        'dteday': rows['dteday'].to_numpy(),
+        'hr': rows['hr'].to_numpy(),
+        'workingday': rows['workingday'].to_numpy(),
+        'actual': rows['cnt'].to_numpy(np.float64),
+        'forecast': model.predict(rows)['cnt'].to_numpy(),
+    })
+    # Data banyak kota punya satu baris per kota untuk setiap jam
+    hourly = frame.groupby(['dteday', 'hr'], sort=True).agg(
+        workingday=('workingday', 'first'), actual=('actual', 'sum'), forecast=('forecast', 'sum')).reset_index()
+    hourly['time'] = hourly['dteday'] + pd.to_timedelta(hourly['hr'].astype(np.int64), unit='h')
+    return hourly
+
+
+def forecast_errors(hourly):
+    """MAE, RMSE and relative bias of the total of a ``backtest`` frame."""
+    error = hourly['forecast'] - hourly['actual']
+    total = hourly['actual'].sum()
+    return {'mae': float(error.abs().mean()), 'rmse': float(np.sqrt((error ** 2).mean())),
+            'bias': float(error.sum() / total) if total else float('nan')}
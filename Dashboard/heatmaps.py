@@ -0,0 +1,199 @@
+"""Dense sum/count tensor behind the dashboard's heatmaps.
+
+``HeatmapTensor`` holds, for the rows selected by the sidebar filters, the
+sum and non-null count of every heatmap measure over the full grid of
+``HEATMAP_AXES`` (season × weather × weekday × hour × temperature bin ×
+humidity bin), every axis in a fixed display order. A two-axis heatmap is a
+sum over the other axes plus one division, and always lists every label of
+both axes in the same order (combinations without rows are NaN), so charts
+need no reordering and do not depend on which labels a filter left over.
+
+``time_category`` is not stored: it is a fixed function of the hour
+(``features.HOUR_TIME_CATEGORY``), so its heatmaps fold the hour axis.
+The day is not an axis either; the filters select days before the tensor is
+filled, and season and weekday already follow from the day.
+
+The tensor is filled from the selected cells of the cubes, from rows, or
+from a grouped SQL result. ``frame_heatmap`` is the row-level reference.
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from features import (
+    BIN_FEATURES, HOUR_TIME_CATEGORY, LABEL_FEATURES, TIME_CATEGORY_FEATURE, categorical_dtypes,
+)
+
+_LABELS = {feature.name: list(feature.labels) for feature in LABEL_FEATURES + BIN_FEATURES}
+
+# Urutan tampilan tetap per sumbu; minggu dimulai hari Senin seperti grafik lain di dashboard
+HEATMAP_AXES = [
+    ('season_name', _LABELS['season_name']),
+    ('weather_condition', _LABELS['weather_condition']),
+    ('weekday_name', _LABELS['weekday_name'][1:] + _LABELS['weekday_name'][:1]),
+    ('hr', list(range(24))),
+    ('temp_category', _LABELS['temp_category']),
+    ('hum_category', _LABELS['hum_category']),
+]
+# Sumbu turunan: (sumbu sumber, label, kode label per posisi sumber)
+DERIVED_AXES = {
+    TIME_CATEGORY_FEATURE.name: ('hr', list(TIME_CATEGORY_FEATURE.labels), HOUR_TIME_CATEGORY.astype(np.int64)),
+}
+HEATMAP_MEASURES = ['cnt', 'casual_ratio']
+
+AXIS_NAMES = [name for name, _ in HEATMAP_AXES]
+SHAPE = tuple(len(labels) for _, labels in HEATMAP_AXES)
+
+CATEGORICAL_DTYPES = categorical_dtypes()
+
+
+def axis_labels(name):
+    """Labels of a stored or derived axis, in display order."""
+    if name in DERIVED_AXES:
+        return DERIVED_AXES[name][1]
+    return HEATMAP_AXES[AXIS_NAMES.index(name)][1]
+
+
+def _axis_index(name):
+    labels = axis_labels(name)
+    if name in CATEGORICAL_DTYPES:
+        return pd.CategoricalIndex(labels, dtype=CATEGORICAL_DTYPES[name], name=name)
+    return pd.Index(labels, name=name)
+
+
+def axis_codes(name, values):
+    """Position of every value on axis ``name`` (``-1`` for missing or unknown values)."""
+    positions = pd.Index(axis_labels(name))
+    if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+        # Kode kategori dipetakan lewat tabel kecil, tanpa membandingkan string per baris
+        lookup = positions.get_indexer(values.cat.categories)
+        codes = values.cat.codes.to_numpy().astype(np.int64)
+        return np.where(codes >= 0, lookup[np.maximum(codes, 0)], -1)
+    return positions.get_indexer(np.asarray(values))
+
+
+def frame_heatmap(frame, index, columns, value):
+    """Row-level reference for ``HeatmapTensor.mean``: a mean pivot table on the fixed axes."""
+    pivot = pd.pivot_table(frame, values=value, index=index, columns=columns, aggfunc='mean', observed=False)
+    grid = pivot.reindex(index=axis_labels(index), columns=axis_labels(columns)).astype(np.float64)
+    grid.index = _axis_index(index)
+    grid.columns = _axis_index(columns)
+    return grid
+
+
+# Satu grid padat: sumbu yang dicakup (urutan HEATMAP_AXES) plus jumlah dan hitungan per ukuran
+_Block = namedtuple('_Block', ['axes', 'sums', 'counts'])
+
+
+def _block(axes, codes, sums, counts):
+    """Grid over ``axes`` of groups with axis ``codes`` (one array per axis) and per-group sums and counts."""
+    valid = np.ones(len(codes[0]), dtype=bool)
+    for axis in codes:
+        valid &= axis >= 0
+    shape = tuple(SHAPE[AXIS_NAMES.index(name)] for name in axes)
+    flat = np.ravel_multi_index([axis[valid] for axis in codes], shape)
+    size = int(np.prod(shape))
+
+    def fill(weights):
+        return np.bincount(flat, weights=np.asarray(weights, dtype=np.float64)[valid],
+                           minlength=size).reshape(shape)
+
+    return _Block(tuple(axes), {name: fill(sums[name]) for name in HEATMAP_MEASURES},
+                  {name: fill(counts[name]) for name in HEATMAP_MEASURES})
+
+
+class HeatmapTensor:
+    """Sum and non-null count of each measure over dense grids of ``HEATMAP_AXES``.
+
+    Rows and SQL results fill one grid over every axis. A cube fills a grid
+    over the axes among its dimensions only (the hour cube has no humidity
+    bin), so a tensor built from cubes holds one grid per cube; a heatmap is
+    read from the first grid holding both of its axes, and from ``rows``
+    (the filtered frame) when none does.
+    """
+
+    def __init__(self, blocks, rows=None):
+        self.blocks = list(blocks)
+        self.rows = rows
+        self._row_block = None
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for block in self.blocks
+                   for array in list(block.sums.values()) + list(block.counts.values()))
+
+    @classmethod
+    def from_codes(cls, codes, sums, counts):
+        """Tensor of groups with codes on every axis (one array per axis) and per-group ``sums`` / ``counts``."""
+        return cls([_block(AXIS_NAMES, codes, sums, counts)])
+
+    @classmethod
+    def from_cubes(cls, tiers, rows=None):
+        """Tensor with one grid per cube of ``tiers`` (``rollups.Tier``) over its selected cells."""
+        blocks = []
+        for tier in tiers:
+            axes = [name for name in AXIS_NAMES if name in tier.cube.dimensions]
+            if len(axes) < 2 or any(block.axes == tuple(axes) for block in blocks):
+                continue
+            codes = []
+            for name in axes:
+                dimension = tier.cube.dimensions[name]
+                lookup = pd.Index(axis_labels(name)).get_indexer(np.asarray(dimension.labels))
+                cell_codes = dimension.cell_codes[tier.cells]
+                codes.append(np.where(cell_codes >= 0, lookup[np.maximum(cell_codes, 0)], -1))
+            sums = {name: tier.cube.sums[name][tier.cells] for name in HEATMAP_MEASURES}
+            counts = {name: tier.cube.counts[name][tier.cells] for name in HEATMAP_MEASURES}
+            blocks.append(_block(axes, codes, sums, counts))
+        return cls(blocks, rows)
+
+    @classmethod
+    def from_frame(cls, frame, sum_columns=None, count_columns=None):
+        """Tensor of ``frame`` rows, or of pre-grouped rows with sum and count columns per measure."""
+        codes = [axis_codes(name, frame[name]) for name in AXIS_NAMES]
+        if sum_columns is None:
+            values = {name: frame[name].to_numpy(dtype=np.float64) for name in HEATMAP_MEASURES}
+            sums = {name: np.nan_to_num(array) for name, array in values.items()}
+            counts = {name: ~np.isnan(array) for name, array in values.items()}
+        else:
+            sums = {name: frame[sum_columns[name]].fillna(0).to_numpy() for name in HEATMAP_MEASURES}
+            counts = {name: frame[count_columns[name]].to_numpy() for name in HEATMAP_MEASURES}
+        return cls.from_codes(codes, sums, counts)
+
+    def _block_for(self, sources):
+        for block in self.blocks:
+            if all(source in block.axes for source in sources):
+                return block
+        if self.rows is None:
+            raise ValueError(f"no grid holds the {sources[0]} and {sources[1]} axes")
+        if self._row_block is None:
+            # Pasangan sumbu yang tidak ada di kubus mana pun dibaca dari baris terfilter, sekali per tensor
+            self._row_block = HeatmapTensor.from_frame(self.rows).blocks[0]
+        return self._row_block
+
+    def _fold(self, block, array, sources, index, columns):
+        """2-D sums of ``array`` over (index, columns), derived axes folded from their source."""
+        keep = [block.axes.index(source) for source in sources]
+        grid = array.sum(axis=tuple(axis for axis in range(len(block.axes)) if axis not in keep))
+        if keep[0] > keep[1]:
+            grid = grid.T
+        for side, name in enumerate((index, columns)):
+            if name in DERIVED_AXES:
+                _, labels, codes = DERIVED_AXES[name]
+                # Matriks 0/1 sumber -> label turunan menjumlahkan posisi sumber per label
+                fold = np.zeros((len(codes), len(labels)))
+                fold[np.arange(len(codes)), codes] = 1.0
+                grid = fold.T @ grid if side == 0 else grid @ fold
+        return grid
+
+    def mean(self, index, columns, value):
+        """Mean of ``value`` per (index, columns) label pair, every label of both axes in display order."""
+        sources = [DERIVED_AXES[name][0] if name in DERIVED_AXES else name for name in (index, columns)]
+        if sources[0] == sources[1]:
+            raise ValueError(f"{index} and {columns} share the {sources[0]} axis")
+        block = self._block_for(sources)
+        sums = self._fold(block, block.sums[value], sources, index, columns)
+        counts = self._fold(block, block.counts[value], sources, index, columns)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            grid = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+        return pd.DataFrame(grid, index=_axis_index(index), columns=_axis_index(columns))
@@ -0,0 +1,294 @@
+"""Append-only ingestion of new hourly rental records.
+
+New rows use the raw schema of ``data/data_2.csv`` and arrive either as a
+JSONL file that is appended to (one object per line) or as ``*.csv`` /
+``*.jsonl`` files dropped into a directory. ``LiveDataset`` polls the source
+on every rerun, derives the dashboard columns for the new rows only and
+folds them into the shared frame, filter index, cubes and rank index
+without rebuilding them from scratch. The frame's columns live in arrays
+with spare capacity (``RowStore``), so a batch is copied in once instead of
+concatenating the whole table; every cube of ``rollups.py`` built so far
+merges the new rows into its cells (``Cube.extended``), the others are
+built on first use. Each batch is also scored by the streaming anomaly
+detector (``anomalies.py``).
+
+Set ``DASHBOARD_INGEST_PATH`` to the JSONL file or drop directory to enable
+it. Files in a drop directory should be written elsewhere and moved in, so
+a half-written file is never picked up.
+"""
+import json
+import os
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from anomalies import AnomalyDetector
+from correlation import RankIndex
+from cube import Cube
+from filter_index import FilterIndex
+from rollups import BASE, DAILY, Rollups
+from schema import apply_schema
+from features import derive_features
+
+INGEST_PATH_ENV = 'DASHBOARD_INGEST_PATH'
+
+RAW_COLUMNS = ['instant', 'dteday', 'season', 'yr', 'mnth', 'hr', 'holiday', 'weekday',
+               'workingday', 'weathersit', 'temp', 'atemp', 'hum', 'windspeed',
+               'casual', 'registered', 'cnt']
+
+# Rentang nilai yang sah per kolom kode/hitungan (inklusif); kolom lain hanya harus numerik
+VALUE_RANGES = {
+    'season': (1, 4), 'yr': (0, None), 'mnth': (1, 12), 'hr': (0, 23), 'holiday': (0, 1),
+    'weekday': (0, 6), 'workingday': (0, 1), 'weathersit': (1, 4),
+    'casual': (0, None), 'registered': (0, None), 'cnt': (0, None),
+}
+# Kolom yang harus bilangan bulat
+INTEGER_COLUMNS = ['instant'] + list(VALUE_RANGES)
+
+# Frame, indeks filter, kubus, indeks peringkat dan rollup yang selalu konsisten satu sama lain
+LiveState = namedtuple('LiveState', ['main_data', 'filter_index', 'cube', 'ranks', 'rollups'])
+
+
+def _frame_from_records(records):
+    return pd.DataFrame.from_records(records, columns=RAW_COLUMNS)
+
+
+def coerce_rows(frame):
+    """``frame`` with parsed dates and numeric columns, minus the rows that do not parse or are out of range.
+
+    Returns the valid rows and the number of rows dropped.
+    """
+    frame = frame[RAW_COLUMNS].copy()
+    valid = pd.Series(True, index=frame.index)
+    frame['dteday'] = pd.to_datetime(frame['dteday'], errors='coerce', format='ISO8601')
+    valid &= frame['dteday'].notna()
+    for column in RAW_COLUMNS[2:]:
+        values = pd.to_numeric(frame[column], errors='coerce')
+        frame[column] = values
+        valid &= values.notna() & np.isfinite(values.astype(np.float64))
+    for column in INTEGER_COLUMNS:
+        valid &= frame[column] % 1 == 0
+    for column, (low, high) in VALUE_RANGES.items():
+        valid &= frame[column] >= low
+        if high is not None:
+            valid &= frame[column] <= high
+    frame = frame[valid]
+    frame = frame.astype({column: np.int64 for column in INTEGER_COLUMNS})
+    return frame.reset_index(drop=True), int((~valid).sum())
+
+
+class JsonlTail:
+    """Reads the complete lines appended to a JSONL file since the last poll."""
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.rejected = 0
+
+    def poll(self):
+        if not os.path.exists(self.path):
+            return coerce_rows(_frame_from_records([]))[0]
+        if os.path.getsize(self.path) < self.offset:
+            # File dipotong atau diganti: mulai lagi dari awal
+            self.offset = 0
+        with open(self.path, 'rb') as handle:
+            handle.seek(self.offset)
+            chunk = handle.read()
+        # Baris terakhir tanpa newline mungkin masih ditulis, jadi ditunda ke poll berikutnya
+        complete = chunk[:chunk.rfind(b'\n') + 1]
+        self.offset += len(complete)
+
+        records = []
+        for line in complete.splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                self.rejected += 1
+                continue
+            if not isinstance(record, dict) or any(column not in record for column in RAW_COLUMNS):
+                self.rejected += 1
+                continue
+            records.append(record)
+        rows, rejected = coerce_rows(_frame_from_records(records))
+        self.rejected += rejected
+        return rows
+
+
+class DropDirectory:
+    """Reads every ``*.csv`` / ``*.jsonl`` file that appeared in a directory since the last poll."""
+
+    def __init__(self, path):
+        self.path = path
+        self.seen = set()
+        self.rejected = 0
+
+    def poll(self):
+        frames = []
+        for name in sorted(os.listdir(self.path)):
+            if name in self.seen or not name.endswith(('.csv', '.jsonl')):
+                continue
+            self.seen.add(name)
+            file_path = os.path.join(self.path, name)
+            try:
+                if name.endswith('.csv'):
+                    frame = pd.read_csv(file_path)
+                else:
+                    frame = pd.read_json(file_path, lines=True)
+            except (OSError, ValueError):
+                # File terpotong atau rusak dihitung sebagai satu file yang ditolak
+                self.rejected += 1
+                continue
+            if any(column not in frame for column in RAW_COLUMNS):
+                self.rejected += 1
+                continue
+            rows, rejected = coerce_rows(frame)
+            self.rejected += rejected
+            frames.append(rows)
+        if not frames:
+            return coerce_rows(_frame_from_records([]))[0]
+        return pd.concat(frames, ignore_index=True)
+
+
+def open_source(path):
+    """Source for ``path``: a drop directory if it is a directory, a JSONL tail otherwise."""
+    if os.path.isdir(path):
+        return DropDirectory(path)
+    return JsonlTail(path)
+
+
+def prepare_rows(raw, main_data):
+    """Derive the dashboard columns for ``raw`` rows only, laid out like ``main_data``."""
+    new_rows = raw[RAW_COLUMNS].copy()
+    new_rows['dteday'] = pd.to_datetime(new_rows['dteday'])
+    new_rows = apply_schema(derive_features(new_rows))[main_data.columns]
+    new_rows.index = pd.RangeIndex(len(main_data), len(main_data) + len(new_rows))
+    return new_rows
+
+
+class RowStore:
+    """Columns of a frame in arrays with spare capacity, growing by doubling.
+
+    ``append`` copies a batch past the end of the rows handed out so far and
+    returns the longer frame, whose columns wrap the first rows of every
+    array without copying. Frames returned earlier only see their own rows,
+    so they never change. Categorical columns keep their codes; a batch with
+    other categories is refused with ``ValueError``.
+    """
+
+    def __init__(self, main_data, capacity=None):
+        self.dtypes = main_data.dtypes
+        self.n_rows = len(main_data)
+        capacity = max(capacity or 0, 2 * self.n_rows, 1)
+        self._arrays = {}
+        for name, values in self._columns(main_data):
+            array = np.empty(capacity, dtype=values.dtype)
+            array[:self.n_rows] = values
+            self._arrays[name] = array
+
+    @property
+    def capacity(self):
+        return len(next(iter(self._arrays.values())))
+
+    def _columns(self, frame):
+        for name, dtype in self.dtypes.items():
+            column = frame[name]
+            if isinstance(dtype, pd.CategoricalDtype):
+                if column.dtype != dtype:
+                    raise ValueError(f"{name} of the new rows has other categories than the frame")
+                yield name, column.cat.codes.to_numpy()
+            else:
+                yield name, column.to_numpy(dtype=dtype)
+
+    def frame(self):
+        columns = {}
+        for name, dtype in self.dtypes.items():
+            values = self._arrays[name][:self.n_rows]
+            if isinstance(dtype, pd.CategoricalDtype):
+                values = pd.Categorical.from_codes(values, dtype=dtype, validate=False)
+            columns[name] = values
+        # copy=False: setiap kolom tetap view ke array-nya, tanpa digabung ke satu blok
+        return pd.DataFrame(columns, index=pd.RangeIndex(self.n_rows), copy=False)
+
+    def append(self, new_rows):
+        """Frame of the stored rows followed by ``new_rows`` (laid out like the stored frame)."""
+        columns = dict(self._columns(new_rows))
+        n_rows = self.n_rows + len(new_rows)
+        if n_rows > self.capacity:
+            # Array lama tetap dipakai frame sebelumnya; hanya baris yang sudah diserahkan yang disalin
+            capacity = max(2 * self.capacity, n_rows)
+            for name, array in self._arrays.items():
+                grown = np.empty(capacity, dtype=array.dtype)
+                grown[:self.n_rows] = array[:self.n_rows]
+                self._arrays[name] = grown
+        for name, values in columns.items():
+            self._arrays[name][self.n_rows:n_rows] = values
+        self.n_rows = n_rows
+        return self.frame()
+
+
+class LiveDataset:
+    """Shared frame, filter index and cube that grow as new rows arrive.
+
+    Every refresh builds new objects (the old frame, index and cube are never
+    mutated), so a session still rendering with the previous ``snapshot()``
+    keeps a consistent view. ``version`` names the initial rows (see
+    ``FilterIndex``); every batch appended later gets a new random version.
+    ``detector`` holds the hourly anomalies found in the initial rows and in
+    every batch since (``batch`` 0 for the initial rows). The ``RowStore`` is
+    only created by the first batch, so a dataset that never grows keeps the
+    frame it was given (e.g. the memory-mapped snapshot).
+    """
+
+    def __init__(self, main_data, source=None, version=None):
+        self.source = source
+        self.appended_rows = 0
+        self.batches = 0
+        self.rejected_rows = 0
+        self._lock = threading.Lock()
+        self._store = None
+        cube = Cube(main_data)
+        self._state = LiveState(main_data, FilterIndex(main_data, version), cube, RankIndex(main_data),
+                                Rollups(main_data, {BASE: cube}))
+        self.detector = AnomalyDetector().extended(main_data)
+
+    def snapshot(self):
+        return self._state
+
+    def refresh(self):
+        """Fold in whatever the source has accumulated; returns the number of new rows."""
+        if self.source is None:
+            return 0
+        with self._lock:
+            raw = self.source.poll()
+            if raw.empty:
+                return 0
+            state = self._state
+            try:
+                new_rows = prepare_rows(raw, state.main_data)
+                # Tier harian memeriksa kalender: musim, weekday dan tipe hari harus cocok dengan hari lama
+                state.rollups.tier(DAILY)
+                cubes = state.rollups.extended_cubes(new_rows)
+                if self._store is None:
+                    self._store = RowStore(state.main_data, 2 * (len(state.main_data) + len(new_rows)))
+                main_data = self._store.append(new_rows)
+            except (KeyError, TypeError, ValueError):
+                # Batch yang tidak bisa diturunkan atau bertentangan dengan data lama
+                # (mis. hari dengan weekday berbeda) ditolak utuh, tanpa menggagalkan rerun
+                self.rejected_rows += len(raw)
+                return 0
+            self._state = LiveState(main_data, state.filter_index.extended(new_rows), cubes[BASE],
+                                    state.ranks.extended(main_data, new_rows), Rollups(main_data, cubes))
+            self.appended_rows += len(new_rows)
+            self.batches += 1
+            # Hanya jam baru yang dinilai; statistik berjalan tidak memindai ulang baris lama
+            self.detector = self.detector.extended(new_rows, self.batches)
+            return len(new_rows)
+
+    @property
+    def rejected(self):
+        """Malformed records or files skipped by the source plus rows of rejected batches."""
+        return self.rejected_rows + (self.source.rejected if self.source is not None else 0)
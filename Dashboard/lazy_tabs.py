@@ -0,0 +1,178 @@
+"""Deferred per-tab rendering.
+
+``st.tabs`` runs every tab body on each rerun, so every figure in every
+section is built, serialized and shipped even though only one tab per
+section is visible. ``LazyTabs`` registers each tab body as a callable and,
+in lazy mode, shows a horizontal radio and runs only the selected tab.
+With lazy mode off it falls back to regular ``st.tabs``.
+
+Figures go through ``show_chart`` so ``RenderStats`` can record the time and
+figure JSON size of every tab; the cost last measured for a tab is used to
+estimate what skipping it saved. Tabs and charts also show up as spans of
+the active ``Profiler`` when profiling is on.
+
+``show_chart`` also takes a ``figures.FigureSpec``. With a figure pool the
+spec is built in a worker process and drawn by ``flush_charts`` at the end
+of the rerun, so a tab's time then excludes building its figures.
+"""
+import time
+
+import streamlit as st
+
+from figures import ChartQueue, FigureSpec
+from profiler import active_profiler
+
+
+class RenderStats:
+    """Per-rerun timings and payload sizes, plus the last known cost of every tab."""
+
+    def __init__(self, enabled=False, known_costs=None):
+        self.enabled = enabled
+        self.rendered = []
+        self.skipped = []
+        # Biaya terakhir tiap tab disimpan di session_state agar bisa dipakai sebagai estimasi penghematan
+        self.known_costs = known_costs if known_costs is not None else {}
+        self.current_key = None
+        self._payload_bytes = 0
+
+    def record_payload(self, nbytes, key=None):
+        if not self.enabled:
+            return
+        if key is None or key == self.current_key:
+            self._payload_bytes += nbytes
+        elif key in self.known_costs:
+            # Grafik dari pool digambar setelah tabnya selesai; ukurannya ditambahkan ke biaya tab itu
+            self.known_costs[key]['bytes'] = (self.known_costs[key]['bytes'] or 0) + nbytes
+
+    def run_tab(self, key, builder):
+        self._payload_bytes = 0
+        self.current_key = key
+        start = time.perf_counter()
+        try:
+            builder()
+        finally:
+            self.current_key = None
+        cost = {'seconds': time.perf_counter() - start,
+                'bytes': self._payload_bytes if self.enabled else None}
+        self.known_costs[key] = cost
+        self.rendered.append((key, cost))
+
+    def skip_tab(self, key):
+        self.skipped.append((key, self.known_costs.get(key)))
+
+    def summary(self):
+        rendered_seconds = sum(cost['seconds'] for _, cost in self.rendered)
+        rendered_bytes = sum(cost['bytes'] or 0 for _, cost in self.rendered)
+        known_skips = [cost for _, cost in self.skipped if cost is not None]
+        return {
+            'rendered_tabs': len(self.rendered),
+            'rendered_seconds': rendered_seconds,
+            'rendered_bytes': rendered_bytes,
+            'skipped_tabs': len(self.skipped),
+            'saved_seconds': sum(cost['seconds'] for cost in known_skips),
+            'saved_bytes': sum(cost['bytes'] or 0 for cost in known_skips),
+            'unmeasured_skips': len(self.skipped) - len(known_skips),
+        }
+
+
+_NULL_STATS = RenderStats()
+_SERIAL_QUEUE = ChartQueue()
+
+
+def _active_stats():
+    return st.session_state.get('_render_stats', _NULL_STATS)
+
+
+def _active_queue():
+    return st.session_state.get('_chart_queue', _SERIAL_QUEUE)
+
+
+def start_render_stats(enabled):
+    """Start collecting stats for this rerun; returns the RenderStats instance."""
+    known_costs = st.session_state.setdefault('_render_costs', {})
+    stats = RenderStats(enabled=enabled, known_costs=known_costs)
+    st.session_state['_render_stats'] = stats
+    return stats
+
+
+def start_chart_queue(pool):
+    """Queue this rerun's figure specs for ``pool`` (None builds them in place)."""
+    queue = ChartQueue(pool)
+    st.session_state['_chart_queue'] = queue
+    return queue
+
+
+def _draw(container, fig, key=None):
+    stats, profiler = _active_stats(), active_profiler()
+    if stats.enabled or profiler.enabled:
+        nbytes = len(fig.to_json())
+        stats.record_payload(nbytes, key)
+        profiler.record_chart(nbytes)
+    with profiler.span('st.plotly_chart', kind='serialize'):
+        container.plotly_chart(fig, use_container_width=True)
+
+
+def _draw_error(container, error, key=None):
+    container.error(f"This chart could not be built: {error}")
+
+
+def show_chart(fig):
+    """``st.plotly_chart`` with payload accounting for the render stats and the profiler.
+
+    A ``FigureSpec`` goes to the figure pool when there is one: its place is
+    kept with ``st.empty`` and ``flush_charts`` draws it. A spec that fails
+    to build shows the error in its place, like in the pool.
+    """
+    if isinstance(fig, FigureSpec):
+        queue = _active_queue()
+        if queue.parallel:
+            queue.submit(fig, st.empty(), _active_stats().current_key)
+            return
+        try:
+            fig = fig.build()
+        except Exception as error:
+            _draw_error(st, error)
+            return
+    _draw(st, fig)
+
+
+def flush_charts():
+    """Draw the figures still building in the pool, in the order they were shown; returns their number."""
+    with active_profiler().span('figure pool', kind='serialize'):
+        return _active_queue().flush(_draw, _draw_error)
+
+
+class LazyTabs:
+    def __init__(self, key, lazy=True):
+        self.key = key
+        self.lazy = lazy
+        self.labels = []
+        self.builders = []
+
+    def tab(self, label):
+        """Decorator registering ``builder`` as the body of tab ``label``."""
+        def register(builder):
+            self.labels.append(label)
+            self.builders.append(builder)
+            return builder
+        return register
+
+    def _run(self, stats, label, builder):
+        with active_profiler().span(f"tab: {label}", kind='tab'):
+            stats.run_tab(f"{self.key}/{label}", builder)
+
+    def render(self):
+        stats = _active_stats()
+        if not self.lazy:
+            for container, label, builder in zip(st.tabs(self.labels), self.labels, self.builders):
+                with container:
+                    self._run(stats, label, builder)
+            return
+
+        selected = st.radio("View", self.labels, horizontal=True,
+                            key=f"lazy_tabs_{self.key}", label_visibility="collapsed")
+        for label, builder in zip(self.labels, self.builders):
+            if label == selected:
+                self._run(stats, label, builder)
+            else:
+                stats.skip_tab(f"{self.key}/{label}")
@@ -0,0 +1,172 @@
+"""Hourly data of many cities, stored as one Parquet directory per city and month.
+
+The layout is Hive style: ``<root>/city=<name>/year=<YYYY>/month=<MM>/part-*.parquet``.
+Each file holds the raw columns of ``data/data_2.csv``. The city, year and
+month live only in the directory names.
+
+``PartitionCatalog`` lists the partitions from the directory names alone.
+``prune`` keeps the partitions of the selected cities whose month overlaps
+the selected date range, and ``load`` reads only their files. The sidebar's
+city selector and date range therefore decide which bytes are read; the
+remaining filters work on the loaded rows as before.
+
+Set ``DASHBOARD_PARTITIONS`` to the root directory to have the dashboard
+load from it. Build a root from a flat CSV or Parquet file with
+
+    python Dashboard/partitions.py data/partitions data/data_2.csv --city washington-dc
+
+or generate one with ``python Dashboard/synthetic.py data/partitions --partitioned --cities 20``.
+"""
+import argparse
+import datetime
+import os
+import re
+import time
+from collections import namedtuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from features import derive_features
+from ingest import RAW_COLUMNS
+from schema import apply_schema
+
+PARTITIONS_ENV = 'DASHBOARD_PARTITIONS'
+CITY_COLUMN = 'city'
+
+Partition = namedtuple('Partition', ['city', 'year', 'month', 'path'])
+
+_CITY_DIR = re.compile(r'^city=(.+)$')
+_YEAR_DIR = re.compile(r'^year=(\d{4})$')
+_MONTH_DIR = re.compile(r'^month=(\d{1,2})$')
+# Kolom partisi diambil dari nama direktori; nama kota dibaca apa adanya sebagai string
+_PARTITIONING = ds.partitioning(pa.schema([(CITY_COLUMN, pa.string()), ('year', pa.int16()),
+                                           ('month', pa.int8())]), flavor='hive')
+
+
+def partition_dir(root, city, year, month):
+    return os.path.join(root, f"{CITY_COLUMN}={city}", f"year={year:04d}", f"month={month:02d}")
+
+
+def _subdirs(path, pattern):
+    for name in sorted(os.listdir(path)):
+        match = pattern.match(name)
+        if match and os.path.isdir(os.path.join(path, name)):
+            yield match.group(1), os.path.join(path, name)
+
+
+def _month_end(year, month):
+    return (pd.Timestamp(year=year, month=month, day=1) + pd.offsets.MonthEnd(0)).date()
+
+
+class PartitionCatalog:
+    """The partitions under ``root``, found from directory names without opening any file."""
+
+    def __init__(self, root):
+        self.root = root
+        self.partitions = []
+        for city, city_path in _subdirs(root, _CITY_DIR):
+            for year, year_path in _subdirs(city_path, _YEAR_DIR):
+                for month, month_path in _subdirs(year_path, _MONTH_DIR):
+                    self.partitions.append(Partition(city, int(year), int(month), month_path))
+        self.cities = sorted({partition.city for partition in self.partitions})
+
+    def date_bounds(self, cities):
+        """First and last day of the months stored for ``cities``."""
+        months = [(partition.year, partition.month) for partition in self.partitions if partition.city in cities]
+        if not months:
+            return None
+        first, last = min(months), max(months)
+        return datetime.date(first[0], first[1], 1), _month_end(*last)
+
+    def prune(self, cities, date_start=None, date_end=None):
+        """Partitions of ``cities`` whose month overlaps ``[date_start, date_end]``."""
+        selected = []
+        for partition in self.partitions:
+            if partition.city not in cities:
+                continue
+            if date_start is not None and _month_end(partition.year, partition.month) < date_start:
+                continue
+            if date_end is not None and datetime.date(partition.year, partition.month, 1) > date_end:
+                continue
+            selected.append(partition)
+        return selected
+
+    def load(self, partitions):
+        """Raw rows of ``partitions`` (at least one) in time order, with a categorical ``city`` column."""
+        files = [os.path.join(partition.path, name) for partition in partitions
+                 for name in sorted(os.listdir(partition.path)) if name.endswith('.parquet')]
+        dataset = ds.dataset(files, format='parquet', partitioning=_PARTITIONING, partition_base_dir=self.root)
+        raw = dataset.to_table(columns=RAW_COLUMNS + [CITY_COLUMN]).to_pandas()
+        raw['dteday'] = pd.to_datetime(raw['dteday'])
+        # Kategori kota tetap sama berapa pun kota yang dimuat
+        raw[CITY_COLUMN] = pd.Categorical(raw[CITY_COLUMN], categories=self.cities)
+        # Urut waktu agar rentang tanggal menjadi irisan baris yang bersebelahan di indeks filter
+        raw = raw.sort_values(['dteday', 'hr'], kind='stable', ignore_index=True)
+        return raw
+
+
+def load_partitions(catalog, partitions):
+    """The dashboard frame (derived columns, compact schema) of ``partitions``."""
+    return apply_schema(derive_features(catalog.load(partitions)))
+
+
+class PartitionWriter:
+    """Appends frames to a partitioned root, one new file per city and month in each frame."""
+
+    def __init__(self, root):
+        self.root = root
+        self.files = 0
+        self.rows = 0
+        self._sequence = {}
+
+    def write(self, frame, city=None):
+        """Write ``frame`` (raw columns, plus ``city`` unless ``city`` names the single city)."""
+        dteday = pd.to_datetime(frame['dteday'])
+        keys = [frame[CITY_COLUMN] if city is None else pd.Series(city, index=frame.index),
+                dteday.dt.year, dteday.dt.month]
+        for (name, year, month), group in frame.groupby(keys, sort=False, observed=True):
+            path = partition_dir(self.root, name, year, month)
+            os.makedirs(path, exist_ok=True)
+            sequence = self._sequence.get(path, len(os.listdir(path)))
+            self._sequence[path] = sequence + 1
+            rows = group[RAW_COLUMNS].assign(dteday=dteday[group.index])
+            file_path = os.path.join(path, f"part-{sequence:05d}.parquet")
+            # Tulis ke file sementara dulu supaya katalog tidak pernah membaca file setengah jadi
+            tmp_path = f"{file_path}.{os.getpid()}.tmp"
+            pq.write_table(pa.Table.from_pandas(rows, preserve_index=False), tmp_path)
+            os.replace(tmp_path, file_path)
+            self.files += 1
+            self.rows += len(group)
+
+
+def _read_chunks(path, chunk_rows):
+    if path.endswith('.parquet'):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Split a CSV or Parquet file into city/year/month partitions.')
+    parser.add_argument('root')
+    parser.add_argument('source', help='.csv or .parquet with the raw columns, optionally a city column')
+    parser.add_argument('--city', help='city name for sources without a city column')
+    parser.add_argument('--chunk-rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    writer = PartitionWriter(args.root)
+    for chunk in _read_chunks(args.source, args.chunk_rows):
+        if CITY_COLUMN not in chunk and not args.city:
+            parser.error(f"{args.source} has no {CITY_COLUMN} column; pass --city")
+        writer.write(chunk, city=None if CITY_COLUMN in chunk else args.city)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {writer.rows:,} rows in {writer.files:,} files under {args.root} in {elapsed:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
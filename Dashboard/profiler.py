@@ -0,0 +1,232 @@
+"""Per-rerun instrumentation of the dashboard script.
+
+``Profiler`` records spans: the wall time, rows processed, chart JSON bytes
+and traced memory delta of a block of the rerun. Stages (load, filters,
+each numbered section, sidebar panels) follow each other with
+``profiler.stage(name)`` so the linear script needs no re-indenting. Tabs,
+``st.plotly_chart`` calls and helper functions are nested inside them with
+the ``span`` context manager or the ``profiled`` decorator.
+
+Profiling is off unless ``?profile=1`` is in the URL or ``DASHBOARD_PROFILE=1``
+is set; ``memory`` instead of ``1`` also traces memory deltas. When it is off
+every call hits ``_NULL_PROFILER``, whose methods do nothing.
+``DASHBOARD_PROFILE_TRACE`` names a JSONL file that receives one record per
+span of every profiled rerun.
+
+Memory deltas come from ``tracemalloc``, which slows allocation-heavy code
+down several times and is process-wide: reruns of other sessions profiled at
+the same time add to each other's deltas.
+"""
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+import streamlit as st
+
+PROFILE_ENV = 'DASHBOARD_PROFILE'
+TRACE_ENV = 'DASHBOARD_PROFILE_TRACE'
+PROFILE_QUERY_PARAM = 'profile'
+MODE_TIME = 'time'
+MODE_MEMORY = 'memory'
+
+# Jejak per sesi yang disimpan untuk diunduh dari panel Performance
+SESSION_TRACE_RERUNS = 20
+
+_trace_lock = threading.Lock()
+# tracemalloc berlaku untuk seluruh proses: dinyalakan selama masih ada rerun yang diprofil
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+
+
+def _acquire_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracing_users += 1
+
+
+def _release_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0:
+            tracemalloc.stop()
+
+
+class _Span:
+    def __init__(self, name, kind, depth, rows):
+        self.name = name
+        self.kind = kind
+        self.depth = depth
+        self.rows = rows
+        self.chart_bytes = 0
+        self.charts = 0
+        self.seconds = None
+        self.memory_delta = None
+        self._start = time.perf_counter()
+        self._memory_start = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+
+    def close(self):
+        self.seconds = time.perf_counter() - self._start
+        if self._memory_start is not None and tracemalloc.is_tracing():
+            self.memory_delta = tracemalloc.get_traced_memory()[0] - self._memory_start
+
+    def record(self):
+        return {'name': self.name, 'kind': self.kind, 'depth': self.depth, 'seconds': self.seconds,
+                'rows': self.rows, 'charts': self.charts, 'chart_bytes': self.chart_bytes,
+                'memory_delta': self.memory_delta}
+
+
+class Profiler:
+    def __init__(self, enabled=True, trace_memory=False):
+        self.enabled = enabled
+        self.rerun_id = uuid.uuid4().hex
+        self.started_at = time.time()
+        self.spans = []
+        self._open = []
+        self._stage = None
+        self._start = time.perf_counter()
+        self._tracing = trace_memory
+        if self._tracing:
+            _acquire_tracing()
+
+    def _begin(self, name, kind, rows):
+        span = _Span(name, kind, len(self._open), rows)
+        self.spans.append(span)
+        self._open.append(span)
+        return span
+
+    def _end(self, span):
+        span.close()
+        self._open.remove(span)
+
+    @contextmanager
+    def span(self, name, rows=None, kind='span'):
+        span = self._begin(name, kind, rows)
+        try:
+            yield span
+        finally:
+            self._end(span)
+
+    def stage(self, name, rows=None):
+        """Close the current stage and open the next one."""
+        if self._stage is not None:
+            self._end(self._stage)
+        self._stage = self._begin(name, 'stage', rows)
+
+    def record_chart(self, nbytes):
+        """Count one chart of ``nbytes`` JSON in every open span."""
+        for span in self._open:
+            span.charts += 1
+            span.chart_bytes += nbytes
+
+    def finish(self):
+        """Close every open span; returns the span records of this rerun."""
+        if self._stage is not None:
+            self._end(self._stage)
+            self._stage = None
+        for span in list(reversed(self._open)):
+            self._end(span)
+        self.release()
+        self.total_seconds = time.perf_counter() - self._start
+        return [span.record() for span in self.spans]
+
+    def release(self):
+        """Stop tracing memory for this rerun (also for reruns that never reached ``finish``)."""
+        if self._tracing:
+            _release_tracing()
+            self._tracing = False
+
+    def trace_records(self):
+        base = {'rerun': self.rerun_id, 'time': self.started_at}
+        return [dict(base, **span.record()) for span in self.spans if span.seconds is not None]
+
+
+class _NullProfiler:
+    enabled = False
+
+    @contextmanager
+    def span(self, name, rows=None, kind='span'):
+        yield None
+
+    def stage(self, name, rows=None):
+        pass
+
+    def record_chart(self, nbytes):
+        pass
+
+    def finish(self):
+        return []
+
+    def trace_records(self):
+        return []
+
+
+_NULL_PROFILER = _NullProfiler()
+
+
+def _parse_mode(value):
+    if value in (None, '', '0'):
+        return None
+    return MODE_MEMORY if value == MODE_MEMORY else MODE_TIME
+
+
+def profiling_mode():
+    """None (off), ``MODE_TIME`` or ``MODE_MEMORY``, from the query parameter or the environment."""
+    return _parse_mode(st.query_params.get(PROFILE_QUERY_PARAM)) or _parse_mode(os.environ.get(PROFILE_ENV))
+
+
+def start_profiler(mode):
+    """Profiler for this rerun (a no-op one when ``mode`` is None), also reachable via ``active_profiler``."""
+    previous = st.session_state.get('_profiler')
+    if isinstance(previous, Profiler):
+        # Rerun sebelumnya bisa terhenti (exception atau rerun baru) sebelum finish
+        previous.release()
+    profiler = Profiler(trace_memory=mode == MODE_MEMORY) if mode else _NULL_PROFILER
+    st.session_state['_profiler'] = profiler
+    return profiler
+
+
+def active_profiler():
+    return st.session_state.get('_profiler', _NULL_PROFILER)
+
+
+def profiled(name=None):
+    """Decorator running the function inside a span of the active profiler."""
+    def decorate(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with active_profiler().span(span_name, kind='call'):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def export_trace(profiler, path=None):
+    """Append this rerun's spans to the JSONL trace file and the session trace; returns the records."""
+    records = profiler.trace_records()
+    if not records:
+        return records
+    path = path if path is not None else os.environ.get(TRACE_ENV)
+    if path:
+        lines = ''.join(json.dumps(record) + '\n' for record in records)
+        with _trace_lock, open(path, 'a', encoding='utf-8') as handle:
+            handle.write(lines)
+    session_trace = st.session_state.setdefault('_profile_trace', [])
+    session_trace.append(records)
+    del session_trace[:-SESSION_TRACE_RERUNS]
+    return records
+
+
+def session_trace_jsonl():
+    """The last reruns of this session as JSONL, for the download button."""
+    return ''.join(json.dumps(record) + '\n'
+                   for records in st.session_state.get('_profile_trace', []) for record in records)
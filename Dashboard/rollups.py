@@ -0,0 +1,99 @@
+"""Cubes for the aggregates the default cube cannot answer.
+
+The default cube (``cube.KEY_DIMENSIONS``) is keyed by the filter
+dimensions only. ``Rollups`` keeps it together with cubes whose key adds one
+more dimension:
+
+- projections add the hour, the humidity bin, the wind bin or the comfort
+  bin, for the charts grouped by those columns;
+- tiers add a calendar period, per day, per week (Monday to Sunday) or per
+  month, for date ranges narrower than the data. Weeks and months drop the
+  weekday and day type (keying them would split the periods into days
+  again), so a day type filter on part of the data is answered per day. A
+  day keeps its season, month, weekday and day type as dependent
+  dimensions, so the daily tier also rejects new rows that contradict the
+  calendar of a loaded day.
+
+None of them has the calendar day and the hour together: on the bundled
+hourly data (17,379 rows) the cubes hold from ~500 (default) to ~4,600
+(hour) cells, and the projections stop growing once every label
+combination has been seen.
+
+A cube answers a query exactly when the filters only touch its dimensions,
+the date range and the temperature slider do not cut through one of its
+cells, and the grouped columns are among its dimensions. ``Rollups.select``
+returns the cubes that fit a filter state, in ``SOURCES`` order (the
+undated cubes first, then the tiers from the coarsest); the view then reads
+each aggregate from the first cube holding its group columns, and from the
+filtered rows otherwise.
+"""
+import threading
+from collections import namedtuple
+
+from cube import KEY_DIMENSIONS, Cube
+
+BASE = 'base'
+HOUR = 'hour'
+HUMIDITY = 'humidity'
+WINDSPEED = 'windspeed'
+COMFORT = 'comfort'
+DAILY = 'daily'
+WEEKLY = 'weekly'
+MONTHLY = 'monthly'
+
+# Kunci sel setiap kubus; kota ditambahkan pada data multi-kota
+CUBE_KEYS = {
+    BASE: KEY_DIMENSIONS,
+    HOUR: KEY_DIMENSIONS + ['hr'],
+    HUMIDITY: KEY_DIMENSIONS + ['hum_category'],
+    WINDSPEED: KEY_DIMENSIONS + ['windspeed_category'],
+    COMFORT: KEY_DIMENSIONS + ['comfort_category'],
+    # Tier minggu dan bulan tanpa weekday dan tipe hari (itu akan memecahnya kembali per hari):
+    # filter tipe hari pada rentang tanggal sebagian dijawab tier harian
+    MONTHLY: ['month', 'season_name', 'weather_condition', 'temp_category', 'user_mix'],
+    WEEKLY: ['week', 'season_name', 'weather_condition', 'temp_category', 'user_mix'],
+    # Musim, bulan, hari dan tipe hari mengikuti tanggal sebagai dimensi turunan
+    DAILY: ['day', 'weather_condition', 'temp_category', 'user_mix'],
+}
+# Urutan pencarian: kubus tanpa tanggal lebih dulu, lalu tier periode dari yang paling kasar
+SOURCES = [BASE, HOUR, HUMIDITY, WINDSPEED, COMFORT, MONTHLY, WEEKLY, DAILY]
+TIERS = [MONTHLY, WEEKLY, DAILY]
+
+Tier = namedtuple('Tier', ['name', 'cube', 'cells'])
+
+
+class Rollups:
+    """The cubes of ``CUBE_KEYS`` over ``main_data``, each built on first use unless passed in ``cubes``."""
+
+    def __init__(self, main_data, cubes=None):
+        self.main_data = main_data
+        self._cubes = dict(cubes or {})
+        self._lock = threading.Lock()
+
+    def tier(self, name):
+        """Cube ``name``, or None when its key does not fix its dependent dimensions in this data."""
+        with self._lock:
+            if name not in self._cubes:
+                try:
+                    self._cubes[name] = Cube(self.main_data, CUBE_KEYS[name])
+                except ValueError:
+                    # Mis. CSV lain dengan mnth yang tidak cocok dengan dteday: kubus ini dilewati,
+                    # agregatnya dijawab kubus lain atau dari baris
+                    self._cubes[name] = None
+            return self._cubes[name]
+
+    def extended_cubes(self, new_rows):
+        """The cubes built so far, each extended with ``new_rows`` (see ``Cube.extended``)."""
+        with self._lock:
+            cubes = dict(self._cubes)
+        return {name: cube.extended(new_rows) if cube is not None else None for name, cube in cubes.items()}
+
+    def select(self, state):
+        """Cubes that answer ``state`` exactly with their selected cells, in ``SOURCES`` order."""
+        tiers = []
+        for name in SOURCES:
+            cube = self.tier(name)
+            cells = cube.cell_mask(state) if cube is not None else None
+            if cells is not None:
+                tiers.append(Tier(name, cube, cells))
+        return tiers
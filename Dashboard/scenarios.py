@@ -0,0 +1,100 @@
+"""What-if demand for grids of weather scenarios.
+
+A scenario holds one weather condition, temperature, humidity and wind speed
+over every hour of a calendar window (``forecast.calendar_rows``), e.g.
+"next week in Light Rain/Snow at 8 °C and 85 % humidity". ``weather_grid``
+crosses lists of the four into a scenario table; ``DEFAULT_GRID`` gives
+about 38k scenarios.
+
+``simulate`` evaluates the expected casual, registered and total rentals
+per day of every scenario over the window, optionally per calendar group
+(day type, hour, ...). The forecast model is additive on the log scale: a
+calendar part per hour plus a weather part per scenario. The hours ×
+scenarios matrix of expected counts is therefore an outer product of two
+exponentials. No hour × scenario rows are built, and scenarios are taken
+in blocks that keep the matrix under ``BLOCK_CELLS``. The totals equal
+summing ``ForecastModel.predict`` over the rows of ``scenario_grid``, at a
+small fraction of the cost (``benchmarks/bench_scenarios.py``).
+"""
+import numpy as np
+import pandas as pd
+
+from features import LABEL_FEATURES, SCALED_FEATURES, comfort_index, label_column
+from forecast import TARGETS
+
+WEATHER_FEATURE = next(feature for feature in LABEL_FEATURES if feature.name == 'weather_condition')
+# Faktor skala kolom ternormalisasi (temp, hum, windspeed) ke satuan asli
+SCALES = {feature.source: (feature.name, feature.factor) for feature in SCALED_FEATURES}
+WEATHER_COLUMNS = ['weathersit', 'temp', 'hum', 'windspeed']
+
+# Grid bawaan dalam satuan asli: 4 kondisi x 41 suhu x 21 kelembapan x 11 kecepatan angin
+DEFAULT_GRID = {
+    'weathersit': [1, 2, 3, 4],
+    'temp_actual': list(range(0, 41)),
+    'hum_actual': list(range(0, 101, 5)),
+    'windspeed_actual': list(range(0, 51, 5)),
+}
+# Sel matriks jam x skenario per blok (per target), sekitar 16 MB float64
+BLOCK_CELLS = 2_000_000
+
+
+def weather_grid(weathersit, temp_actual, hum_actual, windspeed_actual):
+    """Every combination of the given conditions and values (°C, %, km/h), one scenario per row.
+
+    Holds the normalized model columns (``WEATHER_COLUMNS``), their values in
+    real units, the weather label and the comfort index of each scenario.
+    """
+    codes, temps, hums, winds = (array.ravel() for array in np.meshgrid(
+        np.asarray(weathersit, dtype=np.int8), np.asarray(temp_actual, dtype=np.float64),
+        np.asarray(hum_actual, dtype=np.float64), np.asarray(windspeed_actual, dtype=np.float64),
+        indexing='ij'))
+    grid = pd.DataFrame({'weathersit': codes, 'weather_condition': label_column(codes, WEATHER_FEATURE)})
+    for source, values in (('temp', temps), ('hum', hums), ('windspeed', winds)):
+        name, factor = SCALES[source]
+        grid[name] = values
+        grid[source] = values / factor
+    grid['comfort_index'] = comfort_index(grid['temp'], grid['hum'], grid['windspeed'])
+    return grid
+
+
+def simulate(model, calendar, scenarios, by=None):
+    """Expected rentals per day of each scenario over the hours of ``calendar``.
+
+    ``model`` is a fitted ``forecast.ForecastModel``; ``scenarios`` needs the
+    ``WEATHER_COLUMNS``. Returns ``scenarios`` with ``casual``, ``registered``
+    and ``cnt`` added: the expected total over the window divided by its
+    number of days. With ``by`` (a calendar column such as ``workingday``)
+    there is one row per scenario and value of ``by``, averaged over the days
+    that have that value.
+    """
+    hours = len(calendar)
+    if by is None:
+        codes, groups = np.zeros(hours, dtype=np.intp), [None]
+    else:
+        codes, groups = pd.factorize(calendar[by], sort=True)
+    # Jumlah per grup sebagai perkalian matriks: satu kolom indikator per grup
+    members = np.zeros((hours, len(groups)))
+    members[np.arange(hours), codes] = 1.0
+    days = pd.Series(calendar['dteday'].to_numpy()).groupby(codes).nunique().to_numpy(np.float64)
+
+    calendar_part = np.exp(model.calendar_level(calendar))
+    weather_part = np.exp(model.weather_level(scenarios)) * model.smearing
+    totals = np.empty((len(groups), len(scenarios), len(TARGETS)))
+    block = max(1, BLOCK_CELLS // max(hours, 1))
+    for first in range(0, len(scenarios), block):
+        last = first + block
+        for target in range(len(TARGETS)):
+            # exp(kalender + cuaca) * smearing - 1, dipotong di nol seperti ForecastModel.predict
+            expected = np.outer(calendar_part[:, target], weather_part[first:last, target])
+            expected -= 1.0
+            np.maximum(expected, 0.0, out=expected)
+            totals[:, first:last, target] = members.T @ expected
+
+    per_day = totals / days[:, None, None]
+    result = pd.concat([scenarios] * len(groups), ignore_index=True)
+    if by is not None:
+        result[by] = np.repeat(np.asarray(groups), len(scenarios))
+    for target, name in enumerate(TARGETS):
+        result[name] = per_day[:, :, target].ravel()
+    result['cnt'] = result[TARGETS].sum(axis=1)
+    return result
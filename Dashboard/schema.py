@@ -0,0 +1,92 @@
+"""Compact in-memory layout of the main frame.
+
+``apply_schema`` drops the columns that only duplicate another column and
+downcasts the numeric columns to the narrowest dtype that holds their
+range; label and bin columns are already shared categoricals (see
+``features.py``). A dropped column can be rebuilt on demand with
+``redundant_column``.
+
+``memory_report`` compares every column with the layout the dashboard used
+before (int64/float64 numerics, object strings for labels) for the
+diagnostics view.
+"""
+import numpy as np
+import pandas as pd
+
+# Kolom numerik dan dtype ringkasnya; rentang nilai data per jam jauh di bawah batas tiap dtype.
+# casual dan registered memakai int32: data berskala atau baris ingest bisa melewati batas int16
+COLUMN_DTYPES = {
+    'instant': np.int32,
+    'season': np.int8,
+    'yr': np.int8,
+    'mnth': np.int8,
+    'hr': np.int8,
+    'holiday': np.int8,
+    'weekday': np.int8,
+    'workingday': np.int8,
+    'weathersit': np.int8,
+    'casual': np.int32,
+    'registered': np.int32,
+    'temp': np.float32,
+    'atemp': np.float32,
+    'hum': np.float32,
+    'windspeed': np.float32,
+    'atemp_actual': np.float32,
+    'hum_actual': np.float32,
+    'windspeed_actual': np.float32,
+    'comfort_index': np.float32,
+    'casual_ratio': np.float32,
+    'registered_ratio': np.float32,
+}
+# cnt tetap float64: totalnya ditampilkan utuh dan float32 tidak cukup presisi untuk jutaan rental.
+# temp_actual juga tetap float64 karena dibandingkan langsung dengan batas slider suhu
+
+# Kolom yang hanya menduplikasi kolom lain, beserta cara membangunnya kembali
+REDUNDANT_COLUMNS = {
+    'day_name': lambda frame: frame['weekday_name'].astype(object),
+    'wekday_name': lambda frame: frame['weekday_name'].astype(object),
+    'is_workingday': lambda frame: pd.Series(np.where(frame['workingday'] == 1, 'Yes', 'No'), index=frame.index),
+    'is_holiday': lambda frame: pd.Series(np.where(frame['holiday'] == 1, 'Yes', 'No'), index=frame.index),
+    'year': lambda frame: frame['dteday'].dt.year,
+    'year_label': lambda frame: frame['dteday'].dt.year.astype(str),
+    'month': lambda frame: frame['dteday'].dt.month,
+    'day': lambda frame: frame['dteday'].dt.day,
+    'date': lambda frame: frame['dteday'].dt.date,
+}
+
+
+def apply_schema(frame):
+    """Drop redundant columns and downcast numerics; returns the compact frame."""
+    frame = frame.drop(columns=[column for column in REDUNDANT_COLUMNS if column in frame])
+    return frame.astype({column: dtype for column, dtype in COLUMN_DTYPES.items() if column in frame})
+
+
+def redundant_column(frame, name):
+    """Rebuild dropped column ``name`` from the column it duplicates."""
+    return REDUNDANT_COLUMNS[name](frame)
+
+
+def _legacy_layout(column):
+    """``column`` as the dashboard stored it before the schema (object labels, 64-bit numerics)."""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        # Bin dari pd.cut memang sudah kategorikal; hanya label yang dulu berupa string object
+        return column if column.cat.ordered else column.astype(object)
+    if column.dtype.kind in 'iu':
+        return column.astype(np.int64)
+    if column.dtype.kind == 'f':
+        return column.astype(np.float64)
+    return column
+
+
+def memory_report(frame):
+    """Bytes per column now and in the pre-schema layout, dropped columns included."""
+    rows = []
+    for name in frame.columns:
+        column = frame[name]
+        rows.append((name, str(column.dtype), int(column.memory_usage(index=False, deep=True)),
+                     int(_legacy_layout(column).memory_usage(index=False, deep=True))))
+    for name in REDUNDANT_COLUMNS:
+        if name not in frame:
+            legacy = redundant_column(frame, name)
+            rows.append((name, 'dropped', 0, int(legacy.memory_usage(index=False, deep=True))))
+    return pd.DataFrame(rows, columns=['column', 'dtype', 'bytes', 'legacy_bytes'])
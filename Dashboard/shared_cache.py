@@ -0,0 +1,220 @@
+"""Cache tier shared by every dashboard process on one host.
+
+Several Streamlit replicas behind a load balancer each hold their own
+``AggregateCache``. Setting ``DASHBOARD_SHARED_CACHE`` to a directory (a
+tmpfs such as ``/dev/shm/bike-dashboard`` keeps it in memory) shares two
+things between them:
+
+* the base frame: every replica maps the Feather snapshot
+  (``load_main_data(zero_copy=True)``) instead of holding a private copy,
+  so its numeric columns live once in the page cache;
+* hot aggregates: small, plain results (frames, series, arrays, numbers and
+  tuples of them) are pickled into a SQLite file in that directory, a local
+  stand-in for a key-value server. A replica that misses its own LRU reads
+  the result another replica already computed.
+
+Keys are the ``AggregateCache`` keys, which only match across processes when
+the data version is the same everywhere (``preprocess.source_version``); a
+dataset that grows by ingestion gets random versions, and its entries are
+simply never hit by other replicas. The code version (``code_version``:
+``SNAPSHOT_VERSION`` and a hash of the dashboard modules) is part of the
+file name, so replicas running different code never read each other's
+results; the files of older versions are left for the replicas still
+running them and can be deleted once those are gone. The store is bounded by
+``DASHBOARD_SHARED_CACHE_MB`` and drops the least recently used entries.
+The last use of an entry is only written back when it is older than
+``USED_INTERVAL``, so hits do not take the write lock on every read.
+Every SQLite error and every blob that does not unpickle counts as a miss,
+and a store that cannot be opened disables the tier: the shared tier never
+fails a rerun.
+
+Entries are unpickled, so whoever can write the store can run code in
+every replica. The directory is created private to the user running the
+dashboard (mode 0700), and ``SharedStore.open`` refuses a directory owned
+by another user or writable by group or others.
+"""
+import glob
+import hashlib
+import os
+import pickle
+import sqlite3
+import stat
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from preprocess import DASHBOARD_DIR, SNAPSHOT_VERSION
+
+SHARED_CACHE_ENV = 'DASHBOARD_SHARED_CACHE'
+SHARED_CACHE_MB_ENV = 'DASHBOARD_SHARED_CACHE_MB'
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Hasil yang lebih besar (mis. frame hasil filter) lebih murah dihitung ulang daripada di-unpickle
+MAX_ITEM_BYTES = 4 * 1024 * 1024
+STORE_FILE = 'aggregates-{version}.sqlite'
+# Waktu pakai entri hanya ditulis ulang bila lebih lama dari ini (detik); cukup untuk urutan LRU
+USED_INTERVAL = 60.0
+# Waktu tunggu kunci SQLite; lebih lama dari itu dianggap miss
+BUSY_TIMEOUT = 0.5
+
+_PLAIN_TYPES = (pd.DataFrame, pd.Series, pd.Index, np.ndarray, np.generic, str, bytes, int, float, bool,
+                type(None))
+
+
+def shared_cache_dir():
+    """Directory of the shared tier from ``DASHBOARD_SHARED_CACHE``, or None when it is off."""
+    return os.environ.get(SHARED_CACHE_ENV) or None
+
+
+def code_version():
+    """``SNAPSHOT_VERSION`` and a hash of the dashboard modules, which produce the stored aggregates."""
+    digest = hashlib.sha1()
+    for path in sorted(glob.glob(os.path.join(DASHBOARD_DIR, '*.py'))):
+        with open(path, 'rb') as source:
+            digest.update(source.read())
+    return f"{SNAPSHOT_VERSION}-{digest.hexdigest()[:12]}"
+
+
+def unsafe_directory(directory):
+    """Why ``directory`` may not hold the store (another owner, open permissions), or None when it is private."""
+    info = os.stat(directory)
+    if not stat.S_ISDIR(info.st_mode):
+        return f"{directory} is not a directory"
+    if hasattr(os, 'getuid') and info.st_uid != os.getuid():
+        return f"{directory} is owned by another user"
+    if info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        return f"{directory} is writable by other users"
+    return None
+
+
+def shareable(value):
+    """True for plain data that means the same in every process (no views, indexes or other live objects)."""
+    if isinstance(value, _PLAIN_TYPES):
+        return True
+    if isinstance(value, (tuple, list)):
+        return all(shareable(item) for item in value)
+    if isinstance(value, dict):
+        return all(shareable(item) for item in value.values())
+    return False
+
+
+class SharedStore:
+    """LRU key-value store of pickled aggregates in a SQLite file, safe across processes and threads."""
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES, max_item_bytes=MAX_ITEM_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None,
+                                           check_same_thread=False)
+        # WAL: pembaca tidak menunggu penulis dari proses lain
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+                                 'nbytes INTEGER NOT NULL, used REAL NOT NULL)')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS entries_used ON entries (used)')
+
+    @classmethod
+    def open(cls, directory, max_bytes=None):
+        """Store in ``directory`` (created private if missing), or None when it is unsafe or cannot be opened."""
+        try:
+            if max_bytes is None:
+                max_mb = os.environ.get(SHARED_CACHE_MB_ENV)
+                max_bytes = int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            if unsafe_directory(directory) is not None:
+                return None
+            path = os.path.join(directory, STORE_FILE.format(version=code_version()))
+            store = cls(path, max_bytes)
+            os.chmod(path, 0o600)
+        except (OSError, ValueError, sqlite3.Error):
+            # Direktori tidak bisa ditulis, database terkunci atau ukuran tidak valid: tier bersama dimatikan
+            return None
+        return store
+
+    def get(self, key):
+        """``(True, value, pickled size)`` when ``key`` is stored, ``(False, None, 0)`` otherwise."""
+        try:
+            with self._lock:
+                row = self._connection.execute('SELECT value, used FROM entries WHERE key = ?', (key,)).fetchone()
+        except sqlite3.Error:
+            self.errors += 1
+            return False, None, 0
+        if row is None:
+            self.misses += 1
+            return False, None, 0
+        now = time.time()
+        if now - row[1] > USED_INTERVAL:
+            try:
+                with self._lock:
+                    self._connection.execute('UPDATE entries SET used = ? WHERE key = ?', (now, key))
+            except sqlite3.Error:
+                # Store sibuk: urutan LRU sedikit kurang tepat, hasilnya tetap dipakai
+                pass
+        try:
+            value = pickle.loads(row[0])
+        except Exception:
+            # Blob rusak atau ditulis versi kode lain: dianggap miss
+            self.errors += 1
+            return False, None, 0
+        self.hits += 1
+        return True, value, len(row[0])
+
+    def put(self, key, value):
+        """Store ``value`` unless it is too large or the store is busy; returns whether it was stored."""
+        try:
+            payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return False
+        if len(payload) > min(self.max_item_bytes, self.max_bytes):
+            return False
+        try:
+            with self._lock:
+                self._connection.execute('BEGIN IMMEDIATE')
+                try:
+                    self._connection.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)',
+                                             (key, payload, len(payload), time.time()))
+                    self._evict()
+                    self._connection.execute('COMMIT')
+                except BaseException:
+                    self._connection.execute('ROLLBACK')
+                    raise
+        except sqlite3.Error:
+            self.errors += 1
+            return False
+        return True
+
+    def _evict(self):
+        total = self._connection.execute('SELECT COALESCE(SUM(nbytes), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        stale = []
+        for key, nbytes in self._connection.execute('SELECT key, nbytes FROM entries ORDER BY used'):
+            if total - freed <= self.max_bytes:
+                break
+            stale.append((key,))
+            freed += nbytes
+        self._connection.executemany('DELETE FROM entries WHERE key = ?', stale)
+
+    def clear(self):
+        try:
+            with self._lock:
+                self._connection.execute('DELETE FROM entries')
+        except sqlite3.Error:
+            self.errors += 1
+
+    def stats(self):
+        try:
+            with self._lock:
+                entries, nbytes = self._connection.execute(
+                    'SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM entries').fetchone()
+        except sqlite3.Error:
+            entries = nbytes = None
+        return {'entries': entries, 'bytes': nbytes, 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses, 'errors': self.errors}
@@ -0,0 +1,327 @@
+"""Synthetic hourly rental data, fitted to ``data/data_2.csv``, for load tests.
+
+``HourlyModel.fit`` learns a small generative model from the bundled data:
+
+- the calendar: season by month/day as in the data, US federal holidays
+  plus DC Emancipation Day (the holidays of the data), workingday;
+- weather: an hourly Markov chain over ``weathersit`` per season;
+- temperature: an annual harmonic mean, an AR(1) daily anomaly and an
+  hour-of-day profile; ``atemp``, ``hum`` and ``windspeed`` follow from
+  regressions on temperature, weather and hour;
+- demand: log-linear regressions of ``casual`` and ``registered`` on hour x
+  workingday, weekday, weather, season, temperature, humidity and wind
+  (the design of ``forecast.demand_design``).
+
+Every regression keeps its residuals and the generator resamples them
+instead of assuming normal noise. Casual and registered residuals are drawn
+as pairs, which keeps their correlation. Cities get their own demand
+level and temperature offset.
+
+``HourlyModel.chunks`` yields frames in time order, each about ``chunk_rows``
+long. The chain states carry over between chunks, so any number of rows can
+be written with constant memory. ``write_dataset`` streams those chunks to
+CSV or Parquet, ``write_partitioned`` into the partition layout of
+``partitions.py``.
+
+    python Dashboard/synthetic.py out.csv --start 2011-01-01 --end 2020-12-31 --cities 50
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pandas.tseries.holiday import AbstractHolidayCalendar, Holiday, USFederalHolidayCalendar, nearest_workday
+
+from forecast import demand_design
+from partitions import CITY_COLUMN, PartitionWriter
+
+DASHBOARD_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_CSV = os.path.join(os.path.dirname(DASHBOARD_DIR), 'data', 'data_2.csv')
+
+N_WEATHER = 4
+# Pembulatan seperti di data asli, agar ukuran file sebanding
+DECIMALS = {'temp': 2, 'atemp': 4, 'hum': 2, 'windspeed': 4}
+
+
+class BikeHolidayCalendar(AbstractHolidayCalendar):
+    """The holidays of the Washington D.C. data: federal holidays plus Emancipation Day."""
+    rules = USFederalHolidayCalendar.rules + [
+        Holiday('DC Emancipation Day', month=4, day=16, observance=nearest_workday),
+    ]
+
+
+def _one_hot(codes, size):
+    return np.eye(size)[codes]
+
+
+def _harmonics(day_of_year):
+    angle = 2 * np.pi * np.asarray(day_of_year, dtype=np.float64) / 365.25
+    return np.column_stack([np.ones_like(angle), np.sin(angle), np.cos(angle),
+                            np.sin(2 * angle), np.cos(2 * angle)])
+
+
+def _fit(design, target):
+    """Least-squares coefficients and residuals of ``target`` on ``design``."""
+    coef = np.linalg.lstsq(design, target, rcond=None)[0]
+    return coef, target - design @ coef
+
+
+def _environment_design(weathersit, hr, temp):
+    return np.column_stack([_one_hot(weathersit - 1, N_WEATHER), _one_hot(hr, 24)[:, 1:], temp])
+
+
+class HourlyModel:
+    """Generative model of hourly rentals; build it with ``HourlyModel.fit``."""
+
+    def __init__(self, season_by_day, weather_start, weather_cumulative, temp_harmonics,
+                 temp_phi, temp_innovations, temp_hour_profile, temp_residuals, atemp_coef,
+                 atemp_residuals, hum_coef, hum_residuals, wind_coef, wind_residuals,
+                 demand_coef, trend_coef, demand_residuals, reference_year):
+        self.season_by_day = season_by_day
+        self.weather_start = weather_start
+        self.weather_cumulative = weather_cumulative
+        self.temp_harmonics = temp_harmonics
+        self.temp_phi = temp_phi
+        self.temp_innovations = temp_innovations
+        self.temp_hour_profile = temp_hour_profile
+        self.temp_residuals = temp_residuals
+        self.atemp_coef = atemp_coef
+        self.atemp_residuals = atemp_residuals
+        self.hum_coef = hum_coef
+        self.hum_residuals = hum_residuals
+        self.wind_coef = wind_coef
+        self.wind_residuals = wind_residuals
+        self.demand_coef = demand_coef
+        self.trend_coef = trend_coef
+        self.demand_residuals = demand_residuals
+        self.reference_year = reference_year
+
+    @classmethod
+    def fit(cls, raw):
+        """Fit the model to hourly rows with the columns of ``data/data_2.csv``."""
+        raw = raw.sort_values(['dteday', 'hr'])
+        dteday = pd.to_datetime(raw['dteday'])
+        hr = raw['hr'].to_numpy()
+        season = raw['season'].to_numpy()
+        weathersit = raw['weathersit'].to_numpy()
+        workingday = raw['workingday'].to_numpy()
+        temp, atemp = raw['temp'].to_numpy(float), raw['atemp'].to_numpy(float)
+        hum, windspeed = raw['hum'].to_numpy(float), raw['windspeed'].to_numpy(float)
+
+        # Musim per (bulan, tanggal): batas musim data asli jatuh di sekitar ekuinoks/solstis
+        season_by_day = np.zeros((13, 32), dtype=np.int8)
+        by_day = pd.Series(season).groupby([dteday.dt.month.to_numpy(), dteday.dt.day.to_numpy()]).agg(
+            lambda values: values.mode().iloc[0])
+        for (month, day), value in by_day.items():
+            season_by_day[month, day] = value
+
+        # Rantai Markov cuaca per musim, dengan pseudo-count agar kondisi langka tetap punya transisi
+        transitions = np.full((4, N_WEATHER, N_WEATHER), 0.5)
+        np.add.at(transitions, (season[1:] - 1, weathersit[:-1] - 1, weathersit[1:] - 1), 1)
+        weather_cumulative = np.cumsum(transitions / transitions.sum(axis=2, keepdims=True), axis=2)
+        weather_start = np.bincount(weathersit - 1, minlength=N_WEATHER) / len(weathersit)
+
+        # Suhu: rata-rata harian = harmonik tahunan + anomali AR(1); profil jam di atasnya
+        daily = pd.DataFrame({'date': dteday.dt.normalize(), 'temp': temp}).groupby('date')['temp'].mean()
+        temp_harmonics, anomaly = _fit(_harmonics(daily.index.dayofyear), daily.to_numpy())
+        temp_phi = float(np.corrcoef(anomaly[:-1], anomaly[1:])[0, 1])
+        temp_innovations = anomaly[1:] - temp_phi * anomaly[:-1]
+        intraday = temp - daily.reindex(dteday.dt.normalize()).to_numpy()
+        temp_hour_profile = pd.Series(intraday).groupby(hr).mean().reindex(range(24), fill_value=0).to_numpy()
+        temp_residuals = intraday - temp_hour_profile[hr]
+
+        atemp_coef, atemp_residuals = _fit(np.column_stack([np.ones_like(temp), temp]), atemp)
+        environment = _environment_design(weathersit, hr, temp)
+        hum_coef, hum_residuals = _fit(environment, hum)
+        wind_coef, wind_residuals = _fit(environment, windspeed)
+
+        demand = demand_design(hr, workingday, raw['weekday'].to_numpy(), weathersit, season,
+                                temp, hum, windspeed)
+        year = raw['yr'].to_numpy(float)
+        target = np.log1p(raw[['casual', 'registered']].to_numpy(float))
+        coef, demand_residuals = _fit(np.column_stack([demand, year]), target)
+        reference_year = int(dteday.dt.year.max())
+
+        return cls(season_by_day, weather_start, weather_cumulative, temp_harmonics,
+                   temp_phi, temp_innovations, temp_hour_profile, temp_residuals, atemp_coef,
+                   atemp_residuals, hum_coef, hum_residuals, wind_coef, wind_residuals,
+                   coef[:-1], coef[-1], demand_residuals, reference_year)
+
+    @classmethod
+    def from_csv(cls, csv_path=SOURCE_CSV):
+        return cls.fit(pd.read_csv(csv_path, parse_dates=['dteday']))
+
+    def _trend(self, years, growth):
+        """log1p-demand offset of each year relative to the last fitted year.
+
+        ``growth`` is the yearly demand growth (0.05 = +5 %); None extrapolates
+        the fitted year-over-year change, which compounds quickly over long spans.
+        """
+        since = (years - self.reference_year)[:, None]
+        if growth is None:
+            return self.trend_coef * (since + 1)
+        # Level tahun terakhir data, lalu pertumbuhan tahunan yang ditentukan
+        return self.trend_coef + np.log1p(growth) * since
+
+    def chunks(self, start, end, cities=1, chunk_rows=1_000_000, growth=0.0, seed=0):
+        """Yield frames of hourly rows from ``start`` to ``end`` (inclusive dates), in time order.
+
+        Rows are ordered by date, hour and city. A ``city`` column is added
+        when ``cities`` is above 1. The first row of each chunk continues the
+        weather chain and the temperature anomaly of the previous chunk.
+        """
+        rng = np.random.default_rng(seed)
+        dates = pd.date_range(start, end, freq='D')
+        holidays = BikeHolidayCalendar().holidays(dates.min(), dates.max())
+        city_names = np.array([f"city-{index:03d}" for index in range(cities)])
+        if cities == 1:
+            # Satu kota: sama persis dengan sistem pada data asli
+            city_level, city_temp = np.zeros(1), np.zeros(1)
+        else:
+            city_level, city_temp = rng.normal(0, 0.5, cities), rng.normal(0, 0.05, cities)
+
+        weather = rng.choice(N_WEATHER, size=cities, p=self.weather_start)
+        anomaly = np.zeros(cities)
+        instant = 0
+        days_per_chunk = max(1, chunk_rows // (24 * cities))
+        for first in range(0, len(dates), days_per_chunk):
+            block = dates[first:first + days_per_chunk]
+            frame, weather, anomaly = self._block(rng, block, holidays, city_level, city_temp,
+                                                  weather, anomaly, growth, dates[0].year)
+            frame.insert(0, 'instant', np.arange(instant + 1, instant + len(frame) + 1))
+            instant += len(frame)
+            if cities > 1:
+                frame[CITY_COLUMN] = np.tile(city_names, len(frame) // cities)
+            yield frame
+
+    def _block(self, rng, block, holidays, city_level, city_temp, weather, anomaly, growth, first_year):
+        cities = len(city_level)
+        n_days = len(block)
+        shape = (n_days, 24, cities)
+        n_rows = n_days * 24 * cities
+
+        months, days = block.month.to_numpy(), block.day.to_numpy()
+        season_day = self.season_by_day[months, days].astype(np.int64)
+        holiday_day = block.isin(holidays).astype(np.int8)
+        weekday_day = ((block.dayofweek.to_numpy() + 1) % 7).astype(np.int8)
+        workingday_day = ((weekday_day != 0) & (weekday_day != 6) & (holiday_day == 0)).astype(np.int8)
+
+        def per_row(values):
+            return np.broadcast_to(np.asarray(values).reshape(n_days, 1, 1), shape).ravel()
+
+        hr = np.broadcast_to(np.arange(24).reshape(1, 24, 1), shape).ravel()
+        season, workingday = per_row(season_day), per_row(workingday_day)
+
+        # Rantai cuaca: berurutan dalam waktu, tetapi tervektorisasi antar kota
+        states = np.empty((n_days * 24, cities), dtype=np.int64)
+        draws = rng.random((n_days * 24, cities))
+        for step in range(n_days * 24):
+            cumulative = self.weather_cumulative[season_day[step // 24] - 1, weather]
+            weather = np.minimum((draws[step][:, None] > cumulative).sum(axis=1), N_WEATHER - 1)
+            states[step] = weather
+        weathersit = states.ravel() + 1
+
+        anomalies = np.empty((n_days, cities))
+        innovations = rng.choice(self.temp_innovations, size=(n_days, cities))
+        for day in range(n_days):
+            anomaly = self.temp_phi * anomaly + innovations[day]
+            anomalies[day] = anomaly
+        daily_temp = (_harmonics(block.dayofyear) @ self.temp_harmonics)[:, None] + anomalies + city_temp
+        temp = (np.broadcast_to(daily_temp[:, None, :], shape).ravel() + self.temp_hour_profile[hr]
+                + rng.choice(self.temp_residuals, size=n_rows))
+        temp = np.clip(temp, 0.02, 1.0)
+
+        atemp = np.clip(self.atemp_coef[0] + self.atemp_coef[1] * temp
+                        + rng.choice(self.atemp_residuals, size=n_rows), 0.0, 1.0)
+        environment = _environment_design(weathersit, hr, temp)
+        hum = np.clip(environment @ self.hum_coef + rng.choice(self.hum_residuals, size=n_rows), 0.0, 1.0)
+        windspeed = np.clip(environment @ self.wind_coef + rng.choice(self.wind_residuals, size=n_rows),
+                            0.0, 0.85)
+
+        design = demand_design(hr, workingday, per_row(weekday_day), weathersit, season, temp, hum, windspeed)
+        level = design @ self.demand_coef
+        years = block.year.to_numpy()
+        level += np.broadcast_to(self._trend(years, growth)[:, None, None, :], shape + (2,)).reshape(n_rows, 2)
+        level += np.tile(city_level, n_days * 24)[:, None]
+        # Residual casual dan registered diambil berpasangan agar korelasinya tetap
+        level += self.demand_residuals[rng.integers(len(self.demand_residuals), size=n_rows)]
+        counts = np.maximum(np.rint(np.expm1(level)), 0).astype(np.int64)
+
+        frame = pd.DataFrame({
+            'dteday': per_row(block.to_numpy()),
+            'season': season,
+            'yr': per_row(years - first_year),
+            'mnth': per_row(months),
+            'hr': hr,
+            'holiday': per_row(holiday_day),
+            'weekday': per_row(weekday_day),
+            'workingday': workingday,
+            'weathersit': weathersit,
+            'temp': temp.round(DECIMALS['temp']),
+            'atemp': atemp.round(DECIMALS['atemp']),
+            'hum': hum.round(DECIMALS['hum']),
+            'windspeed': windspeed.round(DECIMALS['windspeed']),
+            'casual': counts[:, 0],
+            'registered': counts[:, 1],
+            'cnt': counts.sum(axis=1),
+        })
+        return frame, weather, anomaly
+
+
+def write_dataset(model, path, start, end, cities=1, chunk_rows=1_000_000, growth=0.0, seed=0):
+    """Stream the generated rows to ``path`` (``.csv`` or ``.parquet``); returns the row count."""
+    rows = 0
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    writer = None
+    try:
+        for chunk in model.chunks(start, end, cities, chunk_rows, growth, seed):
+            if path.endswith('.parquet'):
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table)
+            else:
+                chunk.to_csv(tmp_path, mode='a' if rows else 'w', header=not rows, index=False,
+                             date_format='%Y-%m-%d')
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp_path, path)
+    return rows
+
+
+def write_partitioned(model, root, start, end, cities=1, chunk_rows=1_000_000, growth=0.0, seed=0):
+    """Stream the generated rows into city/year/month partitions under ``root``; returns the row count."""
+    writer = PartitionWriter(root)
+    for chunk in model.chunks(start, end, cities, chunk_rows, growth, seed):
+        writer.write(chunk, city=None if CITY_COLUMN in chunk else 'city-000')
+    return writer.rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('output', help='.csv or .parquet file to write (a directory with --partitioned)')
+    parser.add_argument('--start', default='2011-01-01')
+    parser.add_argument('--end', default='2012-12-31')
+    parser.add_argument('--cities', type=int, default=1)
+    parser.add_argument('--growth', type=float, default=0.0, help='yearly demand growth, e.g. 0.05')
+    parser.add_argument('--chunk-rows', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--partitioned', action='store_true', help='write city/year/month partitions (partitions.py)')
+    args = parser.parse_args()
+
+    model = HourlyModel.from_csv()
+    start = time.perf_counter()
+    write = write_partitioned if args.partitioned else write_dataset
+    rows = write(model, args.output, args.start, args.end, args.cities, args.chunk_rows,
+                 args.growth, args.seed)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {rows:,} rows to {args.output} in {elapsed:.1f} s ({rows / elapsed:,.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,10 @@
+"""Make the dashboard modules importable from the benchmark scripts."""
+import os
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DASHBOARD_DIR = os.path.join(REPO_DIR, 'Dashboard')
+DATA_DIR = os.path.join(REPO_DIR, 'data')
+
+if DASHBOARD_DIR not in sys.path:
+    sys.path.insert(0, DASHBOARD_DIR)
@@ -0,0 +1,92 @@
+"""Anomaly detection benchmark: streaming batches vs. rescanning the history.
+
+The dashboard data (repeated ``--scale`` times, so every hour is a sum of
+copies) is split at ``--days`` before its end. The detector scans the
+history once, then the remaining hours arrive in batches of ``--batch``
+hours, as ingestion would deliver them. Each batch is folded in with
+``AnomalyDetector.extended`` on the new rows only, and compared with
+rescanning every row received so far, which is what a batch method (such
+as the IQR filter of the notebook) has to do. Both must flag the same
+hours; the script exits with status 1 otherwise.
+
+``--inject`` random hours of the streamed part are multiplied by 0.1 or 5
+before streaming, and the share of them that is flagged is reported.
+
+    python benchmarks/bench_anomalies.py --scale 10 --days 60 --batch 24 --inject 50
+"""
+import argparse
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import _paths  # noqa: F401
+from anomalies import DETECTOR_COLUMNS, AnomalyDetector
+from preprocess import load_main_data
+
+# Batch yang rescan-nya diukur (sisanya diekstrapolasi dari rata-rata)
+RESCAN_SAMPLE = 10
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, default=1, help='repeat the dashboard data this many times')
+    parser.add_argument('--days', type=int, default=60, help='days at the end that arrive in batches')
+    parser.add_argument('--batch', type=int, default=24, help='hours per ingested batch')
+    parser.add_argument('--inject', type=int, default=50, help='streamed hours turned into anomalies')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    warnings.simplefilter('ignore', FutureWarning)
+
+    data = load_main_data()[DETECTOR_COLUMNS]
+    data['cnt'] = data['cnt'].astype(np.float64)
+    split = data['dteday'].max() - pd.Timedelta(days=args.days - 1)
+    rng = np.random.default_rng(args.seed)
+    streamed = np.flatnonzero(data['dteday'].to_numpy() >= split)
+    injected = rng.choice(streamed, size=min(args.inject, len(streamed)), replace=False)
+    data.loc[injected, 'cnt'] = np.rint(data.loc[injected, 'cnt'] * rng.choice([0.1, 5.0], len(injected)))
+    rows = pd.concat([data] * args.scale, ignore_index=True) if args.scale > 1 else data
+    print(f"{len(rows):,} rows, {len(data):,} hours; streaming the last {args.days} days "
+          f"in batches of {args.batch} hours")
+
+    start = time.perf_counter()
+    detector = AnomalyDetector().extended(rows[rows['dteday'] < split])
+    print(f"history scan: {detector.hours:,} hours in {(time.perf_counter() - start) * 1000:.1f} ms, "
+          f"{len(detector.anomalies):,} flagged")
+
+    hour_of = rows['dteday'] + pd.to_timedelta(rows['hr'].astype(np.int64), unit='h')
+    hours = np.sort(hour_of[rows['dteday'] >= split].unique())
+    stream_seconds, rescan_seconds, rescans = [], [], 0
+    for batch, first in enumerate(range(0, len(hours), args.batch), start=1):
+        chunk = (hour_of >= hours[first]) & (hour_of <= hours[min(first + args.batch, len(hours)) - 1])
+        start = time.perf_counter()
+        detector = detector.extended(rows[chunk], batch)
+        stream_seconds.append(time.perf_counter() - start)
+        if batch <= RESCAN_SAMPLE:
+            start = time.perf_counter()
+            AnomalyDetector().extended(rows[hour_of <= hours[min(first + args.batch, len(hours)) - 1]])
+            rescan_seconds.append(time.perf_counter() - start)
+            rescans += 1
+    stream_ms, rescan_ms = np.mean(stream_seconds) * 1000, np.mean(rescan_seconds) * 1000
+    print(f"{len(stream_seconds):,} batches: streaming {stream_ms:.2f} ms/batch "
+          f"({stream_ms * 1000 / args.batch:.0f} us/hour), rescan {rescan_ms:.1f} ms/batch "
+          f"(first {rescans}, {rescan_ms / stream_ms:.0f}x)")
+
+    full = AnomalyDetector().extended(rows)
+    same = (len(full.anomalies) == len(detector.anomalies)
+            and (full.anomalies['time'].to_numpy() == detector.anomalies['time'].to_numpy()).all()
+            and np.allclose(full.anomalies['score'], detector.anomalies['score']))
+    print(f"streamed and full scan flag the same hours: {same} ({len(full.anomalies):,} flagged)")
+
+    injected_hours = set(hour_of[injected])
+    found = detector.anomalies[detector.anomalies['batch'] > 0]
+    hits = found['time'].isin(injected_hours).sum()
+    print(f"injected {len(injected):,} anomalies: {hits:,} flagged ({hits / max(len(injected), 1):.0%}), "
+          f"{len(found) - hits:,} other hours flagged in the streamed days")
+    sys.exit(0 if same else 1)
+
+
+if __name__ == '__main__':
+    main()
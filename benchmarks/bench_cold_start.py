@@ -0,0 +1,58 @@
+"""Cold-start benchmark: CSV parse + enrichment vs. the Feather snapshot.
+
+Each trial runs in a fresh interpreter so no pandas/pyarrow caches carry
+over between measurements; only the load call itself is timed.
+
+    python benchmarks/bench_cold_start.py --trials 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+import _paths  # noqa: F401
+
+
+def _child(mode):
+    import preprocess
+
+    if mode == 'csv':
+        start = time.perf_counter()
+        preprocess.build_main_data(preprocess.MAIN_DATA_CSV)
+    else:
+        start = time.perf_counter()
+        preprocess.load_main_data()
+    print(json.dumps({'seconds': time.perf_counter() - start}))
+
+
+def _run_trial(mode):
+    out = subprocess.run([sys.executable, __file__, '--child', mode],
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])['seconds']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--trials', type=int, default=5)
+    parser.add_argument('--child', choices=['csv', 'snapshot'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child)
+        return
+
+    import preprocess
+    preprocess.write_snapshot(preprocess.build_main_data())
+
+    results = {}
+    for mode in ('csv', 'snapshot'):
+        timings = [_run_trial(mode) for _ in range(args.trials)]
+        results[mode] = statistics.median(timings)
+        print(f"{mode:>8}: median {results[mode] * 1000:8.1f} ms over {args.trials} trials")
+    print(f"speedup: {results['csv'] / results['snapshot']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Correlation benchmark: pandas ``corr`` on filtered rows vs. cube moments and the rank index.
+
+The bundled hourly data is tiled ``--scale`` times, which grows the row
+count but not the cell count. For each filter state the Pearson matrix is
+computed by pandas and from ``CellMoments``, the Spearman matrix by pandas
+and from ``RankIndex``; the largest absolute difference is reported next to
+the timings. The last row of each scale folds the second half of the rows
+into a cube and rank index built on the first half, as ingestion does, and
+compares the result with pandas on all rows.
+
+    python benchmarks/bench_correlation.py --scale 1 10 100
+"""
+import argparse
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import _paths  # noqa: F401
+from correlation import CORR_COLUMNS, PEARSON, SPEARMAN, CellMoments, RankIndex
+from cube import Cube
+from filter_index import FilterIndex, FilterState
+from preprocess import load_main_data
+
+STATES = [
+    FilterState(None, None, 'All Seasons', 'All Weather Conditions', 'All Days', 'All Temperature Ranges',
+                -10.0, 50.0, 'All Users'),
+    FilterState(None, None, 'All Seasons', 'Clear', 'All Days', 'All Temperature Ranges',
+                -10.0, 50.0, 'All Users'),
+    FilterState(pd.Timestamp('2011-06-01').date(), pd.Timestamp('2012-05-31').date(), 'Summer',
+                'All Weather Conditions', 'Working Day', 'All Temperature Ranges', -10.0, 50.0, 'All Users'),
+    FilterState(None, None, 'All Seasons', 'All Weather Conditions', 'Weekend', 'Warm (20-30°C)',
+                -10.0, 50.0, 'Casual Dominant'),
+]
+
+
+def _timed(compute, *args):
+    start = time.perf_counter()
+    result = compute(*args)
+    return result, time.perf_counter() - start
+
+
+def _difference(expected, actual):
+    expected, actual = expected.to_numpy(), actual.to_numpy()
+    if not np.array_equal(np.isnan(expected), np.isnan(actual)):
+        return np.inf
+    both = ~np.isnan(expected)
+    return float(np.max(np.abs(expected[both] - actual[both]), initial=0.0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, nargs='+', default=[1, 10, 50])
+    args = parser.parse_args()
+    warnings.simplefilter('ignore', FutureWarning)
+
+    base = load_main_data()
+    for scale in args.scale:
+        main_data = pd.concat([base] * scale, ignore_index=True)
+        filter_index = FilterIndex(main_data)
+        cube = Cube(main_data)
+        _, moments_build = _timed(CellMoments.from_rows, main_data, np.zeros(len(main_data), dtype=np.int64), 1)
+        ranks = RankIndex(main_data)
+        all_rows = np.arange(len(main_data))
+        _, ranks_build = _timed(ranks.spearman, CORR_COLUMNS, all_rows)
+        print(f"{len(main_data):>12,} rows {cube.n_cells:>8,} cells  moments build ~{moments_build * 1000:.0f} ms  "
+              f"rank build (first Spearman) {ranks_build * 1000:.0f} ms")
+
+        for state in STATES:
+            rows = filter_index.resolve(state)
+            filtered_data = main_data.take(rows)
+            cells = cube.cell_mask(state)
+            for method, fast in ((PEARSON, lambda: cube.corr(CORR_COLUMNS, cells)),
+                                 (SPEARMAN, lambda: ranks.spearman(CORR_COLUMNS, rows))):
+                expected, pandas_time = _timed(filtered_data[CORR_COLUMNS].corr, method)
+                if method == PEARSON and cells is None:
+                    print(f"    {method:>8} {len(rows):>10,} rows: the temperature slider straddles cells")
+                    continue
+                actual, fast_time = _timed(fast)
+                print(f"    {method:>8} {len(rows):>10,} rows  pandas {pandas_time * 1000:8.1f} ms  "
+                      f"fast {fast_time * 1000:7.1f} ms  ({pandas_time / fast_time:6.1f}x)  "
+                      f"max diff {_difference(expected, actual):.1e}")
+
+        half = len(main_data) // 2
+        first, second = main_data.iloc[:half], main_data.iloc[half:]
+        merged_cube, extend_time = _timed(Cube(first).extended, second)
+        merged_ranks = RankIndex(first)
+        merged_ranks.spearman(CORR_COLUMNS, np.arange(half))
+        merged_ranks = merged_ranks.extended(main_data, second)
+        pearson = _difference(main_data[CORR_COLUMNS].corr(),
+                              merged_cube.corr(CORR_COLUMNS, np.ones(merged_cube.n_cells, dtype=bool)))
+        spearman = _difference(main_data[CORR_COLUMNS].corr(SPEARMAN),
+                               merged_ranks.spearman(CORR_COLUMNS, all_rows))
+        print(f"    extended by {len(second):,} rows in {extend_time * 1000:.0f} ms  "
+              f"max diff pearson {pearson:.1e} spearman {spearman:.1e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""Chart aggregate benchmark: pandas groupby on filtered rows vs. the cubes.
+
+The bundled hourly data is tiled ``--scale`` times (as if several stations
+reported the same hours), which grows the row count but not the cell count.
+
+The cell count must also stay bounded on new hours: synthetic data over
+``--years`` and twice as many years, for each of ``--cities`` (several
+cities are written as partitions and keyed by city), is folded into every
+cube without a calendar period (the default cube and the chart projections
+of ``rollups.py``). Their cells may grow by at most ``MAX_CELL_GROWTH``
+while the rows double; the benchmark exits with status 1 otherwise. The
+period tiers grow with the number of days, weeks and months by design and
+are only reported.
+
+    python benchmarks/bench_cube.py --scale 1 10 100 --years 2 --cities 1 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import pandas as pd
+
+import _paths  # noqa: F401
+from backends import FrameView
+from cube import Cube
+from filter_index import FilterIndex, FilterState
+from partitions import PartitionCatalog, load_partitions
+from preprocess import build_main_data, load_main_data
+from rollups import CUBE_KEYS, SOURCES, TIERS, Rollups
+from synthetic import HourlyModel, write_dataset, write_partitioned
+
+# (group columns, value columns) of the bar/line charts in the dashboard
+CHART_GROUPS = [
+    ('weather_condition', 'cnt'), (['weather_condition', 'hr'], 'cnt'), ('temp_category', 'cnt'),
+    ('comfort_category', 'cnt'), ('season_name', 'cnt'), ('month_name', 'cnt'),
+    ('weekday_name', 'cnt'), (['workingday_label', 'hr'], 'cnt'), ('time_category', 'cnt'),
+    ('season_name', ['casual', 'registered']), ('weather_condition', ['casual', 'registered']),
+    ('weekday_name', ['casual', 'registered']), ('hr', ['casual', 'registered']),
+    ('temp_category', ['casual', 'registered']), ('season_name', 'comfort_index'),
+    ('windspeed_category', 'cnt'),
+]
+STATE = FilterState(None, None, 'All Seasons', 'Clear', 'All Days', 'All Temperature Ranges',
+                    0.0, 50.0, 'All Users')
+# Pertumbuhan sel maksimum saat jumlah baris berlipat dua (kubus tanpa periode)
+MAX_CELL_GROWTH = 1.5
+
+
+def _synthetic(model, tmp, years, cities, seed):
+    end = f"{2011 + years - 1}-12-31"
+    if cities == 1:
+        path = os.path.join(tmp, f"synthetic_{years}.csv")
+        write_dataset(model, path, '2011-01-01', end, seed=seed)
+        return build_main_data(path)
+    # Beberapa kota dibaca dari partisi, seperti DASHBOARD_PARTITIONS
+    root = os.path.join(tmp, f"partitions_{years}")
+    write_partitioned(model, root, '2011-01-01', end, cities=cities, seed=seed)
+    catalog = PartitionCatalog(root)
+    return load_partitions(catalog, catalog.partitions)
+
+
+def cell_growth(years, cities, seed):
+    """(rows, cells per cube) of synthetic data over ``years`` and twice as many years."""
+    model = HourlyModel.from_csv()
+    sizes = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for span in (years, 2 * years):
+            main_data = _synthetic(model, tmp, span, cities, seed)
+            sizes.append((len(main_data), {name: Cube(main_data, CUBE_KEYS[name]).n_cells for name in SOURCES}))
+    return sizes
+
+
+def check_bounded(years, cities, seed):
+    """Print the cells per cube as the rows double; returns the cubes that grew too much."""
+    (rows, cells), (double_rows, double_cells) = cell_growth(years, cities, seed)
+    print(f"cells per cube, {cities} {'city' if cities == 1 else 'cities'}, "
+          f"{rows:,} -> {double_rows:,} rows ({double_rows / rows:.2f}x):")
+    unbounded = []
+    for name in SOURCES:
+        growth = double_cells[name] / cells[name]
+        bounded = name in TIERS or growth <= MAX_CELL_GROWTH
+        print(f"    {name:>10} {cells[name]:>8,} -> {double_cells[name]:>8,} ({growth:.2f}x, "
+              f"{double_cells[name] / double_rows:.1%} of the rows)"
+              + ('  per period' if name in TIERS else '' if bounded else '  UNBOUNDED'))
+        if not bounded:
+            unbounded.append(name)
+    return unbounded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--years', type=int, default=2, help='synthetic years for the bounded-cells check')
+    parser.add_argument('--cities', type=int, nargs='+', default=[1, 4],
+                        help='synthetic cities for the bounded-cells check (more than one are partitioned)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    warnings.simplefilter('ignore', FutureWarning)
+
+    base = load_main_data()
+    for scale in args.scale:
+        main_data = pd.concat([base] * scale, ignore_index=True)
+        filtered_data = main_data.take(FilterIndex(main_data).resolve(STATE))
+
+        # Semua kubus dibangun saat select pertama
+        start = time.perf_counter()
+        rollups = Rollups(main_data)
+        tiers = rollups.select(STATE)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for group_cols, value_cols in CHART_GROUPS:
+            filtered_data.groupby(group_cols)[value_cols].mean().reset_index()
+        pandas_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        view = FrameView(filtered_data, rollups.select(STATE))
+        for group_cols, value_cols in CHART_GROUPS:
+            view.mean(group_cols, value_cols)
+        cube_time = time.perf_counter() - start
+
+        cells = sum(tier.cube.n_cells for tier in tiers)
+        print(f"{len(main_data):>12,} rows {cells:>8,} cells  build {build_time * 1000:8.1f} ms  "
+              f"groupby {pandas_time * 1000:8.1f} ms  cube {cube_time * 1000:6.1f} ms")
+
+    unbounded = [f"{name} ({cities} cities)" for cities in args.cities
+                 for name in check_bounded(args.years, cities, args.seed)]
+    if unbounded:
+        print(f"cells grew more than {MAX_CELL_GROWTH}x for twice the rows: {', '.join(unbounded)}")
+    sys.exit(1 if unbounded else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,306 @@
+"""Dashboard benchmark: headless reruns of ``Dashboard.py`` over a sweep of sidebar filters.
+
+The script runs under Streamlit's ``AppTest`` against ``data/data_2.csv``
+scaled ``--scales`` times (selected through ``DASHBOARD_DATA_PATH``). Every
+scale runs in a fresh interpreter, so the data, index and aggregate caches
+start cold and the peak RSS belongs to that scale alone.
+
+The sweep covers every single season / weather / day type / temperature /
+user type filter, a date range, a narrow temperature slider and
+``--combos`` random combinations of them. Each combination is rerun
+``--repeat`` times: the first rerun misses the aggregate cache, the
+repeats hit it. The JSON written to ``--output`` holds every rerun (latency,
+charts, Plotly JSON bytes, exceptions) plus p50/p95 latency, peak RSS and
+payload sizes per scale; ``--compare`` checks a run against such a
+baseline and exits non-zero on regressions.
+
+Copies beyond the first are extra systems over the same hours: weather and
+calendar are kept, casual and registered counts are jittered per row. With
+``--synthetic`` the datasets come from ``synthetic.HourlyModel`` instead, one
+generated city per scale unit over the same two years.
+
+    python benchmarks/bench_dashboard.py --scales 10,100,1000 --output dashboard_baseline.json
+    python benchmarks/bench_dashboard.py --scales 10 --compare dashboard_baseline.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+import _paths
+from features import LABEL_FEATURES, BIN_FEATURES
+from filter_index import (ALL_DAYS, ALL_SEASONS, ALL_TEMPS, ALL_USERS, ALL_WEATHER,
+                          DAY_TYPE_OPTIONS, USER_TYPE_OPTIONS)
+from preprocess import DATA_PATH_ENV, main_data_paths
+from synthetic import HourlyModel, write_dataset
+
+DASHBOARD_SCRIPT = os.path.join(_paths.DASHBOARD_DIR, 'Dashboard.py')
+RAW_CSV = os.path.join(_paths.DATA_DIR, 'data_2.csv')
+
+SEASONS = LABEL_FEATURES[0].labels
+WEATHERS = LABEL_FEATURES[1].labels
+TEMP_CATEGORIES = BIN_FEATURES[0].labels
+
+# Label widget sidebar -> kunci kombinasi filter
+SELECTBOXES = {
+    'Select Season': 'season',
+    'Select Weather Condition': 'weather',
+    'Select Day Type': 'day_type',
+    'Select Temperature Range': 'temp_category',
+    'Select User Type': 'user_type',
+}
+DEFAULT_COMBO = {'name': 'all', 'season': ALL_SEASONS, 'weather': ALL_WEATHER, 'day_type': ALL_DAYS,
+                 'temp_category': ALL_TEMPS, 'user_type': ALL_USERS, 'dates': None, 'temp_range': None}
+CHOICES = {
+    'season': SEASONS,
+    'weather': WEATHERS,
+    'day_type': DAY_TYPE_OPTIONS[1:],
+    'temp_category': TEMP_CATEGORIES,
+    'user_type': USER_TYPE_OPTIONS[1:],
+}
+DATE_RANGES = [('2011-01-01', '2011-12-31'), ('2012-06-01', '2012-08-31'), ('2012-12-01', '2012-12-31')]
+TEMP_RANGES = [(10.0, 25.0), (20.0, 35.0), (0.0, 12.0)]
+
+
+def filter_combos(n_random, seed):
+    """Baseline, every single filter, a date range, a temperature slider and ``n_random`` mixes."""
+    combos = [dict(DEFAULT_COMBO)]
+    for key, values in CHOICES.items():
+        for value in values:
+            combos.append(dict(DEFAULT_COMBO, name=f"{key}={value}", **{key: value}))
+    combos.append(dict(DEFAULT_COMBO, name='dates=2011', dates=DATE_RANGES[0]))
+    combos.append(dict(DEFAULT_COMBO, name='temp=10-25', temp_range=TEMP_RANGES[0]))
+
+    rng = np.random.default_rng(seed)
+    for i in range(n_random):
+        # Tiap dimensi aktif dengan peluang 1/2
+        combo = dict(DEFAULT_COMBO, name=f"random-{i}")
+        for key, values in CHOICES.items():
+            if rng.random() < 0.5:
+                combo[key] = values[rng.integers(len(values))]
+        if rng.random() < 0.5:
+            combo['dates'] = DATE_RANGES[rng.integers(len(DATE_RANGES))]
+        if rng.random() < 0.5:
+            combo['temp_range'] = TEMP_RANGES[rng.integers(len(TEMP_RANGES))]
+        combos.append(combo)
+    return combos
+
+
+def write_scaled_csv(path, scale, seed):
+    """Write ``data_2.csv`` repeated ``scale`` times to ``path``, one copy at a time."""
+    raw = pd.read_csv(RAW_CSV)
+    rng = np.random.default_rng(seed)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    for copy in range(scale):
+        chunk = raw.copy()
+        chunk['instant'] = np.arange(copy * len(raw), (copy + 1) * len(raw)) + 1
+        if copy:
+            for column in ('casual', 'registered'):
+                jitter = rng.lognormal(0.0, 0.2, len(raw))
+                chunk[column] = np.rint(raw[column] * jitter).astype(np.int64)
+            chunk['cnt'] = chunk['casual'] + chunk['registered']
+        chunk.to_csv(tmp_path, mode='w' if copy == 0 else 'a', header=copy == 0, index=False)
+    os.replace(tmp_path, path)
+    return len(raw) * scale
+
+
+def _set_filters(at, combo):
+    """Set the sidebar to ``combo``; False when the data offers no such option (e.g. an empty bin)."""
+    for selectbox in at.selectbox:
+        if selectbox.label in SELECTBOXES:
+            value = combo[SELECTBOXES[selectbox.label]]
+            if value not in selectbox.options:
+                return False
+            selectbox.set_value(value)
+    dates = at.date_input[0]
+    if combo['dates'] is None:
+        dates.set_value((dates.min, dates.max))
+    else:
+        start, end = (datetime.date.fromisoformat(value) for value in combo['dates'])
+        dates.set_value((max(start, dates.min), min(end, dates.max)))
+    slider = at.slider[0]
+    if combo['temp_range'] is None:
+        slider.set_value((slider.min, slider.max))
+    else:
+        low, high = combo['temp_range']
+        slider.set_value((max(low, slider.min), min(high, slider.max)))
+    return True
+
+
+def _run(at):
+    start = time.perf_counter()
+    at.run()
+    seconds = time.perf_counter() - start
+    charts = at.get('plotly_chart')
+    return {'seconds': seconds, 'charts': len(charts),
+            'chart_bytes': sum(len(chart.proto.spec) for chart in charts),
+            'exceptions': [exception.value.splitlines()[0] if exception.value else '' for exception in at.exception]}
+
+
+def _child(csv_path, combos_path, repeat, timeout):
+    """Run the sweep for one dataset and print its records as JSON."""
+    from streamlit.testing.v1 import AppTest
+
+    os.environ[DATA_PATH_ENV] = csv_path
+    with open(combos_path, encoding='utf-8') as handle:
+        combos = json.load(handle)
+
+    at = AppTest.from_file(DASHBOARD_SCRIPT, default_timeout=timeout)
+    cold = _run(at)
+    # Snapshot ditulis oleh rerun pertama; jumlah barisnya dibaca dari metadata Arrow saja
+    rows = feather.read_table(main_data_paths()[1], columns=[], memory_map=True).num_rows
+    records, skipped = [], []
+    for combo in combos:
+        for attempt in range(repeat):
+            if not _set_filters(at, combo):
+                skipped.append(combo['name'])
+                break
+            records.append(dict(_run(at), combo=combo['name'], attempt=attempt))
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    print(json.dumps({'rows': rows, 'cold_start': cold, 'reruns': records, 'skipped': skipped, 'peak_rss_bytes': peak_rss}))
+
+
+def _percentiles(values):
+    if not values:
+        return {'p50': None, 'p95': None}
+    return {'p50': float(np.percentile(values, 50)), 'p95': float(np.percentile(values, 95))}
+
+
+def summarize(result):
+    reruns = result['reruns']
+    misses = [record['seconds'] for record in reruns if record['attempt'] == 0]
+    hits = [record['seconds'] for record in reruns if record['attempt'] > 0]
+    payloads = [record['chart_bytes'] for record in reruns]
+    return {
+        'cold_start_seconds': result['cold_start']['seconds'],
+        'rerun_seconds': _percentiles([record['seconds'] for record in reruns]),
+        'cache_miss_seconds': _percentiles(misses),
+        'cache_hit_seconds': _percentiles(hits),
+        'peak_rss_bytes': result['peak_rss_bytes'],
+        'chart_bytes': dict(_percentiles(payloads), max=max(payloads) if payloads else None),
+        'charts_per_rerun': _percentiles([record['charts'] for record in reruns]),
+        'failed_reruns': sum(1 for record in reruns if record['exceptions']),
+    }
+
+
+def run_scale(scale, args, combos_path):
+    kind = 'synthetic' if args.synthetic else 'data_2'
+    csv_path = os.path.join(args.data_dir, f"{kind}_x{scale}_seed{args.seed}.csv")
+    if not os.path.exists(csv_path):
+        start = time.perf_counter()
+        if args.synthetic:
+            write_dataset(HourlyModel.from_csv(RAW_CSV), csv_path, '2011-01-01', '2012-12-31',
+                          cities=scale, seed=args.seed)
+        else:
+            write_scaled_csv(csv_path, scale, args.seed)
+        print(f"x{scale}: wrote {csv_path} in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+    env = dict(os.environ, DASHBOARD_LAZY_TABS='0' if args.all_tabs else '1')
+    command = [sys.executable, __file__, '--child', csv_path, combos_path,
+               '--repeat', str(args.repeat), '--timeout', str(args.timeout)]
+    process = subprocess.run(command, capture_output=True, text=True, env=env)
+    if process.returncode != 0:
+        # Mis. kehabisan memori pada skala terbesar (exit -9): dicatat, sweep skala lain tetap berjalan
+        return {'scale': scale, 'error': f"exit {process.returncode}",
+                'stderr_tail': process.stderr.strip().splitlines()[-5:]}
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    return dict(result, scale=scale, summary=summarize(result))
+
+
+def compare(report, baseline, tolerance):
+    """Metrics of ``report`` more than ``tolerance`` worse than the same scale in ``baseline``."""
+    previous = {entry['scale']: entry['summary'] for entry in baseline['scales'] if 'summary' in entry}
+    regressions = []
+    for entry in report['scales']:
+        old = previous.get(entry['scale'])
+        if old is None or 'summary' not in entry:
+            continue
+        new = entry['summary']
+        checks = [('rerun p95', new['rerun_seconds']['p95'], old['rerun_seconds']['p95']),
+                  ('cache miss p95', new['cache_miss_seconds']['p95'], old['cache_miss_seconds']['p95']),
+                  ('peak RSS', new['peak_rss_bytes'], old['peak_rss_bytes']),
+                  ('chart bytes p95', new['chart_bytes']['p95'], old['chart_bytes']['p95'])]
+        for name, value, reference in checks:
+            if value is not None and reference and value > reference * (1 + tolerance):
+                regressions.append(f"x{entry['scale']} {name}: {value:.4g} vs {reference:.4g}")
+    return regressions
+
+
+def _print_summary(entry):
+    if 'error' in entry:
+        print(f"x{entry['scale']:<5} failed: {entry['error']}")
+        return
+    summary = entry['summary']
+    print(f"x{entry['scale']:<5} cold {summary['cold_start_seconds']:7.2f} s  "
+          f"rerun p50 {summary['rerun_seconds']['p50'] * 1000:8.1f} ms  p95 {summary['rerun_seconds']['p95'] * 1000:8.1f} ms  "
+          f"miss p95 {summary['cache_miss_seconds']['p95'] * 1000:8.1f} ms  "
+          f"peak RSS {summary['peak_rss_bytes'] / 2 ** 20:7.0f} MB  "
+          f"charts p95 {summary['chart_bytes']['p95'] / 1e3:7.0f} KB  failed {summary['failed_reruns']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', default='10,100,1000')
+    parser.add_argument('--combos', type=int, default=12, help='random filter combinations on top of the fixed ones')
+    parser.add_argument('--repeat', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--synthetic', action='store_true', help='generate the datasets with synthetic.py')
+    parser.add_argument('--all-tabs', action='store_true', help='render every tab (DASHBOARD_LAZY_TABS=0)')
+    parser.add_argument('--timeout', type=float, default=600, help='seconds allowed for a single rerun')
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'dashboard_bench'))
+    parser.add_argument('--output', default='dashboard_baseline.json')
+    parser.add_argument('--compare', metavar='BASELINE', help='fail when worse than this baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--child', nargs=2, metavar=('CSV', 'COMBOS'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(*args.child, args.repeat, args.timeout)
+        return
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    combos = filter_combos(args.combos, args.seed)
+    combos_path = os.path.join(args.data_dir, f"combos_{os.getpid()}.json")
+    with open(combos_path, 'w', encoding='utf-8') as handle:
+        json.dump(combos, handle)
+
+    report = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'settings': {'combos': len(combos), 'repeat': args.repeat, 'seed': args.seed, 'all_tabs': args.all_tabs,
+                     'synthetic': args.synthetic},
+        'scales': [],
+    }
+    try:
+        for scale in [int(value) for value in args.scales.split(',')]:
+            entry = run_scale(scale, args, combos_path)
+            report['scales'].append(entry)
+            _print_summary(entry)
+    finally:
+        os.remove(combos_path)
+
+    with open(args.output, 'w', encoding='utf-8') as handle:
+        json.dump(report, handle, indent=1)
+    print(f"wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as handle:
+            regressions = compare(report, json.load(handle), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
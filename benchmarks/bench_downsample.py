@@ -0,0 +1,60 @@
+"""Scatter payload benchmark: full rows vs. the downsampling layer.
+
+Builds the heaviest scatter/3D figures from the dashboard on the bundled data
+tiled ``--scale`` times and reports figure JSON size and build+serialize time
+(the server-side part of a render; browser paint time is not measured here).
+
+    python benchmarks/bench_downsample.py --scale 1 5
+"""
+import argparse
+import time
+
+import pandas as pd
+import plotly.express as px
+
+import _paths  # noqa: F401
+from downsample import DEFAULT_POINT_BUDGET, MODE_ALL, MODE_BINS, MODE_SAMPLE, reduce_points
+from preprocess import load_main_data
+
+CHARTS = {
+    'temp scatter': (['temp_actual', 'cnt'], 'season_name', (),
+                     lambda data, size: px.scatter(data, x='temp_actual', y='cnt', color='season_name', size=size)),
+    'bubble': (['temp_actual', 'hum_actual'], 'season_name', ['cnt', 'windspeed_actual'],
+               lambda data, size: px.scatter(data, x='temp_actual', y='hum_actual', size=size, color='season_name',
+                                             hover_name='dteday' if 'dteday' in data else None,
+                                             hover_data=['windspeed_actual', 'cnt'])),
+    '3d scatter': (['temp_actual', 'hum_actual', 'cnt'], 'season_name', (),
+                   lambda data, size: px.scatter_3d(data, x='temp_actual', y='hum_actual', z='cnt',
+                                                    color='season_name', size=size, opacity=0.7)),
+}
+
+
+def measure(build, points):
+    start = time.perf_counter()
+    # Bin kepadatan: ukuran penanda = jumlah baris di bin, seperti di dashboard
+    payload = build(points.data, 'points' if points.aggregated else 'cnt').to_json()
+    return len(payload), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, nargs='+', default=[1, 5])
+    parser.add_argument('--budget', type=int, default=DEFAULT_POINT_BUDGET)
+    args = parser.parse_args()
+
+    base = load_main_data()
+    for scale in args.scale:
+        main_data = pd.concat([base] * scale, ignore_index=True)
+        print(f"--- {len(main_data):,} rows, budget {args.budget:,} points")
+        for name, (axes, color, values, build) in CHARTS.items():
+            for mode in (MODE_ALL, MODE_SAMPLE, MODE_BINS):
+                start = time.perf_counter()
+                points = reduce_points(main_data, axes, args.budget, mode, color, values)
+                reduce_time = time.perf_counter() - start
+                size, render_time = measure(build, points)
+                print(f"{name:>12} {mode:>17}: {len(points.data):>9,} markers {size / 1024:10.0f} KB "
+                      f"reduce {reduce_time * 1000:7.1f} ms  build+json {render_time * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Feature benchmark: per-row ``apply``/``map`` derivations vs. ``features.derive_features``.
+
+The raw columns of the bundled data are tiled ``--scale`` times. Besides the
+wall time, the number of Python function calls is counted with cProfile at
+1x and at ``--scale``: the legacy path grows with the row count (one
+``categorize_time`` call per row), the vectorized path does not.
+
+    python benchmarks/bench_features.py --scale 50
+"""
+import argparse
+import cProfile
+import pstats
+import time
+
+import pandas as pd
+
+import _paths  # noqa: F401
+from features import derive_features
+from ingest import RAW_COLUMNS
+from preprocess import read_main_csv
+
+
+def legacy_features(main_data):
+    """The per-row derivations the dashboard used before ``features.py`` (labels, bins, time_category)."""
+    main_data['season_name'] = main_data['season'].map({1: 'Winter', 2: 'Spring', 3: 'Summer', 4: 'Fall'})
+    main_data['weather_condition'] = main_data['weathersit'].map(
+        {1: 'Clear', 2: 'Mist/Cloudy', 3: 'Light Rain/Snow', 4: 'Heavy Rain/Snow'})
+    main_data['weekday_name'] = main_data['weekday'].map(
+        {0: 'Sunday', 1: 'Monday', 2: 'Tuesday', 3: 'Wednesday', 4: 'Thursday', 5: 'Friday', 6: 'Saturday'})
+    main_data['temp_actual'] = main_data['temp'] * 41
+    main_data['temp_category'] = pd.cut(
+        main_data['temp_actual'], bins=[-20, 0, 10, 20, 30, 50],
+        labels=['Very Cold (< 0°C)', 'Cold (0-10°C)', 'Mild (10-20°C)', 'Warm (20-30°C)', 'Hot (> 30°C)'])
+
+    def categorize_time(hour):
+        if 6 <= hour <= 9:
+            return 'Morning Peak'
+        elif 10 <= hour <= 15:
+            return 'Day Time'
+        elif 16 <= hour <= 19:
+            return 'Evening Peak'
+        else:
+            return 'Night Time'
+
+    main_data['time_category'] = main_data['hr'].apply(categorize_time)
+    main_data['date'] = main_data['dteday'].dt.date
+    return main_data
+
+
+def profile_calls(func, raw):
+    profiler = cProfile.Profile()
+    frame = raw.copy()
+    profiler.enable()
+    func(frame)
+    profiler.disable()
+    return pstats.Stats(profiler).total_calls
+
+
+def best_of(func, raw, repeat):
+    timings = []
+    for _ in range(repeat):
+        frame = raw.copy()
+        start = time.perf_counter()
+        result = func(frame)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    raw = read_main_csv()[RAW_COLUMNS]
+    scaled = pd.concat([raw] * args.scale, ignore_index=True)
+
+    legacy_time, legacy = best_of(legacy_features, scaled, args.repeat)
+    vector_time, vector = best_of(derive_features, scaled, args.repeat)
+    for column in ['season_name', 'weather_condition', 'weekday_name', 'temp_category', 'time_category']:
+        assert legacy[column].astype(str).equals(vector[column].astype(str)), column
+    print(f"{len(scaled):,} rows  legacy {legacy_time * 1000:8.1f} ms  "
+          f"vectorized {vector_time * 1000:8.1f} ms (all {len(vector.columns) - len(RAW_COLUMNS)} columns)")
+    legacy_bytes = legacy.memory_usage(deep=True)[['season_name', 'weather_condition', 'time_category']].sum()
+    vector_bytes = vector.memory_usage(deep=True)[['season_name', 'weather_condition', 'time_category']].sum()
+    print(f"label columns: {legacy_bytes / 1e6:.1f} MB as object, {vector_bytes / 1e6:.1f} MB as categorical")
+
+    for name, func in (('legacy', legacy_features), ('vectorized', derive_features)):
+        small, large = profile_calls(func, raw), profile_calls(func, scaled)
+        print(f"{name:>10}: {small:,} Python calls at 1x, {large:,} at {args.scale}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Figure pool benchmark: full-dashboard reruns with 0 (serial) to N figure workers.
+
+Runs ``bench_dashboard.py --all-tabs`` once per ``--workers`` value with
+``DASHBOARD_FIGURE_WORKERS`` set accordingly, on the same dataset and filter
+sweep, and prints the rerun latencies and the speedup over the serial run.
+Every tab is rendered, so each rerun builds all 36 figures; aggregates come
+from the cache after the first attempt of a combination, figures never do.
+Latencies only count reruns that drew every chart (a rerun that fails part
+way builds fewer figures). Peak RSS is the script process alone, without
+the worker processes.
+
+    python benchmarks/bench_figures.py --synthetic --scale 100 --workers 0,2,4,8
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import _paths  # noqa: F401
+from bench_dashboard import _percentiles
+from figures import FIGURE_WORKERS_ENV
+
+BENCH_DASHBOARD = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_dashboard.py')
+
+
+def run(workers, args, output):
+    command = [sys.executable, BENCH_DASHBOARD, '--all-tabs', '--scales', str(args.scale),
+               '--combos', str(args.combos), '--repeat', str(args.repeat), '--seed', str(args.seed),
+               '--output', output]
+    if args.synthetic:
+        command.append('--synthetic')
+    env = dict(os.environ, **{FIGURE_WORKERS_ENV: str(workers)})
+    subprocess.run(command, check=True, env=env, stdout=subprocess.DEVNULL)
+    with open(output, encoding='utf-8') as handle:
+        entry = json.load(handle)['scales'][0]
+    if 'summary' not in entry:
+        raise SystemExit(f"{workers} workers: {entry.get('error')}\n" + '\n'.join(entry.get('stderr_tail', [])))
+    complete = [record['seconds'] for record in entry['reruns'] if not record['exceptions']]
+    return dict(entry['summary'], rerun_seconds=_percentiles(complete), complete_reruns=len(complete))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, default=100)
+    parser.add_argument('--synthetic', action='store_true', help='generate the dataset with synthetic.py')
+    parser.add_argument('--workers', default='0,2,4,8', help='figure worker counts; 0 builds in the script thread')
+    parser.add_argument('--combos', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, x{args.scale} {'synthetic' if args.synthetic else 'data_2'} data, all tabs")
+    serial = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in [int(value) for value in args.workers.split(',')]:
+            summary = run(workers, args, os.path.join(tmp, f"workers_{workers}.json"))
+            p50, p95 = summary['rerun_seconds']['p50'], summary['rerun_seconds']['p95']
+            serial = serial or p50
+            print(f"{workers:>3} workers  rerun p50 {p50 * 1000:8.1f} ms  p95 {p95 * 1000:8.1f} ms  "
+                  f"cold {summary['cold_start_seconds']:6.2f} s  peak RSS {summary['peak_rss_bytes'] / 2 ** 20:6.0f} MB  "
+                  f"speedup {serial / p50:4.2f}x  ({summary['complete_reruns']} complete reruns)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Filter benchmark: copy-then-mask chain vs. the precomputed FilterIndex.
+
+The bundled data is tiled ``--scale`` times to mimic several cities'
+worth of hourly rows.
+
+    python benchmarks/bench_filters.py --scale 50
+"""
+import argparse
+import datetime
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import _paths  # noqa: F401
+from filter_index import FilterIndex, FilterState
+from preprocess import load_main_data
+
+STATES = [
+    FilterState(None, None, 'All Seasons', 'All Weather Conditions', 'All Days',
+                'All Temperature Ranges', 0.0, 50.0, 'All Users'),
+    FilterState(datetime.date(2012, 1, 1), datetime.date(2012, 6, 30), 'All Seasons',
+                'All Weather Conditions', 'All Days', 'All Temperature Ranges', 0.0, 50.0, 'All Users'),
+    FilterState(datetime.date(2011, 6, 1), datetime.date(2012, 5, 31), 'Summer', 'Clear',
+                'Working Day', 'Warm (20-30°C)', 15.0, 35.0, 'Registered Dominant'),
+    FilterState(datetime.date(2012, 1, 1), datetime.date(2012, 12, 31), 'All Seasons',
+                'Mist/Cloudy', 'Weekend', 'All Temperature Ranges', 5.0, 30.0, 'Balanced'),
+]
+
+
+def copy_then_mask(main_data, state):
+    filtered_data = main_data.copy()
+    if state.date_start is not None:
+        filtered_data = filtered_data[(filtered_data['dteday'].dt.date >= state.date_start) &
+                                      (filtered_data['dteday'].dt.date <= state.date_end)]
+    if state.season != 'All Seasons':
+        filtered_data = filtered_data[filtered_data['season_name'] == state.season]
+    if state.weather != 'All Weather Conditions':
+        filtered_data = filtered_data[filtered_data['weather_condition'] == state.weather]
+    if state.day_type == 'Working Day':
+        filtered_data = filtered_data[filtered_data['workingday'] == 1]
+    elif state.day_type == 'Weekend':
+        filtered_data = filtered_data[(filtered_data['weekday'] == 0) | (filtered_data['weekday'] == 6)]
+    if state.temp_category != 'All Temperature Ranges':
+        filtered_data = filtered_data[filtered_data['temp_category'] == state.temp_category]
+    filtered_data = filtered_data[(filtered_data['temp_actual'] >= state.temp_min) &
+                                  (filtered_data['temp_actual'] <= state.temp_max)]
+    if state.user_type == 'Registered Dominant':
+        filtered_data = filtered_data[filtered_data['registered'] > filtered_data['casual']]
+    elif state.user_type == 'Balanced':
+        filtered_data = filtered_data[abs(filtered_data['casual'] - filtered_data['registered']) /
+                                      filtered_data['cnt'] < 0.1]
+    return filtered_data
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def allocated_bytes(func):
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    main_data = pd.concat([load_main_data()] * args.scale, ignore_index=True)
+    start = time.perf_counter()
+    index = FilterIndex(main_data)
+    print(f"{len(main_data):,} rows, index built in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    for state in STATES:
+        chain_time, chain_rows = best_of(lambda: copy_then_mask(main_data, state), args.repeat)
+        index_time, index_rows = best_of(lambda: main_data.take(index.resolve(state)), args.repeat)
+        assert np.array_equal(chain_rows.index.to_numpy(), index_rows.index.to_numpy())
+        print(f"{len(index_rows):>10,} rows  chain {chain_time * 1000:8.1f} ms  "
+              f"index {index_time * 1000:8.1f} ms  ({chain_time / index_time:.1f}x)")
+        # Alokasi per rerun: take() selalu menyalin, select() memakai frame atau slice bersama bila bisa
+        take_bytes = allocated_bytes(lambda: main_data.take(index.resolve(state)))
+        select_bytes = allocated_bytes(lambda: index.select(main_data, state))
+        print(f"{'':>15} allocated: take {take_bytes / 1e6:8.1f} MB  select {select_bytes / 1e6:8.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
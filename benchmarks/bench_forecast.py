@@ -0,0 +1,119 @@
+"""Forecast benchmark: fit time, batch prediction throughput, model cache hits and backtest accuracy.
+
+``ForecastModel`` is fitted to the dashboard data (repeated ``--scale``
+times) for every training window of the dashboard tab, and to a cached
+window through the ``AggregateCache`` as the dashboard does. Prediction is
+timed for ``--days`` future days crossed with ``--scenarios`` weather
+scenarios in one ``predict`` call, against scoring the same rows one at a
+time (extrapolated from a sample of rows).
+
+The backtest rolls the forecast start over the data every ``--step`` days
+and reports, per training window, the mean absolute error relative to the
+mean hourly rentals and the mean and worst relative error of the total
+over a ``--horizon``-day horizon, with the weather recorded in each hour.
+
+    python benchmarks/bench_forecast.py --scale 10 --days 14 --scenarios 500
+"""
+import argparse
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import _paths  # noqa: F401
+from agg_cache import AggregateCache
+from forecast import TRAINING_COLUMNS, ForecastModel, backtest, calendar_rows, forecast_errors, scenario_grid
+from preprocess import load_main_data
+
+# Jendela latih tab forecast di dashboard (None = seluruh riwayat)
+WINDOWS = [8, 26, 52, None]
+REPEAT = 5
+SINGLE_ROWS = 200
+
+
+def _timed(call, repeat=REPEAT):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = call()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def training_start(data, end, weeks):
+    first = data['dteday'].min()
+    return first if weeks is None else max(first, end - pd.Timedelta(weeks=weeks))
+
+
+def random_scenarios(count, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'weathersit': rng.integers(1, 5, count),
+        'temp': rng.uniform(0.02, 1.0, count),
+        'hum': rng.uniform(0.0, 1.0, count),
+        'windspeed': rng.uniform(0.0, 0.85, count),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, default=1, help='repeat the dashboard data this many times')
+    parser.add_argument('--days', type=int, default=14, help='future days to predict')
+    parser.add_argument('--scenarios', type=int, default=300, help='weather scenarios per future hour')
+    parser.add_argument('--horizon', type=int, default=14, help='backtest horizon in days')
+    parser.add_argument('--step', type=int, default=17, help='days between backtest forecast starts')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    warnings.simplefilter('ignore', FutureWarning)
+
+    data = load_main_data()[TRAINING_COLUMNS]
+    training = pd.concat([data] * args.scale, ignore_index=True) if args.scale > 1 else data
+    last_day = data['dteday'].max()
+    print(f"{len(training):,} training rows")
+
+    for weeks in WINDOWS:
+        start = training_start(data, last_day, weeks)
+        model, seconds = _timed(lambda: ForecastModel.fit(training, start, last_day))
+        print(f"fit {str(weeks or 'all'):>4} weeks: {model.rows:>10,} rows  {seconds * 1000:8.1f} ms")
+
+    cache = AggregateCache()
+    start = training_start(data, last_day, 52)
+    key = f"{start.date()}/{last_day.date()}"
+    _, miss_seconds = _timed(lambda: cache.get_or_compute('forecast_model', key, ForecastModel.fit,
+                                                          training, start, last_day), repeat=1)
+    model, hit_seconds = _timed(lambda: cache.get_or_compute('forecast_model', key, ForecastModel.fit,
+                                                             training, start, last_day))
+    print(f"model cache: miss {miss_seconds * 1000:.1f} ms, hit {hit_seconds * 1e6:.1f} us")
+
+    calendar = calendar_rows(last_day + pd.Timedelta(days=1), last_day + pd.Timedelta(days=args.days))
+    grid = scenario_grid(calendar, random_scenarios(args.scenarios, args.seed))
+    predicted, batch_seconds = _timed(lambda: model.predict(grid))
+    sample = grid.iloc[:SINGLE_ROWS]
+    _, single_seconds = _timed(lambda: [model.predict(sample.iloc[[row]]) for row in range(len(sample))], repeat=1)
+    single_seconds *= len(grid) / len(sample)
+    print(f"predict {len(grid):,} rows ({args.days} days x 24 hours x {args.scenarios} scenarios): "
+          f"batch {batch_seconds * 1000:.1f} ms ({len(grid) / batch_seconds / 1e6:.2f} M rows/s), "
+          f"row by row ~{single_seconds:.1f} s ({single_seconds / batch_seconds:.0f}x)")
+    print(f"    mean forecast {predicted['cnt'].mean():.1f} rentals/hour")
+
+    print(f"backtest, {args.horizon}-day horizon every {args.step} days (relative MAE, mean |bias|, worst |bias|):")
+    first_day = data['dteday'].min()
+    starts = pd.date_range(first_day + pd.Timedelta(days=28), last_day - pd.Timedelta(days=args.horizon - 1),
+                           freq=f'{args.step}D')
+    for weeks in WINDOWS:
+        errors = []
+        for forecast_start in starts:
+            train_end = forecast_start - pd.Timedelta(days=1)
+            if weeks is not None and train_end - pd.Timedelta(weeks=weeks) < first_day:
+                continue
+            model = ForecastModel.fit(data, training_start(data, forecast_start, weeks), train_end)
+            horizon = data[(data['dteday'] >= forecast_start)
+                           & (data['dteday'] < forecast_start + pd.Timedelta(days=args.horizon))]
+            result = forecast_errors(backtest(model, horizon))
+            errors.append((result['mae'], abs(result['bias']), horizon['cnt'].mean()))
+        errors = np.array(errors)
+        print(f"    {str(weeks or 'all'):>4} weeks: {len(errors):>3} starts  MAE {errors[:, 0].sum() / errors[:, 2].sum():6.1%}"
+              f"  |bias| {errors[:, 1].mean():6.1%}  worst {errors[:, 1].max():6.1%}")
+
+
+if __name__ == '__main__':
+    main()
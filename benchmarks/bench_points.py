@@ -0,0 +1,122 @@
+"""Scatter payload benchmark: the default plotly encoding vs. ``compact_points``.
+
+For each point budget, the points of two dashboard scatter plots (rentals
+vs. temperature, and the temperature / humidity bubble chart) are reduced
+as the dashboard does and built twice: as before (``render_mode='auto'``,
+float64 arrays, the date of every point as hover text and ``cnt`` repeated
+in the hover data) and in the compact encoding (WebGL, float32 arrays, no
+per-point labels). Prints the figure JSON size and the time to serialize
+it, which is what Streamlit sends to the browser on every rerun.
+
+Drawing time can only be measured in a browser: ``--html`` writes a page
+with plotly.js inlined that draws every figure a few times with
+``Plotly.newPlot`` and reports the time to the next animation frame.
+
+    python benchmarks/bench_points.py --budgets 3000,20000,100000 --scale 10 --html points.html
+"""
+import argparse
+import json
+import time
+import warnings
+
+import pandas as pd
+import plotly.express as px
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+
+import _paths  # noqa: F401
+from downsample import MODE_SAMPLE, reduce_points
+from figures import compact_points
+from preprocess import load_main_data
+
+REPEAT = 5
+
+HTML_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><script>{plotlyjs}</script></head>
+<body><pre id="result">drawing...</pre><div id="chart" style="width:900px;height:600px"></div>
+<script>
+const figures = {figures};
+const repeat = {repeat};
+function nextFrame() {{ return new Promise(resolve => requestAnimationFrame(() => resolve())); }}
+async function main() {{
+  const lines = [];
+  for (const [name, figure] of Object.entries(figures)) {{
+    const times = [];
+    for (let i = 0; i < repeat; i++) {{
+      Plotly.purge('chart');
+      const start = performance.now();
+      await Plotly.newPlot('chart', figure.data, figure.layout);
+      await nextFrame();
+      times.push(performance.now() - start);
+    }}
+    times.sort((a, b) => a - b);
+    lines.push(name.padEnd(40) + ' median ' + times[Math.floor(times.length / 2)].toFixed(1) + ' ms');
+  }}
+  document.getElementById('result').textContent = lines.join('\\n');
+}}
+main();
+</script></body></html>
+"""
+
+
+def temperature_figure(points, compact):
+    fig = px.scatter(points.data, x='temp_actual', y='cnt', color='season_name', size='cnt',
+                     render_mode='webgl' if compact else 'auto')
+    return compact_points(fig) if compact else fig
+
+
+def bubble_figure(points, compact):
+    fig = px.scatter(points.data, x='temp_actual', y='hum_actual', size='cnt', color='weather_condition',
+                     hover_name=None if compact else 'dteday',
+                     hover_data=['windspeed_actual'] if compact else ['windspeed_actual', 'cnt'],
+                     render_mode='webgl' if compact else 'auto')
+    return compact_points(fig) if compact else fig
+
+
+CHARTS = [
+    ('temperature vs. rentals', ['temp_actual', 'cnt'], 'season_name', (), temperature_figure),
+    ('temperature / humidity bubbles', ['temp_actual', 'hum_actual', 'cnt'], 'weather_condition',
+     ('windspeed_actual',), bubble_figure),
+]
+
+
+def _serialize(fig):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        payload = pio.to_json(fig, validate=False)
+    return payload, (time.perf_counter() - start) / REPEAT
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budgets', default='3000,20000', help='points per scatter plot')
+    parser.add_argument('--scale', type=int, default=1, help='repeat the dashboard data this many times')
+    parser.add_argument('--html', help='write a browser page timing Plotly.newPlot for every figure')
+    args = parser.parse_args()
+    warnings.simplefilter('ignore', FutureWarning)
+
+    data = load_main_data()
+    if args.scale > 1:
+        data = pd.concat([data] * args.scale, ignore_index=True)
+    print(f"{len(data):,} rows")
+    figures = {}
+    for budget in [int(value) for value in args.budgets.split(',')]:
+        for name, axes, color, value_columns, build in CHARTS:
+            points = reduce_points(data, axes, budget, MODE_SAMPLE, color, value_columns)
+            sizes = []
+            for compact in (False, True):
+                payload, seconds = _serialize(build(points, compact))
+                sizes.append(len(payload))
+                figures[f"{name} {budget} {'compact' if compact else 'default'}"] = json.loads(payload)
+                print(f"{budget:>7} points  {name:<32} {'compact' if compact else 'default':<8} "
+                      f"{len(payload) / 1e3:8.0f} KB  to_json {seconds * 1000:7.1f} ms")
+            print(f"{'':>15}{'':<32} {'ratio':<8} {sizes[0] / sizes[1]:8.2f}x")
+
+    if args.html:
+        with open(args.html, 'w', encoding='utf-8') as handle:
+            handle.write(HTML_PAGE.format(plotlyjs=get_plotlyjs(), figures=json.dumps(figures), repeat=REPEAT))
+        print(f"open {args.html} in a browser to time drawing")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Rollup benchmark: chart aggregates from the filtered rows vs. the cubes of ``rollups.py``.
+
+For each filter state, every bar/line chart aggregate of ``bench_cube`` plus
+the key metrics is computed from the filtered rows and by the view, which
+reads each aggregate from the first cube that answers it exactly (the
+default cube, a chart projection, or the monthly, weekly or daily tier).
+Synthetic cities (``--cities``) multiply the rows and the city key.
+
+    python benchmarks/bench_rollups.py --cities 1 10
+"""
+import argparse
+import datetime
+import os
+import tempfile
+import time
+import warnings
+from collections import Counter
+
+import _paths  # noqa: F401
+from backends import FrameBackend, FrameView
+from bench_cube import CHART_GROUPS
+from filter_index import ALL_DAYS, ALL_SEASONS, ALL_TEMPS, ALL_USERS, ALL_WEATHER, FilterState
+from ingest import LiveDataset
+from preprocess import build_main_data, load_main_data
+from synthetic import HourlyModel, write_dataset
+
+METRIC_COLUMNS = ['cnt', 'temp_actual', 'hum_actual', 'windspeed_actual', 'comfort_index']
+REPEAT = 20
+
+
+def _aggregates(view):
+    """(group columns, call) of every chart aggregate and metric the benchmark times."""
+    calls = [(group_cols, lambda g=group_cols, v=value_cols: view.mean(g, v)) for group_cols, value_cols in CHART_GROUPS]
+    calls.append(((), lambda: view.totals(['cnt', 'casual', 'registered'])))
+    calls.append(((), lambda: view.means(METRIC_COLUMNS)))
+    return calls
+
+
+def _timed(view, group_filter):
+    calls = [call for group_cols, call in _aggregates(view) if group_filter(group_cols)]
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        for call in calls:
+            call()
+    return (time.perf_counter() - start) / REPEAT
+
+
+def run(main_data, label):
+    start = time.perf_counter()
+    backend = FrameBackend(*LiveDataset(main_data).snapshot())
+    build_time = time.perf_counter() - start
+    first, last = backend.bounds('dteday')
+    low, high = (float(value) for value in backend.bounds('temp_actual'))
+    states = [('no filters', None, None, ALL_SEASONS, ALL_DAYS),
+              ('first year, summer', first, datetime.date(first.year, 12, 31), 'Summer', ALL_DAYS),
+              ('weekends', None, None, ALL_SEASONS, 'Weekend')]
+    print(f"{label}: {len(main_data):,} rows {backend.cube.n_cells:,} default cells  build {build_time:.2f} s")
+    for name, date_start, date_end, season, day_type in states:
+        state = FilterState(date_start, date_end, season, ALL_WEATHER, day_type, ALL_TEMPS, low, high, ALL_USERS)
+        view = backend.view(state)
+        rows = FrameView(view.data)
+        levels = Counter(view.granularity(group_cols) for group_cols, _ in _aggregates(view))
+
+        def from_cubes(group_cols):
+            return view.granularity(group_cols) != 'rows'
+
+        rows_time, cube_time = _timed(rows, from_cubes), _timed(view, from_cubes)
+        total_rows, total_cubes = _timed(rows, lambda _: True), _timed(view, lambda _: True)
+        sources = ', '.join(f"{level} {count}" for level, count in sorted(levels.items()))
+        print(f"    {name:>20}  cube aggregates {rows_time * 1000:7.2f} -> {cube_time * 1000:6.2f} ms "
+              f"({rows_time / max(cube_time, 1e-9):5.1f}x)  all {total_rows * 1000:7.2f} -> "
+              f"{total_cubes * 1000:7.2f} ms  {sources}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cities', type=int, nargs='+', default=[1, 10],
+                        help='synthetic cities per dataset; 0 uses the dashboard data')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    warnings.simplefilter('ignore', FutureWarning)
+
+    model = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for cities in args.cities:
+            if cities == 0:
+                run(load_main_data(), 'dashboard data')
+                continue
+            model = model or HourlyModel.from_csv()
+            csv_path = os.path.join(tmp, f"synthetic_{cities}.csv")
+            write_dataset(model, csv_path, '2011-01-01', '2012-12-31', cities=cities, seed=args.seed)
+            run(build_main_data(csv_path), f"{cities} synthetic cities")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""What-if benchmark: ``simulate`` vs. predicting every hour × scenario row.
+
+A forecast model is fitted to the last ``--weeks`` weeks of the dashboard
+data. For every scenario count, a random subset of ``scenarios.DEFAULT_GRID``
+(the whole grid at its size) is evaluated over the ``--days`` after the data
+ends, three ways:
+
+* ``simulate``: the outer product of the calendar and weather parts, in blocks;
+* ``rows``: ``scenario_grid`` rows scored by one ``ForecastModel.predict``
+  call and summed per scenario, which needs memory for every row;
+* ``loop``: one ``predict`` call per scenario over the calendar rows
+  (extrapolated from the first ``LOOP_SAMPLE`` scenarios).
+
+All three must agree; the largest difference in expected rentals per day is
+printed and the script exits with status 1 above ``--tolerance``.
+
+    python benchmarks/bench_scenarios.py --counts 1000,10000,37884,100000 --days 7
+"""
+import argparse
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import _paths  # noqa: F401
+from forecast import TRAINING_COLUMNS, ForecastModel, calendar_rows, scenario_grid
+from preprocess import load_main_data
+from scenarios import DEFAULT_GRID, WEATHER_COLUMNS, simulate, weather_grid
+
+REPEAT = 3
+LOOP_SAMPLE = 50
+# Baris jam x skenario di atas batas ini tidak dibangun (memori)
+MAX_ROWS = 20_000_000
+
+
+def _timed(call, repeat=REPEAT):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = call()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def scenario_table(count, seed):
+    """``count`` scenarios: the default grid, sampled down or repeated with jittered values."""
+    grid = weather_grid(**DEFAULT_GRID)
+    rng = np.random.default_rng(seed)
+    picked = grid.iloc[rng.choice(len(grid), size=count, replace=count > len(grid))].reset_index(drop=True)
+    if count > len(grid):
+        for name in ('temp', 'hum', 'windspeed'):
+            picked[name] = picked[name] + rng.normal(0, 0.005, count)
+    return picked
+
+
+def by_rows(model, calendar, scenarios):
+    rows = scenario_grid(calendar, scenarios[WEATHER_COLUMNS])
+    predicted = model.predict(rows)
+    return predicted.groupby(rows['scenario'].to_numpy())['cnt'].sum().to_numpy() / (len(calendar) / 24)
+
+
+def by_loop(model, calendar, scenarios):
+    totals = []
+    for _, scenario in scenarios.iterrows():
+        rows = calendar.assign(**{name: scenario[name] for name in WEATHER_COLUMNS})
+        totals.append(model.predict(rows)['cnt'].sum() / (len(calendar) / 24))
+    return np.array(totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--counts', default='1000,10000,37884', help='scenario counts')
+    parser.add_argument('--days', type=int, default=7, help='calendar days per scenario')
+    parser.add_argument('--weeks', type=int, default=52, help='training window in weeks')
+    parser.add_argument('--tolerance', type=float, default=1e-6, help='largest allowed difference (rentals/day)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    warnings.simplefilter('ignore', FutureWarning)
+
+    data = load_main_data()[TRAINING_COLUMNS]
+    last_day = data['dteday'].max()
+    model = ForecastModel.fit(data, last_day - pd.Timedelta(weeks=args.weeks) + pd.Timedelta(days=1), last_day)
+    calendar = calendar_rows(last_day + pd.Timedelta(days=1), last_day + pd.Timedelta(days=args.days))
+    print(f"model trained on {model.rows:,} rows, {len(calendar):,} calendar hours")
+
+    worst = 0.0
+    for count in [int(value) for value in args.counts.split(',')]:
+        scenarios = scenario_table(count, args.seed)
+        result, simulate_seconds = _timed(lambda: simulate(model, calendar, scenarios))
+        expected = result['cnt'].to_numpy()
+        line = f"{count:>8,} scenarios  simulate {simulate_seconds * 1000:8.1f} ms"
+        if count * len(calendar) <= MAX_ROWS:
+            totals, rows_seconds = _timed(lambda: by_rows(model, calendar, scenarios))
+            worst = max(worst, float(np.abs(totals - expected).max()))
+            line += f"  rows {rows_seconds * 1000:8.1f} ms ({rows_seconds / simulate_seconds:5.1f}x)"
+        else:
+            line += f"  rows {'(skipped)':>8}"
+        sample = scenarios.iloc[:LOOP_SAMPLE]
+        totals, loop_seconds = _timed(lambda: by_loop(model, calendar, sample), repeat=1)
+        worst = max(worst, float(np.abs(totals - expected[:len(sample)]).max()))
+        loop_seconds *= count / len(sample)
+        line += f"  loop ~{loop_seconds:7.1f} s ({loop_seconds / simulate_seconds:6.0f}x)"
+        print(line)
+
+    print(f"largest difference {worst:.2e} rentals/day (tolerance {args.tolerance:g})")
+    sys.exit(1 if worst > args.tolerance else 0)
+
+
+if __name__ == '__main__':
+    main()
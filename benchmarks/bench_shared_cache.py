@@ -0,0 +1,173 @@
+"""Shared cache benchmark: per-replica memory and cache-hit latency, ``st.cache_data`` vs. the shared tier.
+
+``data_2.csv`` repeated ``--scale`` times is written to a temporary
+directory together with its Feather snapshot. ``--replicas`` processes are
+then started side by side for each mode, each loading the base frame and
+building the shared ``LiveDataset`` as the dashboard does:
+
+* ``cache_data``: the current path, the frame behind ``st.cache_data``,
+  which pickles it once and unpickles a private copy on every hit;
+* ``shared``: ``load_main_data(zero_copy=True)``, whose numeric columns map
+  the snapshot, so every replica reads the same pages.
+
+While all replicas are alive, each reports its RSS, PSS (shared pages
+divided between the processes mapping them) and private memory. The sum of
+PSS is what the replicas cost the host together.
+
+Aggregate hits are timed in this process: the bar/line chart aggregates of
+``bench_cube`` computed from the view, read back from the local
+``AggregateCache``, and read from the ``SharedStore`` by a second cache
+that never computed them (as another replica would). One filter state is
+answered by the cube, the other (a user type) by grouping the rows.
+
+    python benchmarks/bench_shared_cache.py --scale 50 --replicas 4
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+import warnings
+
+import _paths  # noqa: F401
+from agg_cache import AggregateCache, make_filter_key
+from backends import FrameBackend
+from bench_cube import CHART_GROUPS
+from bench_dashboard import write_scaled_csv
+from filter_index import ALL_DAYS, ALL_SEASONS, ALL_TEMPS, ALL_USERS, ALL_WEATHER, FilterState
+from ingest import LiveDataset
+from preprocess import load_main_data, source_version
+from shared_cache import SharedStore
+
+MODES = ['cache_data', 'shared']
+HITS = 5
+REPEAT = 20
+
+
+def memory():
+    """RSS, PSS and private memory of this process in bytes, from /proc/self/smaps_rollup."""
+    fields = {}
+    with open('/proc/self/smaps_rollup', encoding='ascii') as handle:
+        for line in handle:
+            name, _, value = line.partition(':')
+            if value.strip().endswith('kB'):
+                fields[name] = int(value.split()[0]) * 1024
+    return {'rss': fields['Rss'], 'pss': fields['Pss'],
+            'private': fields['Private_Clean'] + fields['Private_Dirty']}
+
+
+def _replica(mode, csv_path, snapshot_path, barrier, results):
+    warnings.simplefilter('ignore')
+    if mode == 'cache_data':
+        import streamlit as st
+
+        @st.cache_data
+        def load_data():
+            return load_main_data(csv_path, snapshot_path)
+
+        load_data()
+        start = time.perf_counter()
+        for _ in range(HITS):
+            main_data = load_data()
+        hit_seconds = (time.perf_counter() - start) / HITS
+        dataset = LiveDataset(main_data)
+    else:
+        start = time.perf_counter()
+        for _ in range(HITS):
+            main_data = load_main_data(csv_path, snapshot_path, zero_copy=True)
+        hit_seconds = (time.perf_counter() - start) / HITS
+        dataset = LiveDataset(main_data, version=source_version(csv_path))
+    # Sentuh semua kolom seperti rerun pertama dashboard, lalu ukur saat semua replika hidup bersamaan
+    sum(float(main_data[column].sum()) for column in main_data.columns if main_data[column].dtype.kind in 'if')
+    barrier.wait()
+    results.put(dict(memory(), hit_seconds=hit_seconds, rows=len(dataset.snapshot().main_data)))
+    barrier.wait()
+
+
+def run_replicas(mode, csv_path, snapshot_path, replicas):
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(replicas)
+    results = context.Queue()
+    processes = [context.Process(target=_replica, args=(mode, csv_path, snapshot_path, barrier, results))
+                 for _ in range(replicas)]
+    for process in processes:
+        process.start()
+    reports = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return reports
+
+
+def _timed(call):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        call()
+    return (time.perf_counter() - start) / REPEAT
+
+
+def time_aggregates(backend, state, store):
+    key = make_filter_key(state, backend.version)
+    view = backend.view(state)
+    calls = [(f"mean/{'+'.join(group_cols)}/{'+'.join(value_cols)}", view.mean, group_cols, value_cols)
+             for group_cols, value_cols in CHART_GROUPS]
+    calls.append(('row_count', view.row_count))
+
+    def lookups(cache):
+        for name, compute, *args in calls:
+            cache.get_or_compute(name, key, compute, *args)
+
+    store.clear()
+    computing = AggregateCache(store=store)
+    compute_seconds = _timed(lambda: [compute(*args) for _, compute, *args in calls])
+    lookups(computing)
+    local_seconds = _timed(lambda: lookups(computing))
+
+    def from_store():
+        # Cache lokal baru setiap kali: setiap lookup adalah miss lokal yang dijawab store
+        lookups(AggregateCache(store=store))
+
+    shared_seconds = _timed(from_store)
+    return len(calls), compute_seconds, local_seconds, shared_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, default=50, help='copies of data_2.csv')
+    parser.add_argument('--replicas', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    warnings.simplefilter('ignore', FutureWarning)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, f"data_x{args.scale}.csv")
+        snapshot_path = os.path.splitext(csv_path)[0] + '.feather'
+        rows = write_scaled_csv(csv_path, args.scale, args.seed)
+        load_main_data(csv_path, snapshot_path)
+        print(f"{rows:,} rows, snapshot {os.path.getsize(snapshot_path) / 2 ** 20:.0f} MB, "
+              f"{args.replicas} replicas")
+
+        for mode in MODES:
+            reports = run_replicas(mode, csv_path, snapshot_path, args.replicas)
+            mean = {name: sum(report[name] for report in reports) / len(reports)
+                    for name in ('rss', 'pss', 'private', 'hit_seconds')}
+            print(f"{mode:>10}: per replica RSS {mean['rss'] / 2 ** 20:6.0f} MB  PSS {mean['pss'] / 2 ** 20:6.0f} MB  "
+                  f"private {mean['private'] / 2 ** 20:6.0f} MB  |  all replicas PSS "
+                  f"{sum(report['pss'] for report in reports) / 2 ** 20:6.0f} MB  |  "
+                  f"frame {'hit' if mode == 'cache_data' else 'map'} {mean['hit_seconds'] * 1000:7.2f} ms")
+
+        main_data = load_main_data(csv_path, snapshot_path, zero_copy=True)
+        backend = FrameBackend(*LiveDataset(main_data, version=source_version(csv_path)).snapshot())
+        low, high = (float(value) for value in backend.bounds('temp_actual'))
+        store = SharedStore.open(os.path.join(tmp, 'shared'))
+        states = [('summer (cube)', FilterState(None, None, 'Summer', ALL_WEATHER, ALL_DAYS, ALL_TEMPS,
+                                                low, high, ALL_USERS)),
+                  ('casual dominant (rows)', FilterState(None, None, ALL_SEASONS, ALL_WEATHER, ALL_DAYS, ALL_TEMPS,
+                                                         low, high, 'Casual Dominant'))]
+        for name, state in states:
+            n_calls, compute_seconds, local_seconds, shared_seconds = time_aggregates(backend, state, store)
+            print(f"{name:>24}: {n_calls} aggregates computed {compute_seconds * 1000:8.2f} ms  "
+                  f"local hits {local_seconds * 1000:6.3f} ms  shared store hits {shared_seconds * 1000:6.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
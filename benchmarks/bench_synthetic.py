@@ -0,0 +1,77 @@
+"""Synthetic data benchmark: fidelity to ``data/data_2.csv`` and generation throughput.
+
+The model is fitted to the bundled data, then regenerates the same two
+years (one city, fitted year-over-year trend) so both can be compared
+profile by profile: hour x workingday, weekday, season and weather means of
+``cnt``, the casual share and the correlation of ``cnt`` with temperature
+and humidity. Throughput is measured while streaming ``--cities`` cities
+over ``--years`` years through the chunked generator without writing them.
+
+    python benchmarks/bench_synthetic.py --cities 100 --years 5
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import _paths  # noqa: F401
+from synthetic import HourlyModel, SOURCE_CSV
+
+
+def profiles(frame):
+    return {
+        'hour x workingday': frame.groupby(['workingday', 'hr'])['cnt'].mean(),
+        'weekday': frame.groupby('weekday')['cnt'].mean(),
+        'season': frame.groupby('season')['cnt'].mean(),
+        'weathersit': frame.groupby('weathersit')['cnt'].mean(),
+    }
+
+
+def scalars(frame):
+    return {
+        'cnt mean': frame['cnt'].mean(),
+        'cnt std': frame['cnt'].std(),
+        'casual share': frame['casual'].sum() / frame['cnt'].sum(),
+        'corr(cnt, temp)': frame['cnt'].corr(frame['temp']),
+        'corr(cnt, hum)': frame['cnt'].corr(frame['hum']),
+        'corr(casual, registered)': frame['casual'].corr(frame['registered']),
+        'weather 1 share': (frame['weathersit'] == 1).mean(),
+        'holidays': frame.loc[frame['holiday'] == 1, 'dteday'].nunique(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cities', type=int, default=100)
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--chunk-rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    raw = pd.read_csv(SOURCE_CSV, parse_dates=['dteday'])
+    model = HourlyModel.fit(raw)
+    synthetic = pd.concat(model.chunks('2011-01-01', '2012-12-31', growth=None, seed=1), ignore_index=True)
+
+    for name, real in profiles(raw).items():
+        generated = profiles(synthetic)[name].reindex(real.index)
+        error = (generated - real).abs().mean() / real.mean()
+        print(f"{name:>18}: correlation {real.corr(generated):.3f}  mean abs error {error:6.1%} of the mean")
+    real_scalars, generated_scalars = scalars(raw), scalars(synthetic)
+    for name in real_scalars:
+        print(f"{name:>25}: real {real_scalars[name]:9.3f}  synthetic {generated_scalars[name]:9.3f}")
+
+    end = f"{2011 + args.years - 1}-12-31"
+    rows = 0
+    peak_chunk = 0
+    start = time.perf_counter()
+    for chunk in model.chunks('2011-01-01', end, args.cities, args.chunk_rows, seed=2):
+        rows += len(chunk)
+        peak_chunk = max(peak_chunk, int(chunk.memory_usage(deep=True).sum()))
+    elapsed = time.perf_counter() - start
+    print(f"{rows:,} rows ({args.cities} cities x {args.years} years) in {elapsed:.1f} s: "
+          f"{rows / elapsed:,.0f} rows/s, largest chunk {peak_chunk / 1e6:.0f} MB")
+    assert np.isfinite(synthetic[['temp', 'atemp', 'hum', 'windspeed']].to_numpy()).all()
+
+
+if __name__ == '__main__':
+    main()
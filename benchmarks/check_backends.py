@@ -0,0 +1,295 @@
+"""Equivalence check: every chart aggregate from DuckDB vs. the pandas reference.
+
+For each filter state, every aggregate the dashboard draws (metrics, grouped
+means, heatmaps, value counts, correlations, histograms and the reduced
+scatter points in every mode) is computed three ways: pandas on the
+filtered rows, pandas from the cube (and rank index), and DuckDB over the files. The
+forecast training rows of each date range (``backend.rows``) and the hourly totals fed to
+the anomaly detector after its start (``backend.hourly_totals``) are compared too. Labels must
+match exactly and numbers within ``--rtol`` (float32 columns are averaged
+in float32 by pandas and in float64 by DuckDB). Exits with status 1 on any
+mismatch.
+
+    python benchmarks/check_backends.py --states 40
+    python benchmarks/check_backends.py --partitions data/partitions --cities city-000 city-001
+"""
+import argparse
+import datetime
+import sys
+import time
+import warnings
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+import _paths  # noqa: F401
+from backends import DuckDBBackend, FrameBackend, FrameView
+from correlation import CORR_COLUMNS, SPEARMAN
+from downsample import MODES
+from filter_index import (
+    ALL_DAYS, ALL_SEASONS, ALL_TEMPS, ALL_USERS, ALL_WEATHER, DAY_TYPE_OPTIONS, USER_TYPE_OPTIONS,
+    FilterState,
+)
+from forecast import TRAINING_COLUMNS
+from heatmaps import frame_heatmap
+from ingest import LiveDataset
+from partitions import PartitionCatalog, load_partitions
+from preprocess import load_main_data, main_data_paths
+
+# (name, view method, arguments) of every aggregate the dashboard draws
+CHECKS = [
+    ('metric_totals', 'totals', (['cnt', 'casual', 'registered'],)),
+    ('metric_means', 'means', (['cnt', 'temp_actual', 'hum_actual', 'windspeed_actual', 'comfort_index'],)),
+    ('weather_agg', 'mean', ('weather_condition', 'cnt')),
+    ('hourly_weather', 'mean', (['weather_condition', 'hr'], 'cnt')),
+    ('temp_cat_agg', 'mean', ('temp_category', 'cnt')),
+    ('comfort_cat_agg', 'mean', ('comfort_category', 'cnt')),
+    ('season_agg', 'mean', ('season_name', 'cnt')),
+    ('monthly_agg', 'mean', ('month_name', 'cnt')),
+    ('weekday_agg', 'mean', ('weekday_name', 'cnt')),
+    ('hourly_day_type', 'mean', (['workingday_label', 'hr'], 'cnt')),
+    ('time_cat_agg', 'mean', ('time_category', 'cnt')),
+    ('season_user', 'mean', ('season_name', ['casual', 'registered'])),
+    ('weather_user', 'mean', ('weather_condition', ['casual', 'registered'])),
+    ('weekday_user', 'mean', ('weekday_name', ['casual', 'registered'])),
+    ('hourly_user', 'mean', ('hr', ['casual', 'registered'])),
+    ('temp_user', 'mean', ('temp_category', ['casual', 'registered'])),
+    ('comfort_season', 'mean', ('season_name', 'comfort_index')),
+    ('wind_cat_agg', 'mean', ('windspeed_category', 'cnt')),
+    ('temp_hum_pivot', 'heatmap', ('temp_category', 'hum_category', 'cnt')),
+    ('season_weather_pivot', 'heatmap', ('season_name', 'weather_condition', 'cnt')),
+    ('hour_weekday_pivot', 'heatmap', ('hr', 'weekday_name', 'cnt')),
+    ('season_time_pivot', 'heatmap', ('season_name', 'time_category', 'cnt')),
+    ('time_weather_pivot', 'heatmap', ('time_category', 'weather_condition', 'cnt')),
+    ('ratio_pivot', 'heatmap', ('season_name', 'weekday_name', 'casual_ratio')),
+    ('user_totals', 'totals', (['casual', 'registered'],)),
+    ('comfort_dist', 'value_counts', ('comfort_category',)),
+    ('corr_matrix', 'corr', (CORR_COLUMNS,)),
+    ('corr_spearman', 'corr', (CORR_COLUMNS, SPEARMAN)),
+    ('temp_hist', 'histogram', ('temp_actual',)),
+    ('hum_hist', 'histogram', ('hum_actual',)),
+]
+# (name, axes, colour, value columns) of the scatter plots, checked in every reduction mode
+SCATTERS = [
+    ('temp_rentals', ['temp_actual', 'cnt'], 'season_name', []),
+    ('environment_bubbles', ['temp_actual', 'hum_actual'], 'season_name', ['cnt', 'windspeed_actual']),
+    ('3d_temp_hum', ['temp_actual', 'hum_actual', 'cnt'], 'season_name', []),
+    ('3d_hum_wind', ['hum_actual', 'windspeed_actual', 'cnt'], 'weather_condition', []),
+]
+
+
+def filter_states(backend, n_random, seed):
+    """The unfiltered state, each filter value on its own, then random combinations."""
+    low, high = (float(value) for value in backend.bounds('temp_actual'))
+    first, last = backend.bounds('dteday')
+    base = FilterState(None, None, ALL_SEASONS, ALL_WEATHER, ALL_DAYS, ALL_TEMPS, low, high, ALL_USERS)
+    choices = {
+        'season': [ALL_SEASONS] + sorted(backend.options('season_name')),
+        'weather': [ALL_WEATHER] + sorted(backend.options('weather_condition')),
+        'day_type': DAY_TYPE_OPTIONS,
+        'temp_category': [ALL_TEMPS] + sorted(backend.options('temp_category')),
+        'user_type': USER_TYPE_OPTIONS,
+    }
+    states = [base]
+    for field, values in choices.items():
+        states += [base._replace(**{field: value}) for value in values[1:]]
+    middle = first + (last - first) / 2
+    states.append(base._replace(date_start=first, date_end=middle))
+    states.append(base._replace(date_start=middle + datetime.timedelta(days=1), date_end=last))
+    states.append(base._replace(temp_min=10.0, temp_max=25.0))
+
+    rng = np.random.default_rng(seed)
+    span_days = (last - first).days
+    for _ in range(n_random):
+        changes = {field: values[rng.integers(len(values))] for field, values in choices.items()}
+        if rng.random() < 0.5:
+            start = first + datetime.timedelta(days=int(rng.integers(span_days)))
+            end = start + datetime.timedelta(days=int(rng.integers(1, 240)))
+            changes.update(date_start=start, date_end=min(end, last))
+        if rng.random() < 0.3:
+            temp_min = float(rng.uniform(low, high))
+            changes.update(temp_min=temp_min, temp_max=float(rng.uniform(temp_min, high)))
+        states.append(base._replace(**changes))
+    return states
+
+
+def _labels(index):
+    return [str(value) for value in index]
+
+
+def normalize(value):
+    """A plain frame (string labels, float64 numbers) for comparing results of either backend."""
+    if isinstance(value, dict):
+        value = pd.Series(value, dtype=np.float64)
+    if isinstance(value, pd.Series):
+        value = value.to_frame()
+    frame = value.copy()
+    frame.index = _labels(frame.index)
+    frame.columns = _labels(frame.columns)
+    for column in frame.columns:
+        values = frame[column]
+        if isinstance(values.dtype, pd.CategoricalDtype) or values.dtype == object:
+            frame[column] = values.astype(str)
+        elif values.dtype.kind == 'M':
+            frame[column] = values.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+        else:
+            frame[column] = values.astype(np.float64)
+    return frame
+
+
+def mismatch(expected, actual, rtol):
+    """None when both results agree, otherwise a short description of the first difference."""
+    expected, actual = normalize(expected), normalize(actual)
+    if list(expected.columns) != list(actual.columns):
+        return f"columns {list(expected.columns)} != {list(actual.columns)}"
+    if expected.shape != actual.shape:
+        return f"shape {expected.shape} != {actual.shape}"
+    if list(expected.index) != list(actual.index):
+        return "index labels differ"
+    for column in expected.columns:
+        left, right = expected[column].to_numpy(), actual[column].to_numpy()
+        if left.dtype == object or right.dtype == object:
+            if not np.array_equal(left.astype(str), right.astype(str)):
+                return f"{column}: labels differ"
+        elif not np.allclose(left, right, rtol=rtol, atol=0, equal_nan=True):
+            worst = np.nanmax(np.abs(left - right) / np.maximum(np.abs(left), 1e-300))
+            return f"{column}: relative error {worst:.2e}"
+    return None
+
+
+def points_mismatch(expected, actual, rtol):
+    """Compare reduced scatter points on the columns DuckDB returns.
+
+    Plotted rows and samples must come in the same order; density bins are
+    compared as a set of bins, since neither side promises an order for them.
+    """
+    if (expected.note, expected.aggregated) != (actual.note, actual.aggregated):
+        return f"reduction {expected.note!r} != {actual.note!r}"
+    columns = [column for column in actual.data.columns if column in expected.data.columns]
+    expected_rows, actual_rows = expected.data[columns], actual.data[columns]
+    if not expected.aggregated:
+        return mismatch(expected_rows.reset_index(drop=True), actual_rows.reset_index(drop=True), rtol)
+    if len(expected_rows) != len(actual_rows):
+        return f"{len(expected_rows)} bins != {len(actual_rows)} bins"
+    expected_rows, actual_rows = normalize(expected_rows), normalize(actual_rows)
+    labels = [column for column in columns if expected_rows[column].dtype == object]
+    numbers = [column for column in columns if column not in labels]
+    label_keys = actual_rows[labels].agg('|'.join, axis=1).to_numpy() if labels else np.zeros(len(actual_rows))
+    values = actual_rows[numbers].to_numpy()
+    unmatched = np.ones(len(actual_rows), dtype=bool)
+    for key, row in zip(expected_rows[labels].agg('|'.join, axis=1) if labels else np.zeros(len(expected_rows)),
+                        expected_rows[numbers].to_numpy()):
+        close = np.isclose(values, row, rtol=rtol, atol=0, equal_nan=True).all(axis=1)
+        candidates = np.flatnonzero(unmatched & (label_keys == key) & close)
+        if not len(candidates):
+            return f"no matching bin for {key} {row}"
+        unmatched[candidates[0]] = False
+    return None
+
+
+def load_backends(args):
+    if args.partitions:
+        catalog = PartitionCatalog(args.partitions)
+        cities = args.cities or catalog.cities[:1]
+        main_data = load_partitions(catalog, catalog.prune(cities))
+        return FrameBackend(*LiveDataset(main_data).snapshot()), DuckDBBackend(args.partitions, cities)
+    csv_path, snapshot_path = main_data_paths()
+    csv_path = args.csv or csv_path
+    if args.csv:
+        snapshot_path = args.csv.rsplit('.', 1)[0] + '.feather'
+    main_data = load_main_data(csv_path, snapshot_path)
+    return FrameBackend(*LiveDataset(main_data).snapshot()), DuckDBBackend(csv_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--csv', help='CSV with the dashboard columns (default: the dashboard data)')
+    parser.add_argument('--partitions', help='partitioned root instead of a CSV')
+    parser.add_argument('--cities', nargs='+', help='cities of the partitioned root (default: the first)')
+    parser.add_argument('--states', type=int, default=30, help='random filter combinations')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--budget', type=int, default=500, help='point budget of the scatter checks')
+    parser.add_argument('--rtol', type=float, default=1e-5)
+    args = parser.parse_args()
+    warnings.simplefilter('ignore', FutureWarning)
+
+    frame_backend, sql_backend = load_backends(args)
+    states = filter_states(frame_backend, args.states, args.seed)
+    failures = []
+    problem = mismatch(frame_backend.hourly_totals(), sql_backend.hourly_totals(), args.rtol)
+    checked = 1
+    if problem:
+        failures.append((None, 'hourly totals', problem))
+    seconds = defaultdict(float)
+    for state in states:
+        views = {}
+        for name, build in (('duckdb', sql_backend.view), ('pandas cube', frame_backend.view)):
+            start = time.perf_counter()
+            views[name] = build(state)
+            seconds[name] += time.perf_counter() - start
+        views['pandas rows'] = FrameView(views['pandas cube'].data)
+
+        tensors = {}
+
+        def heatmap(view_name, *method_args):
+            # Referensi baris memakai pivot_table; view lain membaca tensor yang dibangun sekali per state
+            if view_name == 'pandas rows':
+                return frame_heatmap(views[view_name].data, *method_args)
+            if view_name not in tensors:
+                tensors[view_name] = views[view_name].heatmaps()
+            return tensors[view_name].mean(*method_args)
+
+        def run(view_name, method, *method_args):
+            start = time.perf_counter()
+            if method == 'heatmap':
+                result = heatmap(view_name, *method_args)
+            else:
+                result = getattr(views[view_name], method)(*method_args)
+            seconds[view_name] += time.perf_counter() - start
+            return result
+
+        for name, method, method_args in CHECKS:
+            actual = run('duckdb', method, *method_args)
+            for reference in ('pandas rows', 'pandas cube'):
+                expected = run(reference, method, *method_args)
+                if method == 'value_counts':
+                    # Urutan label dengan jumlah yang sama tidak dijamin oleh value_counts pandas
+                    expected, actual = expected.sort_index(), actual.sort_index()
+                problem = mismatch(expected, actual, args.rtol)
+                checked += 1
+                if problem:
+                    failures.append((state, f"{name} vs {reference}", problem))
+        if state.date_start is not None:
+            # Baris latih forecast tidak tergantung filter lain, hanya rentang tanggal
+            problem = mismatch(frame_backend.rows(TRAINING_COLUMNS, state.date_start, state.date_end),
+                               sql_backend.rows(TRAINING_COLUMNS, state.date_start, state.date_end), args.rtol)
+            checked += 1
+            if problem:
+                failures.append((state, 'forecast rows', problem))
+            # Jam setelah jam terakhir yang sudah dinilai detektor (di sini pukul 11 hari pertama rentang)
+            after_hour = (pd.Timestamp(state.date_start) - pd.Timestamp(0)).days * 24 + 11
+            problem = mismatch(frame_backend.hourly_totals(after_hour), sql_backend.hourly_totals(after_hour),
+                               args.rtol)
+            checked += 1
+            if problem:
+                failures.append((state, 'hourly totals', problem))
+        for name, axes, color, value_columns in SCATTERS:
+            for mode in MODES:
+                actual = run('duckdb', 'points', axes, args.budget, mode, color, value_columns)
+                expected = run('pandas rows', 'points', axes, args.budget, mode, color, value_columns)
+                problem = points_mismatch(expected, actual, args.rtol)
+                checked += 1
+                if problem:
+                    failures.append((state, f"{name} ({mode})", problem))
+
+    print(f"{len(states)} filter states, {checked:,} comparisons, {len(failures)} mismatches")
+    for name, total in seconds.items():
+        print(f"{name:>12}: {total:6.2f} s")
+    for state, check, problem in failures[:20]:
+        print(f"MISMATCH {check}: {problem}\n    {state}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Import check: what starting the dashboard imports, and how long it takes.
+
+Collects the top-level ``import`` statements of ``Dashboard/Dashboard.py``
+and runs them in a fresh interpreter under ``python -X importtime``, which
+is the import cost a new container pays before the first request. The
+same interpreter also times a bare ``import streamlit``, the floor every
+Streamlit app pays, in the same trials, so a slow or busy host slows both.
+Prints the slowest top-level packages and the totals, then fails (exit
+status 1) when
+
+- the total (best of ``--trials``) exceeds ``--max-ratio`` times the
+  ``import streamlit`` baseline (best of ``--trials``), or the absolute
+  ``--budget-ms`` when one is given, or
+- a module that is only needed later was imported at startup: plotting
+  and statistics libraries the script does not use, ``plotly.express``
+  (imported where figures are built) and the optional DuckDB backend.
+
+    python benchmarks/check_imports.py --max-ratio 3
+    python -X importtime -c "import streamlit" 2> importtime.txt   # raw profile of one module
+"""
+import argparse
+import ast
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+import _paths
+
+DASHBOARD_SCRIPT = os.path.join(_paths.DASHBOARD_DIR, 'Dashboard.py')
+# Modul yang tidak boleh ikut terimpor saat start
+DEFERRED_MODULES = ['matplotlib', 'seaborn', 'scipy', 'statsmodels', 'plotly.express', 'duckdb']
+# Dashboard / import streamlit saja: ~2.1x terukur (best of 3: ~580 ms vs ~275 ms, 1 CPU); sisanya ruang gerak
+DEFAULT_MAX_RATIO = 3.0
+BASELINE_IMPORTS = 'import streamlit'
+
+_CHILD = """
+import sys
+sys.path.insert(0, {dashboard_dir!r})
+{imports}
+print('\\n'.join(sorted(sys.modules)))
+"""
+
+
+def startup_imports(script=DASHBOARD_SCRIPT):
+    """Source of the module-level import statements of ``script``."""
+    with open(script, encoding='utf-8') as handle:
+        source = handle.read()
+    tree = ast.parse(source)
+    return '\n'.join(ast.get_source_segment(source, node) for node in tree.body
+                     if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def profile_imports(imports):
+    """``(total seconds, {top-level package: cumulative seconds}, loaded module names)`` in a fresh interpreter."""
+    child = _CHILD.format(dashboard_dir=_paths.DASHBOARD_DIR, imports=imports)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', child],
+                            capture_output=True, text=True, check=True)
+    packages = defaultdict(float)
+    total = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Baris tanpa indentasi adalah impor tingkat atas; waktu kumulatifnya sudah mencakup semua anaknya
+        if name.startswith(' ') and not name.startswith('  '):
+            seconds = int(cumulative) / 1e6
+            packages[name.strip().split('.')[0]] += seconds
+            total += seconds
+    return total, dict(packages), set(result.stdout.split())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-ratio', type=float, default=DEFAULT_MAX_RATIO,
+                        help='allowed import time relative to a bare import streamlit')
+    parser.add_argument('--budget-ms', type=float, default=None, help='absolute budget, off by default')
+    parser.add_argument('--trials', type=int, default=3)
+    parser.add_argument('--top', type=int, default=12, help='slowest top-level packages to print')
+    args = parser.parse_args()
+
+    imports = startup_imports()
+    runs, baselines = [], []
+    for _ in range(args.trials):
+        runs.append(profile_imports(imports))
+        baselines.append(profile_imports(BASELINE_IMPORTS)[0])
+    total, packages, modules = min(runs, key=lambda run: run[0])
+    baseline = min(baselines)
+    print(f"startup imports of {DASHBOARD_SCRIPT}: best of {args.trials} {total * 1000:.0f} ms, "
+          f"{total / baseline:.2f}x {BASELINE_IMPORTS} ({baseline * 1000:.0f} ms, budget {args.max_ratio:.1f}x), "
+          f"{len(modules)} modules")
+    for name, seconds in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"    {name:<24} {seconds * 1000:8.1f} ms")
+
+    failures = []
+    if total > args.max_ratio * baseline:
+        failures.append(f"import time {total * 1000:.0f} ms is over {args.max_ratio:.1f}x "
+                        f"{BASELINE_IMPORTS} ({baseline * 1000:.0f} ms)")
+    if args.budget_ms is not None and total * 1000 > args.budget_ms:
+        failures.append(f"import time {total * 1000:.0f} ms is over the budget of {args.budget_ms:.0f} ms")
+    for name in DEFERRED_MODULES:
+        if name in modules:
+            failures.append(f"{name} is imported at startup")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
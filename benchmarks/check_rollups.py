@@ -0,0 +1,193 @@
+"""Rollup check: the daily tier vs. ``data/data_1.csv`` and every cube vs. the filtered rows.
+
+1. The daily tier folded from the raw hourly file (``data/data_2.csv``)
+   must reproduce the daily CSV: the same days, season, month, weekday,
+   working day and holiday flags, the same casual / registered / cnt totals,
+   and the same daily means of the weather columns (summed over the cells
+   of each day) (the daily file rounds
+   them to 6 decimals). The dashboard's own ``main_data.csv`` caps outliers,
+   so its daily totals differ from the daily file by design.
+2. For every filter state on the dashboard data, the grouped means and
+   totals the dashboard reads are computed by the view (which reads each
+   from the first cube that fits) and from the filtered rows; they must
+   agree within ``--rtol``. The cube used for each aggregate is tallied.
+3. Two cities built from the hourly file, the second with extra holidays
+   (every working day on the 15th), must load into one cube; for every
+   filter state its aggregates must match the filtered rows.
+
+Exits with status 1 on any mismatch.
+
+    python benchmarks/check_rollups.py --states 40
+"""
+import argparse
+import datetime
+import os
+import sys
+import warnings
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+import _paths  # noqa: F401
+from backends import FrameBackend, FrameView
+from check_backends import CHECKS, filter_states, mismatch
+from cube import MEASURES
+from features import LABEL_FEATURES, SCALED_FEATURES, derive_features
+from ingest import LiveDataset
+from partitions import CITY_COLUMN
+from preprocess import build_main_data, load_main_data, read_main_csv
+from rollups import DAILY, SOURCES, Rollups
+from schema import apply_schema
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+DAILY_CSV = os.path.join(DATA_DIR, 'data_1.csv')
+HOURLY_CSV = os.path.join(DATA_DIR, 'data_2.csv')
+# Kolom label per hari dan kolom mentah asalnya di file harian
+DAILY_LABELS = ['season_name', 'month_name', 'weekday_name', 'workingday_label']
+DAILY_FLAGS = ['weekday', 'workingday', 'holiday']
+DAILY_TOTALS = ['casual', 'registered', 'cnt']
+# File harian menyimpan rata-rata cuaca dengan 6 angka desimal
+WEATHER_ATOL = 1e-5
+# Referensi baris merata-ratakan kolom float32 dalam float32 (seperti check_backends.py)
+ROWS_RTOL = 1e-5
+
+
+def check_daily_csv(rollups, path):
+    """Differences between the daily tier and the daily CSV, as a list of messages."""
+    daily = pd.read_csv(path, parse_dates=['dteday']).set_index('dteday').sort_index()
+    tier = rollups.tier(DAILY)
+    if tier is None:
+        return ["the daily tier cannot be built from the hourly data"]
+    # Tier harian punya beberapa sel per hari (cuaca, kategori suhu, tipe pengguna); dijumlahkan per hari
+    day_numbers, first_cell, cell_day = np.unique(tier.dimensions['day'].cell_values().astype(np.int64),
+                                                  return_index=True, return_inverse=True)
+    days = pd.to_datetime(day_numbers, unit='D')
+    if not days.equals(pd.DatetimeIndex(daily.index)):
+        return [f"days differ: {len(days)} in the hourly data, {len(daily)} in {path}"]
+
+    def per_day(values):
+        return np.bincount(cell_day, weights=values, minlength=len(days))
+
+    problems = []
+    features = {feature.name: feature for feature in LABEL_FEATURES}
+    for name in DAILY_LABELS:
+        feature = features[name]
+        expected = np.asarray(feature.labels)[daily[feature.source].to_numpy() - feature.offset]
+        wrong = np.flatnonzero(tier.dimensions[name].cell_values()[first_cell].astype(str) != expected)
+        if wrong.size:
+            problems.append(f"{name}: {wrong.size} days differ, first {days[wrong[0]].date()}")
+    for name in DAILY_FLAGS:
+        wrong = np.flatnonzero(tier.dimensions[name].cell_values()[first_cell] != daily[name].to_numpy())
+        if wrong.size:
+            problems.append(f"{name}: {wrong.size} days differ, first {days[wrong[0]].date()}")
+    for name in DAILY_TOTALS:
+        wrong = np.flatnonzero(per_day(tier.sums[name]) != daily[name].to_numpy())
+        if wrong.size:
+            problems.append(f"{name} totals: {wrong.size} days differ, first {days[wrong[0]].date()}")
+    for feature in (feature for feature in SCALED_FEATURES if feature.name in MEASURES):
+        means = per_day(tier.sums[feature.name]) / per_day(tier.counts[feature.name]) / feature.factor
+        worst = np.max(np.abs(means - daily[feature.source].to_numpy()))
+        if worst > WEATHER_ATOL:
+            problems.append(f"{feature.source} daily means: max difference {worst:.2e}")
+    return problems
+
+
+def two_city_data(path):
+    """The hourly file as two cities whose calendars differ, laid out like ``partitions.load_partitions``."""
+    first = read_main_csv(path)
+    second = first.copy()
+    extra_holiday = (second['dteday'].dt.day == 15) & (second['workingday'] == 1)
+    second.loc[extra_holiday, ['holiday', 'workingday']] = [1, 0]
+    frame = pd.concat([first.assign(**{CITY_COLUMN: 'city-a'}), second.assign(**{CITY_COLUMN: 'city-b'})],
+                      ignore_index=True).sort_values(['dteday', 'hr', CITY_COLUMN], ignore_index=True)
+    frame[CITY_COLUMN] = frame[CITY_COLUMN].astype('category')
+    return apply_schema(derive_features(frame))
+
+
+def check_two_cities(path, states, seed, rtol=ROWS_RTOL):
+    """Mismatches between the cubes and the filtered rows of ``two_city_data``."""
+    backend = FrameBackend(*LiveDataset(two_city_data(path)).snapshot())
+    failures = []
+    for state in filter_states(backend, states, seed):
+        view = backend.view(state)
+        rows = FrameView(view.data)
+        for name, method, method_args in CHECKS:
+            if method not in ('mean', 'totals', 'means'):
+                continue
+            problem = mismatch(getattr(rows, method)(*method_args), getattr(view, method)(*method_args), rtol)
+            if problem:
+                failures.append(f"two cities, {name}: {problem}\n    {state}")
+    return len(backend.main_data), backend.cube.n_cells, failures
+
+
+def aligned_states(backend):
+    """Date ranges on whole months and weeks, with and without day-level filters."""
+    first, last = backend.bounds('dteday')
+    low, high = (float(value) for value in backend.bounds('temp_actual'))
+    base = filter_states(backend, 0, 0)[0]._replace(temp_min=low, temp_max=high)
+    year_end = datetime.date(first.year, 12, 31)
+    monday = first + datetime.timedelta(days=(7 - first.weekday()) % 7)
+    return [
+        base._replace(date_start=first, date_end=min(year_end, last)),
+        base._replace(date_start=first, date_end=min(year_end, last), season='Summer'),
+        base._replace(date_start=monday, date_end=monday + datetime.timedelta(days=7 * 20 - 1)),
+        base._replace(date_start=first, date_end=last, day_type='Weekend'),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--daily', default=DAILY_CSV, help='daily CSV to compare the daily tier with')
+    parser.add_argument('--hourly', default=HOURLY_CSV, help='raw hourly CSV the daily CSV was summed from')
+    parser.add_argument('--states', type=int, default=30, help='random filter combinations')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rtol', type=float, default=ROWS_RTOL)
+    args = parser.parse_args()
+    warnings.simplefilter('ignore', FutureWarning)
+
+    raw_rollups = Rollups(build_main_data(args.hourly))
+    failures = [f"daily CSV: {problem}" for problem in check_daily_csv(raw_rollups, args.daily)]
+    print(f"daily tier of {os.path.relpath(args.hourly)} vs {os.path.relpath(args.daily)}: "
+          f"{len(failures)} differences")
+
+    backend = FrameBackend(*LiveDataset(load_main_data()).snapshot())
+    print(f"{len(backend.main_data):,} rows")
+    for name in SOURCES:
+        cube = backend.rollups.tier(name)
+        if cube is None:
+            failures.append(f"{name}: the cube cannot be built from the dashboard data")
+            continue
+        print(f"{name:>10}: {cube.n_cells:>6,} cells, key {', '.join(cube.key_dimensions)}")
+
+    states = aligned_states(backend) + filter_states(backend, args.states, args.seed)
+    used = Counter()
+    checked = 0
+    for state in states:
+        view = backend.view(state)
+        rows = FrameView(view.data)
+        for name, method, method_args in CHECKS:
+            if method not in ('mean', 'totals', 'means'):
+                continue
+            group_cols = method_args[0] if method == 'mean' else ()
+            used[view.granularity(group_cols)] += 1
+            problem = mismatch(getattr(rows, method)(*method_args), getattr(view, method)(*method_args),
+                               args.rtol)
+            checked += 1
+            if problem:
+                failures.append(f"{name} ({view.granularity(group_cols)}): {problem}\n    {state}")
+
+    print(f"{len(states)} filter states, {checked:,} comparisons, {len(failures)} mismatches")
+    print('answered by: ' + ', '.join(f"{name} {count}" for name, count in used.most_common()))
+
+    rows, cells, city_failures = check_two_cities(args.hourly, args.states, args.seed)
+    print(f"two cities with different holidays: {rows:,} rows, {cells:,} default cells, "
+          f"{len(city_failures)} mismatches")
+    failures += city_failures
+    for failure in failures[:20]:
+        print(f"MISMATCH {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()